@@ -0,0 +1,181 @@
+# app/bulk.py
+"""
+Offline bulk scoring: stream a JSONL / CSV corpus through analyze_post /
+profile_strength with a process pool, without the HTTP layer.
+
+- records are read and written lazily, with a bounded number of chunks
+  in flight, so memory stays flat for any corpus size
+- output keeps input order (one JSON line per input record)
+- a checkpoint (<out>.ckpt) stores how many records / bytes are done, so
+  an interrupted run continues with --resume
+- progress and throughput are reported on stderr
+
+Record format:
+- post:    {"id": ..., "text": "..."}
+- profile: {"id": ..., "headline": ..., "about": ..., "experience": [...],
+            "skills": [...], "target_roles": [...]}
+  (in CSV, list fields are ";"-separated)
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from app.post_analyzer import analyze_posts
+from app.profile_analyzer import profile_strength
+
+PROFILE_FIELDS = ("headline", "about", "experience", "skills")
+LIST_FIELDS = ("experience", "skills", "target_roles")
+
+
+def read_records(path: str) -> Iterator[Dict]:
+    """Yield records from a .jsonl or .csv file (blank JSONL lines are skipped)."""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                for k in LIST_FIELDS:
+                    if isinstance(row.get(k), str):
+                        row[k] = [x.strip() for x in row[k].split(";") if x.strip()]
+                yield row
+    else:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _is_profile(rec: Dict) -> bool:
+    return "text" not in rec and any(k in rec for k in PROFILE_FIELDS)
+
+
+def score_chunk(records: List[Dict], model_path: Optional[str] = None) -> List[str]:
+    """Score one chunk (runs in a worker). Returns JSON lines in input order."""
+    out: List[Optional[Dict]] = [None] * len(records)
+    posts = []
+    for i, rec in enumerate(records):
+        if _is_profile(rec):
+            try:
+                res = profile_strength(
+                    rec.get("headline") or "", rec.get("about") or "",
+                    rec.get("experience") or [], rec.get("skills") or [], rec.get("target_roles") or [],
+                    rec.get("semantic_skills"),
+                )
+                out[i] = {"id": rec.get("id"), "kind": "profile", "result": res}
+            except Exception as e:
+                out[i] = {"id": rec.get("id"), "kind": "profile", "error": str(e)}
+        else:
+            posts.append(i)
+    if posts:
+        try:
+            results = analyze_posts([records[i].get("text") or "" for i in posts], model_path_for_rewrites=model_path)
+            for i, res in zip(posts, results):
+                out[i] = {"id": records[i].get("id"), "kind": "post", "result": res}
+        except Exception as e:
+            for i in posts:
+                out[i] = {"id": records[i].get("id"), "kind": "post", "error": str(e)}
+    return [json.dumps(r, ensure_ascii=False) + "\n" for r in out]
+
+
+def _chunks(records: Iterable[Dict], size: int) -> Iterator[List[Dict]]:
+    it = iter(records)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class _InlineExecutor:
+    """workers=0: score in this process (same interface as the pool)."""
+
+    def submit(self, fn, *args):
+        fut = Future()
+        try:
+            fut.set_result(fn(*args))
+        except Exception as e:
+            fut.set_exception(e)
+        return fut
+
+    def shutdown(self, wait=True):
+        pass
+
+
+def _load_checkpoint(path: str) -> Dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return {}
+
+
+def _save_checkpoint(path: str, state: Dict):
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f)
+    os.replace(tmp, path)
+
+
+def run_bulk(inp: str, out: str, workers: int = None, chunk_size: int = 64, resume: bool = False,
+             model_path: Optional[str] = None, report_every: float = 5.0) -> Dict:
+    """Score `inp` into `out`. Returns a summary dict."""
+    workers = (os.cpu_count() or 1) if workers is None else workers
+    ckpt_path = out + ".ckpt"
+    state = _load_checkpoint(ckpt_path) if resume else {}
+    if state and state.get("input") != os.path.abspath(inp):
+        raise ValueError(f"checkpoint {ckpt_path} belongs to another input: {state.get('input')}")
+    skip = state.get("done", 0)
+
+    fout = open(out, "r+b" if resume and os.path.exists(out) else "wb")
+    # drop anything written after the last checkpoint (interrupted mid-chunk)
+    fout.seek(state.get("bytes", 0))
+    fout.truncate()
+
+    records = islice(read_records(inp), skip, None)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 0 else _InlineExecutor()
+    max_in_flight = max(2, workers * 2)
+    in_flight: deque = deque()
+    done = skip
+    started = last_report = time.monotonic()
+
+    def _flush_one():
+        nonlocal done, last_report
+        fut, n = in_flight.popleft()
+        for line in fut.result():
+            fout.write(line.encode("utf-8"))
+        fout.flush()
+        done += n
+        _save_checkpoint(ckpt_path, {"input": os.path.abspath(inp), "done": done, "bytes": fout.tell()})
+        now = time.monotonic()
+        if now - last_report >= report_every:
+            last_report = now
+            rate = (done - skip) / max(1e-9, now - started)
+            print(f"[bulk] {done} records  {rate:,.0f} rec/s  {now - started:,.0f}s", file=sys.stderr)
+
+    try:
+        for chunk in _chunks(records, chunk_size):
+            in_flight.append((executor.submit(score_chunk, chunk, model_path), len(chunk)))
+            if len(in_flight) >= max_in_flight:
+                _flush_one()
+        while in_flight:
+            _flush_one()
+    finally:
+        executor.shutdown(wait=True)
+        fout.close()
+
+    elapsed = time.monotonic() - started
+    summary = {
+        "records": done,
+        "new_records": done - skip,
+        "seconds": round(elapsed, 2),
+        "records_per_second": round((done - skip) / max(1e-9, elapsed), 1),
+    }
+    _save_checkpoint(ckpt_path, {"input": os.path.abspath(inp), "done": done,
+                                 "bytes": os.path.getsize(out), "complete": True})
+    print(f"[bulk] done: {summary}", file=sys.stderr)
+    return summary
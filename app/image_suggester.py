@@ -1,69 +1,86 @@
 # app/image_suggester.py
 """
 Ask the local LLM for image suggestions based on post content.
-If Llama is not available, fall back to rule-based suggestions.
+If no model path is given or Llama is not available, fall back to
+rule-based suggestions.
 """
 
 import re
-from typing import List
-from utils.text_cleaning import clean_text, extract_hashtags
+from typing import List, Optional
+from utils.text_cleaning import clean_text
+from utils.text_features import TextFeatures
+from utils.llm_registry import LLMUnavailable, registry
+from utils.result_cache import get_cache, make_key
+from utils.prefix_cache import prompt_prefix
+from utils.prompt_budget import PromptBudget
+from utils.rule_suggestions import image_suggestions
 
 DEFAULT_MODEL_PATH = "models/mistral-7b-instruct-v0.1.Q4_K_M.gguf"
 
-_llm = None
+# constant instructions first (their KV state is cached), then the post and count
+IMAGE_PROMPT_PREFIX = prompt_prefix(
+    "You are an expert visual designer for LinkedIn posts. "
+    "Given the post text below, suggest short image concepts (each 6-10 words) "
+    "that would pair well with the post. No explanation — just numbered list.\n\n"
+    "Post:\n\n"
+)
+IMAGE_PROMPT = IMAGE_PROMPT_PREFIX + "%s\n\nExactly %d image suggestions:"
+IMAGE_MAX_TOKENS = 180
+
+_image_cache = get_cache("suggest_images")
+
 def _get_llm(model_path: str = DEFAULT_MODEL_PATH):
-    global _llm
-    if _llm is not None:
-        return _llm
+    """Shared handle from the process-wide registry, or None (caller releases it)."""
     try:
-        from llama_cpp import Llama
-        _llm = Llama(model_path=model_path, n_ctx=2048, n_threads=4)
-        return _llm
+        return registry.acquire(model_path)
     except Exception:
-        _llm = None
         return None
 
-def suggest_images(text: str, model_path: str = DEFAULT_MODEL_PATH, n: int = 3) -> List[str]:
-    """Return n short image suggestions (type/style) that fit this post."""
+def suggest_images(text: str, model_path: Optional[str] = DEFAULT_MODEL_PATH, n: int = 3,
+                   fallback: bool = True) -> List[str]:
+    """Return n short image suggestions (type/style) that fit this post.
+    model_path=None skips the LLM (rule-based suggestions only); with
+    fallback=False an LLM that gives no suggestions raises LLMUnavailable."""
     txt = clean_text(text)
-    # try LLM
-    llm = _get_llm(model_path)
-    if llm:
-        prompt = (
-            "You are an expert visual designer for LinkedIn posts. "
-            "Given the post text below, suggest exactly %d short image concepts (each 6-10 words) "
-            "that would pair well with the post. No explanation — just numbered list.\n\n"
-            "Post:\n\n%s\n\nImage suggestions:"
-        ) % (n, txt)
-        try:
-            out = llm(prompt, max_tokens=180)
-            choices = out.get("choices") or []
-            if choices:
-                raw = choices[0].get("text") or choices[0].get("message", {}).get("content", "")
-                lines = [l.strip(" -•\t") for l in raw.split("\n") if l.strip()]
-                # keep short cleaned lines
-                results = []
-                for line in lines:
-                    # remove numbering
-                    line = re.sub(r"^\d+[\.\)]\s*", "", line).strip()
-                    if line:
-                        results.append(line)
-                if results:
-                    return results[:n]
-        except Exception:
-            pass
+    key = make_key(txt, n, model_path, IMAGE_PROMPT, IMAGE_MAX_TOKENS)
+    cached = _image_cache.get(key)
+    if cached is not None:
+        return cached
+    results = _llm_image_suggestions(txt, model_path, n) if model_path else None
+    if results:
+        _image_cache.set(key, results)
+        return results
+    if model_path and not fallback:
+        raise LLMUnavailable(f"no image suggestions from {model_path}")
+    # fallback rules (based on content type); not cached under the LLM's key
+    results = image_suggestions(TextFeatures(txt), n)
+    if not model_path:
+        _image_cache.set(key, results)
+    return results
 
-    # fallback rules (based on content type)
-    tags = extract_hashtags(txt)
-    suggestions = []
-    txt_lower = txt.lower()
-    if "story" in txt_lower or "learned" in txt_lower or "lesson" in txt_lower:
-        suggestions.append("Photo: candid photo of person telling a story")
-    if any(word in txt_lower for word in ["data","chart","metrics","growth","increase"]):
-        suggestions.append("Graphic: clean bar/line chart with key metric highlighted")
-    if any(word in txt_lower for word in ["team","we","collaborat","hiring"]):
-        suggestions.append("Photo: group/team working or handshake image")
-    # fill with general suggestions
-    while len(suggestions) < n:
-        suggestions.append("Stylized text card with a bold headline and brand color")
-    return suggestions[:n]
+def _llm_image_suggestions(txt: str, model_path: str, n: int) -> Optional[List[str]]:
+    """The model's suggestions, or None if it is unavailable, fails or returns none."""
+    llm = _get_llm(model_path)
+    if not llm:
+        return None
+    try:
+        with llm:
+            # keep the post within n_ctx minus room for the answer
+            budget = PromptBudget.for_llm(llm.llm, IMAGE_MAX_TOKENS)
+            fitted = budget.fit(IMAGE_PROMPT % ("", n), {"text": txt})["text"]
+            out = llm(IMAGE_PROMPT % (fitted, n), max_tokens=IMAGE_MAX_TOKENS)
+    except Exception:
+        return None
+    choices = out.get("choices") or []
+    if not choices:
+        return None
+    raw = choices[0].get("text") or choices[0].get("message", {}).get("content", "")
+    lines = [l.strip(" -•\t") for l in raw.split("\n") if l.strip()]
+    # keep short cleaned lines
+    results = []
+    for line in lines:
+        # remove numbering
+        line = re.sub(r"^\d+[\.\)]\s*", "", line).strip()
+        if line:
+            results.append(line)
+    return results[:n] or None
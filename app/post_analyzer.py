@@ -2,206 +2,282 @@
 """
 Post analysis module.
 - provides: analyze_post(text) -> dict
-- tries to use sentence-transformers for embeddings;
+- provides: analyze_posts(texts) -> list of dicts (batch version)
+- tries to use sentence-transformers for embeddings (or its int8 ONNX
+  export, EMBEDDING_BACKEND=onnx; see utils/embeddings.py);
   optionally uses llama-cpp-python for rewrite suggestions if available.
+- with a user_id, novelty is measured against that user's stored posts
+  (app/post_history.py) and the report lists the nearest past posts and
+  near-duplicates; add_to_history() stores posts
+- weights, keyword lists and rule points come from the scoring rules file
+  (utils/scoring_rules.py); a batch is scored as one component matrix
 """
 
-from typing import Dict, List
-from utils.text_cleaning import (
-    clean_text, extract_hashtags, sentence_tokenize, count_words, count_chars
-)
+from typing import Dict, List, Optional, Union
+from utils.text_cleaning import clean_text, count_chars
+from utils.text_features import TextFeatures
+from utils.lazy import LazyResource, optional_module
+from utils.llm_registry import LLMUnavailable, registry
+from utils.result_cache import get_cache, make_key
+from utils.metrics import stage
+from utils.prefix_cache import prompt_prefix
+from utils.prompt_budget import PromptBudget
+from utils.rule_suggestions import text_suggestions
+from utils.embeddings import embedding_key, load_embedder
+from utils.scoring_rules import POST_COMPONENTS, ScoringRules, get_rules
+from app.topic_bank import get_topic_bank
+from app.post_history import get_history, np
 import math
 
-# optional libs
-try:
-    import textstat
-except Exception:
-    textstat = None
+# optional libs (loaded on first use, or by warmup())
+_textstat = optional_module("textstat")
+
+SENTENCE_MODEL_NAME = "all-MiniLM-L6-v2"
+# on-disk embedding caches are kept apart per backend
+SENTENCE_MODEL_KEY = embedding_key(SENTENCE_MODEL_NAME)
+SENTENCE_DIM = 384  # its embedding size, for history rows stored without the model
+HISTORY_NEAREST_K = 3
+
+def _load_sentence_model():
+    return load_embedder(SENTENCE_MODEL_NAME)
+
+_sentence_model = LazyResource("sentence_model", _load_sentence_model)
+
+def get_sentence_model():
+    """The shared sentence-embedding model (EMBEDDING_BACKEND), or None if unavailable."""
+    return _sentence_model.get()
 
-try:
-    from sentence_transformers import SentenceTransformer, util
-    _SENTENCE_MODEL = SentenceTransformer("all-MiniLM-L6-v2")
-except Exception:
-    _SENTENCE_MODEL = None
+# constant instructions first (their KV state is cached), then the post
+SUGGESTION_PREFIX = prompt_prefix(
+    "Provide very short (1-2 line) actionable suggestions to improve this LinkedIn post for engagement:\n\n"
+)
+SUGGESTION_PROMPT = SUGGESTION_PREFIX + "{text}\n\n{n} suggestions:"
+SUGGESTION_MAX_TOKENS = 120
+
+_post_cache = get_cache("analyze_post")
+
+# compile the rules at import: their lexicons must be registered before texts are matched
+get_rules()
 
-# Lazy LLM importer (used for rewrites if available)
+# Shared LLM handle (used for rewrites if available); caller must release it
 def get_llm(model_path: str = "models/mistral-7b-instruct-v0.1.Q4_K_M.gguf"):
     try:
-        from llama_cpp import Llama
-        return Llama(model_path=model_path, n_ctx=2048, n_threads=4)
+        return registry.acquire(model_path)
     except Exception:
         return None
 
-def readability_score(text: str) -> float:
+def readability_score(text: Union[str, TextFeatures]) -> float:
     """Return normalized 0-100 readability (higher = easier)."""
-    text = clean_text(text)
-    if not text:
+    f = TextFeatures.of(text)
+    if not f.text:
         return 0.0
+    textstat = _textstat.get()
     if textstat:
         try:
-            score = textstat.flesch_reading_ease(text)
+            with stage("textstat"):
+                score = textstat.flesch_reading_ease(f.text)
             # Normalize roughly: typical Flesch range (0-100). Clip.
             return max(0.0, min(100.0, score))
         except Exception:
             pass
     # fallback: simple heuristic (shorter sentences = easier)
-    sents = sentence_tokenize(text)
+    sents = f.sentences
     avg_len = sum(len(s.split()) for s in sents) / max(1, len(sents))
     # map avg_len 10->100, 40->0
     return max(0.0, min(100.0, 100 - (avg_len - 10) * 3))
 
-def structure_score(text: str) -> float:
+def structure_score(text: Union[str, TextFeatures]) -> float:
     """Check paragraphs, hook, CTA, line breaks. Return 0-100."""
-    text = clean_text(text)
-    if not text:
-        return 0.0
-    sents = sentence_tokenize(text)
-    score = 0.0
-    # Hook check: first sentence length and presence of keywords
-    first = sents[0] if sents else ""
-    if 5 <= len(first.split()) <= 25:
-        score += 25
-    # paragraphing
-    if "\n" in text or len(sents) >= 3:
-        score += 20
-    # CTA presence
-    ctas = ["dm", "comment", "share", "like", "follow", "connect", "visit"]
-    if any(w in text.lower() for w in ctas):
-        score += 20
-    # storytelling words
-    story_triggers = ["story", "learned", "today i", "this happened", "i was"]
-    if any(t in text.lower() for t in story_triggers):
-        score += 15
-    # sentence variety
-    if len(sents) > 1:
-        score += 10
-    return min(100.0, score)
-
-def hashtag_score(text: str) -> float:
-    tags = extract_hashtags(text)
-    if not tags:
-        return 0.0
-    # prefer 3-7 hashtags
-    n = len(tags)
-    if 3 <= n <= 7:
-        return 100.0
-    if n < 3:
-        return 50.0
-    return 70.0
-
-def novelty_score(text: str, top_topics: List[str] = None) -> float:
+    return get_rules().post.structure([TextFeatures.of(text)])[0]
+
+def hashtag_score(text: Union[str, TextFeatures]) -> float:
+    # prefer 3-7 hashtags (bands in the rules file)
+    return get_rules().post.hashtags([TextFeatures.of(text)])[0]
+
+def novelty_score(text: Union[str, TextFeatures], top_topics: List[str] = None, user_id: str = None) -> float:
     """Estimate novelty using embedding similarity to topic list (optional)."""
-    text = clean_text(text)
-    if not text:
-        return 0.0
-    if _SENTENCE_MODEL is None or not top_topics:
+    return novelty_scores([text], top_topics, user_id)[0]
+
+def novelty_scores(texts: List[Union[str, TextFeatures]], top_topics: List[str] = None,
+                   user_id: str = None) -> List[float]:
+    """Batch novelty: texts are embedded in one encode call and scored against
+    the cached topic bank with a single matmul."""
+    return _novelty([TextFeatures.of(t) for t in texts], top_topics, user_id)[0]
+
+def _novelty(feats: List[TextFeatures], top_topics: List[str] = None, user_id: str = None):
+    """(novelty per text, originality report per text or None without user_id)."""
+    scores = [0.0] * len(feats)
+    todo = [i for i, f in enumerate(feats) if f.text]
+    history = get_history(user_id) if user_id and np is not None else None
+    use_history = history is not None and len(history) > 0
+    model = _sentence_model.get() if top_topics or use_history else None
+    emb_texts = None
+    if model is not None and todo:
+        with stage("embed"):
+            emb_texts = model.encode(
+                [feats[i].text for i in todo], convert_to_numpy=True, normalize_embeddings=True
+            )
+    if emb_texts is None or not top_topics:
         # fallback: reward medium length
-        words = count_words(text)
-        return max(0.0, min(100.0, 100 - abs(words - 60)))
-    # semantic novelty: lower similarity to common topics -> higher novelty
-    emb_text = _SENTENCE_MODEL.encode(text, convert_to_tensor=True)
-    sims = []
-    for t in top_topics:
-        emb_t = _SENTENCE_MODEL.encode(t, convert_to_tensor=True)
-        sims.append(float(util.cos_sim(emb_text, emb_t).max()))
-    if not sims:
-        return 50.0
-    mean_sim = sum(sims) / len(sims)
-    # similarity in [-1,1] -> map to novelty 0-100 (lower sim = more novel)
-    novelty = max(0.0, min(100.0, (1.0 - mean_sim) * 50 + 50))
-    return novelty
-
-def simple_sentiment_score(text: str) -> float:
+        for i in todo:
+            words = feats[i].word_count
+            scores[i] = max(0.0, min(100.0, 100 - abs(words - 60)))
+    else:
+        # semantic novelty: lower similarity to common topics -> higher novelty
+        # topic lists come with each request: memoized, not written to disk
+        bank = get_topic_bank(model, SENTENCE_MODEL_KEY, top_topics, cache_dir=None)
+        for i, nov in zip(todo, bank.novelty_many(emb_texts)):
+            scores[i] = nov
+    if not user_id:
+        return scores, None
+    reports = [{"nearest": [], "duplicates": []} for _ in feats]
+    if not use_history:
+        return scores, reports
+    with stage("history"):
+        for j, i in enumerate(todo):
+            reports[i]["duplicates"] = [
+                {"id": pid, "jaccard": round(sim, 3)} for pid, sim in history.duplicates(feats[i].text)
+            ]
+            if emb_texts is not None:
+                near = history.nearest(emb_texts[j], HISTORY_NEAREST_K)
+                reports[i]["nearest"] = [{"id": pid, "similarity": round(sim, 3)} for pid, sim in near]
+                # versus the user's own posts: distance to the closest one
+                if near:
+                    scores[i] = max(0.0, min(100.0, (1.0 - near[0][1]) * 100))
+    return scores, reports
+
+def add_to_history(user_id: str, posts: List[Dict[str, str]]) -> Dict[str, int]:
+    """Store {"id", "text"} posts in the user's history (embedded if the model is loaded)."""
+    history = get_history(user_id)
+    pairs = [(p["id"], p.get("text") or "") for p in posts]
+    model = _sentence_model.get()
+    embs = None
+    if model is not None and pairs:
+        with stage("embed"):
+            embs = model.encode([clean_text(t) for _, t in pairs], convert_to_numpy=True,
+                                normalize_embeddings=True)
+    added = history.add(pairs, embs, dim=SENTENCE_DIM)
+    return {"added": added, "total": len(history)}
+
+def simple_sentiment_score(text: Union[str, TextFeatures]) -> float:
     """Rudimentary sentiment - positive words / negative words ratio mapped to 0-100."""
-    if not text:
-        return 50.0
-    positive = ["great","good","amazing","love","useful","helpful","win","success","improve"]
-    negative = ["problem","worse","issue","bad","fail","losing","loss"]
-    txt = text.lower()
-    p = sum(txt.count(w) for w in positive)
-    n = sum(txt.count(w) for w in negative)
-    if p + n == 0:
-        return 50.0
-    score = 50 + (p - n) * 10
-    return max(0.0, min(100.0, score))
-
-def raw_score_components(text: str) -> Dict[str, float]:
+    return get_rules().post.sentiment([TextFeatures.of(text)])[0]
+
+def raw_score_components(text: Union[str, TextFeatures], top_topics: List[str] = None,
+                         user_id: str = None) -> Dict[str, float]:
     """Compute component scores used for final scoring."""
-    return {
-        "readability": readability_score(text),
-        "structure": structure_score(text),
-        "hashtags": hashtag_score(text),
-        "sentiment": simple_sentiment_score(text),
-        "novelty": novelty_score(text),
-    }
+    return raw_score_components_batch([text], top_topics, user_id)[0]
+
+def raw_score_components_batch(texts: List[Union[str, TextFeatures]], top_topics: List[str] = None,
+                               user_id: str = None) -> List[Dict[str, float]]:
+    """Component scores for many texts: features are extracted once per text, embeddings once per batch."""
+    feats = [TextFeatures.of(t) for t in texts]
+    return _components(feats, novelty_scores(feats, top_topics, user_id))
+
+def _components(feats: List[TextFeatures], novelty: List[float]) -> List[Dict[str, float]]:
+    return _rows(_score_matrix(get_rules(), feats, novelty))
+
+def _score_matrix(rules: ScoringRules, feats: List[TextFeatures], novelty: List[float]):
+    """(texts x POST_COMPONENTS) component scores under `rules`."""
+    return rules.post.matrix(feats, [readability_score(f) for f in feats], novelty)
+
+def _rows(matrix) -> List[Dict[str, float]]:
+    return [dict(zip(POST_COMPONENTS, map(float, row))) for row in matrix]
 
 def compute_final_score(components: Dict[str, float]) -> float:
-    """Weighted aggregation into 0-100 final score."""
-    # weights (tweak later)
-    w = {
-        "structure": 0.30,
-        "readability": 0.20,
-        "hashtags": 0.10,
-        "sentiment": 0.10,
-        "novelty": 0.30,
-    }
-    # normalize
-    total = 0.0
-    for k, weight in w.items():
-        total += components.get(k, 0.0) * weight
-    return max(0.0, min(100.0, total))
+    """Weighted aggregation into 0-100 final score (weights from the rules file)."""
+    return get_rules().post.final_score(components)
 
-def generate_text_suggestions(text: str, model_path: str = None, n: int = 3) -> List[str]:
+def generate_text_suggestions(text: Union[str, TextFeatures], model_path: str = None, n: int = 3,
+                              fallback: bool = True) -> List[str]:
     """Return a few short suggestions for improvement.
-    If a local LLM (Mistral) is present, use it. Otherwise use rule-based fixes.
+    If a local LLM (Mistral) is present, use it. Otherwise use rule-based fixes,
+    or with fallback=False raise LLMUnavailable.
     """
+    f = TextFeatures.of(text)
+    suggestions = _llm_text_suggestions(f, model_path, n) if model_path else None
+    if suggestions:
+        return suggestions
+    if not fallback:
+        raise LLMUnavailable(f"no suggestions from {model_path}")
+    # fallback rule-based suggestions:
+    return text_suggestions(f, n)
+
+def _llm_text_suggestions(f: TextFeatures, model_path: str, n: int) -> Optional[List[str]]:
+    """The model's suggestions, or None if it is unavailable, fails or returns none."""
+    llm = get_llm(model_path=model_path)
+    if not llm:
+        return None
     suggestions = []
-    # try LLM if available and model_path provided
-    if model_path:
-        llm = get_llm(model_path=model_path)
-        if llm:
-            prompt = f"Provide {n} very short (1-2 line) actionable suggestions to improve this LinkedIn post for engagement:\n\n{text}\n\nSuggestions:"
-            try:
-                out = llm(prompt, max_tokens=120)
-                # extract text safely
-                choices = out.get("choices") or []
-                if choices:
-                    raw = choices[0].get("text") or choices[0].get("message", {}).get("content", "")
-                    for line in raw.strip().split("\n"):
-                        line = line.strip("-• \t")
-                        if line:
-                            suggestions.append(line)
-                if suggestions:
-                    return suggestions[:n]
-            except Exception:
-                pass
+    try:
+        with llm:
+            # keep the post within n_ctx minus room for the answer
+            budget = PromptBudget.for_llm(llm.llm, SUGGESTION_MAX_TOKENS)
+            txt = budget.fit(SUGGESTION_PROMPT.format(n=n, text=""), {"text": f.text})["text"]
+            prompt = SUGGESTION_PROMPT.format(n=n, text=txt)
+            with stage("llm_generate"):
+                out = llm(prompt, max_tokens=SUGGESTION_MAX_TOKENS)
+        # extract text safely
+        choices = out.get("choices") or []
+        if choices:
+            raw = choices[0].get("text") or choices[0].get("message", {}).get("content", "")
+            for line in raw.strip().split("\n"):
+                line = line.strip("-• \t")
+                if line:
+                    suggestions.append(line)
+    except Exception:
+        return None
+    return suggestions[:n] or None
 
-    # fallback rule-based suggestions:
-    txt = clean_text(text)
-    if len(txt.split()) > 200:
-        suggestions.append("Shorten the intro — keep the hook within 1–2 short sentences.")
-    else:
-        suggestions.append("Make the first sentence a clear hook that promises value or a lesson.")
-    if not any(w in txt.lower() for w in ["dm", "comment", "share", "like", "connect"]):
-        suggestions.append("Add a clear CTA (e.g., 'Comment your thoughts' or 'DM me to learn more').")
-    if len(extract_hashtags(txt)) < 2:
-        suggestions.append("Add 3–5 relevant hashtags to increase discoverability.")
-    # ensure n suggestions
-    while len(suggestions) < n:
-        suggestions.append("Consider adding a short real-world example or metric to show impact.")
-    return suggestions[:n]
-
-def analyze_post(text: str, model_path_for_rewrites: str = None) -> Dict:
-    """Main entry point: analyze a post and return components, final score, and suggestions."""
-    txt = clean_text(text)
-    comps = raw_score_components(txt)
-    final = compute_final_score(comps)
-    suggestions = generate_text_suggestions(txt, model_path=model_path_for_rewrites, n=3)
+def _post_report(f: TextFeatures, comps: Dict[str, float], final: float, suggestions: List[str]) -> Dict:
     return {
         "final_score": round(final, 2),
         "components": {k: round(v, 2) for k, v in comps.items()},
         "suggestions": suggestions,
-        "hashtags": extract_hashtags(txt),
-        "word_count": count_words(txt),
-        "char_count": count_chars(txt),
+        "hashtags": list(f.hashtags),
+        "word_count": f.word_count,
+        "char_count": count_chars(f.text),
     }
+
+def analyze_post(text: str, model_path_for_rewrites: str = None, top_topics: List[str] = None,
+                 user_id: str = None) -> Dict:
+    """Main entry point: analyze a post and return components, final score, and suggestions."""
+    return analyze_posts([text], model_path_for_rewrites, top_topics, user_id)[0]
+
+def analyze_posts(texts: List[str], model_path_for_rewrites: str = None, top_topics: List[str] = None,
+                  user_id: str = None) -> List[Dict]:
+    """Batch entry point: same output as calling analyze_post on each text,
+    but tokenization, embeddings and readability run in one pass over the batch."""
+    # the user's history changes the answer whenever it grows
+    history = (user_id, len(get_history(user_id))) if user_id and np is not None else None
+    rules = get_rules()
+    with stage("features"):
+        feats = [TextFeatures(t) for t in texts]
+        # raw text: sentences are segmented from it, and line breaks end them
+        keys = [_post_key(f.raw, model_path_for_rewrites, top_topics, history, rules.digest) for f in feats]
+    results = [_post_cache.get(k) for k in keys]
+    todo = [i for i, r in enumerate(results) if r is None]
+    if todo:
+        with stage("components"):
+            batch = [feats[i] for i in todo]
+            novelty, originality = _novelty(batch, top_topics, user_id)
+            matrix = _score_matrix(rules, batch, novelty)
+            finals = rules.post.final(matrix)
+        with stage("report"):
+            for j, (i, c) in enumerate(zip(todo, _rows(matrix))):
+                llm = _llm_text_suggestions(feats[i], model_path_for_rewrites, 3) if model_path_for_rewrites else None
+                results[i] = _post_report(feats[i], c, finals[j], llm or text_suggestions(feats[i], 3))
+                if originality is not None:
+                    results[i]["originality"] = originality[j]
+                # the key names the LLM: a rule-based fallback must not be served from it later
+                if llm or not model_path_for_rewrites:
+                    _post_cache.set(keys[i], results[i])
+    return results
+
+def _post_key(txt: str, model_path: str = None, top_topics: List[str] = None, history=None,
+              rules_digest: str = "") -> str:
+    # the LLM prompt only matters when rewrites are requested
+    llm_part = (model_path, SUGGESTION_PROMPT, SUGGESTION_MAX_TOKENS) if model_path else None
+    if history is None:
+        return make_key(txt, list(top_topics or []), llm_part, rules_digest)
+    return make_key(txt, list(top_topics or []), llm_part, list(history), rules_digest)
@@ -0,0 +1,226 @@
+# app/post_history.py
+"""
+Per-user post history for originality checks.
+- every user gets a directory (POST_HISTORY_DIR/<hash of the user id>)
+  of append-only files, memory-mapped on read:
+    emb.f16      (n, d) float16 post embeddings, row-normalized
+    sig.u64      (n, 5) uint64: 256-bit embedding sign hash + text SimHash
+    minhash.u32  (n, MINHASH_PERM) text MinHash
+    ids.txt      post ids, one per line; written last, and its line count
+                 is the row count, so a torn append is never read
+    planes.npy   the random hyperplanes behind the sign hash
+- nearest(): a Hamming scan of the sign hashes (bit agreement tracks the
+  angle between embeddings) keeps POST_HISTORY_CANDIDATES rows, which
+  are then scored exactly against the float16 matrix
+- duplicates(): SimHash Hamming prefilter, then MinHash Jaccard
+- appends hold an flock, so cpu_pool worker processes can share a user;
+  readers pick up rows appended elsewhere on their next call
+- posts added while no embedding model is loaded get a zero embedding:
+  they take part in duplicate checks only
+
+Env: POST_HISTORY_DIR, POST_HISTORY_CANDIDATES, DUP_SIMHASH_DISTANCE, DUP_JACCARD
+"""
+
+import hashlib
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import fcntl
+except Exception:  # Windows: appends are then only serialized within a process
+    fcntl = None
+
+from app.topic_bank import _normalize
+from utils.near_dup import MINHASH_PERM, jaccard, minhash, np, popcount, shingles, simhash
+
+DEFAULT_DIR = os.environ.get("POST_HISTORY_DIR", "data/post_history")
+CANDIDATES = int(os.environ.get("POST_HISTORY_CANDIDATES", "256"))
+# text SimHash bits that may differ before MinHash is checked at all
+DUP_DISTANCE = int(os.environ.get("DUP_SIMHASH_DISTANCE", "12"))
+# estimated shingle Jaccard from which a stored post counts as a near-duplicate
+DUP_JACCARD = float(os.environ.get("DUP_JACCARD", "0.7"))
+
+SIGN_BITS = 256
+_SIG_WORDS = SIGN_BITS // 64 + 1  # + the text SimHash
+
+_STORES: Dict[str, "PostHistory"] = {}
+_STORES_LOCK = threading.Lock()
+
+
+@contextmanager
+def _file_lock(path: str):
+    with open(path, "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _append(path: str, arr, rows: int):
+    """Write `arr` after the first `rows` rows of `path`, dropping any torn tail."""
+    row_bytes = arr[0].nbytes
+    with open(path, "r+b" if os.path.exists(path) else "w+b") as f:
+        f.seek(0, os.SEEK_END)
+        if f.tell() < rows * row_bytes:
+            raise ValueError(f"post history file is short: {path}")
+        f.truncate(rows * row_bytes)
+        f.seek(rows * row_bytes)
+        f.write(np.ascontiguousarray(arr).tobytes())
+
+
+class PostHistory:
+    """One user's stored posts; see the module docstring for the layout."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._ids_size = 0
+        self._lock = threading.Lock()
+        self.dim: Optional[int] = None
+        self.planes = None
+        # (emb, sig, minhash) memmaps of the same n rows, swapped in as one
+        self._view = None
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def __len__(self) -> int:
+        self._refresh()
+        return len(self.ids)
+
+    # ---- reading ----
+    def _refresh(self):
+        """Map rows appended since the last call (by any process)."""
+        with self._lock:
+            try:
+                size = os.path.getsize(self._file("ids.txt"))
+            except OSError:
+                return
+            if size == self._ids_size:
+                return
+            with open(self._file("ids.txt"), "rb") as f:
+                f.seek(self._ids_size)
+                chunk = f.read(size - self._ids_size)
+            chunk = chunk[:chunk.rfind(b"\n") + 1]
+            for pid in chunk.decode("utf-8").splitlines():
+                self._rows.setdefault(pid, len(self.ids))
+                self.ids.append(pid)
+            self._ids_size += len(chunk)
+            if self.dim is None:
+                self._load_meta()
+            n = len(self.ids)
+            if n:
+                self._view = (
+                    np.memmap(self._file("emb.f16"), dtype=np.float16, mode="r", shape=(n, self.dim)),
+                    np.memmap(self._file("sig.u64"), dtype=np.uint64, mode="r", shape=(n, _SIG_WORDS)),
+                    np.memmap(self._file("minhash.u32"), dtype=np.uint32, mode="r", shape=(n, MINHASH_PERM)),
+                )
+
+    def _load_meta(self):
+        with open(self._file("meta.json")) as f:
+            self.dim = json.load(f)["dim"]
+        self.planes = np.load(self._file("planes.npy"))
+
+    def _sign_hash(self, embs):
+        bits = (np.atleast_2d(embs) @ self.planes.T) > 0
+        return np.packbits(bits, axis=1, bitorder="little").view(np.uint64)
+
+    def nearest(self, embedding, k: int = 5, candidates: int = CANDIDATES) -> List[Tuple[str, float]]:
+        """Up to k stored posts most similar to `embedding`: (post id, cosine), best first."""
+        self._refresh()
+        if self._view is None:
+            return []
+        emb, sig, _ = self._view
+        n = emb.shape[0]
+        q = _normalize(np.asarray(embedding, dtype=np.float32).reshape(-1))
+        if n > candidates:
+            dist = popcount(sig[:, :-1] ^ self._sign_hash(q)[0]).sum(axis=1)
+            rows = np.sort(np.argpartition(dist, candidates - 1)[:candidates])
+        else:
+            rows = np.arange(n)
+        sims = np.clip(np.asarray(emb[rows], dtype=np.float32) @ q, -1.0, 1.0)  # float16 rounding
+        top = np.argsort(-sims, kind="stable")[:k]
+        return [(self.ids[rows[i]], float(sims[i])) for i in top]
+
+    def duplicates(self, text: str, max_distance: int = DUP_DISTANCE,
+                   threshold: float = DUP_JACCARD) -> List[Tuple[str, float]]:
+        """Stored near-duplicates of `text`: (post id, estimated Jaccard), best first."""
+        self._refresh()
+        sh = shingles(text)
+        if self._view is None or not len(sh):
+            return []
+        _, sig, mh = self._view
+        dist = popcount(sig[:, -1] ^ np.uint64(simhash(sh)))
+        rows = np.flatnonzero(dist <= max_distance)
+        if not len(rows):
+            return []
+        est = jaccard(mh[rows], minhash(sh))
+        keep = np.flatnonzero(est >= threshold)
+        keep = keep[np.argsort(-est[keep], kind="stable")]
+        return [(self.ids[rows[i]], float(est[i])) for i in keep]
+
+    # ---- writing ----
+    def _create(self, dim: int):
+        os.makedirs(self.path, exist_ok=True)
+        planes = np.random.default_rng().standard_normal((SIGN_BITS, dim)).astype(np.float32)
+        np.save(self._file("planes.npy"), planes)
+        with open(self._file("meta.json"), "w") as f:
+            json.dump({"dim": dim, "sign_bits": SIGN_BITS, "minhash_perm": MINHASH_PERM}, f)
+
+    def add(self, posts: Sequence[Tuple[str, str]], embeddings=None, dim: Optional[int] = None) -> int:
+        """Append (post id, text) pairs, with their embeddings if given.
+        Ids already stored are skipped; returns the number of rows added."""
+        os.makedirs(self.path, exist_ok=True)
+        with _file_lock(self._file("lock")):
+            self._refresh()
+            seen, new = set(self._rows), []
+            for i, (pid, text) in enumerate(posts):
+                pid = str(pid).replace("\n", " ").replace("\r", " ")
+                if pid not in seen:
+                    seen.add(pid)
+                    new.append((i, pid, text or ""))
+            if not new:
+                return 0
+            if embeddings is not None:
+                embs = _normalize(np.asarray(embeddings, dtype=np.float32)[[i for i, _, _ in new]])
+            if self.dim is None:
+                if not os.path.exists(self._file("meta.json")):
+                    dim = embs.shape[1] if embeddings is not None else dim
+                    if not dim:
+                        raise ValueError("dim is needed to start a history without embeddings")
+                    self._create(dim)
+                self._load_meta()
+            if embeddings is None:
+                embs = np.zeros((len(new), self.dim), dtype=np.float32)
+            elif embs.shape[1] != self.dim:
+                raise ValueError(f"embedding size {embs.shape[1]} != stored {self.dim}")
+            sh = [shingles(text) for _, _, text in new]
+            sig = np.empty((len(new), _SIG_WORDS), dtype=np.uint64)
+            sig[:, :-1] = self._sign_hash(embs)
+            sig[:, -1] = [simhash(s) for s in sh]
+            n = len(self.ids)
+            _append(self._file("emb.f16"), embs.astype(np.float16), n)
+            _append(self._file("sig.u64"), sig, n)
+            _append(self._file("minhash.u32"), np.stack([minhash(s) for s in sh]), n)
+            with open(self._file("ids.txt"), "ab") as f:
+                f.write("".join(f"{pid}\n" for _, pid, _ in new).encode("utf-8"))
+        self._refresh()
+        return len(new)
+
+
+def get_history(user_id: str, root: str = DEFAULT_DIR) -> PostHistory:
+    """The (memoized) history store of `user_id`."""
+    key = hashlib.sha256(str(user_id).encode("utf-8")).hexdigest()[:32]
+    path = os.path.join(root, key)
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            store = _STORES[path] = PostHistory(path)
+    return store
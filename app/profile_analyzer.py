@@ -3,45 +3,90 @@
 Profile optimization checks:
 - headline, about, experience bullets, skills, featured suggestions
 - returns component scores and actionable items
+- roles, skills and their aliases come from the taxonomy file
+  (TAXONOMY_PATH, default app/taxonomy.json), see utils/taxonomy.py
+- semantic skill gaps (semantic=True or SKILL_GAP_MODE=semantic): a
+  listed skill also covers required skills that are its nearest
+  neighbours in the embedded skill catalogue (app/skill_bank.py), and
+  roles missing from the taxonomy get their nearest catalogue skills
+- patterns, the availability lexicon and section weights come from the
+  scoring rules file (utils/scoring_rules.py)
 """
 
-from typing import Dict, List
-from utils.text_cleaning import clean_text, sentence_tokenize
-import re
+import os
+from typing import Dict, List, Optional
+from utils.lazy import LazyResource
+from utils.text_cleaning import clean_text
+from utils.text_features import TextFeatures
+from utils.result_cache import get_cache, make_key
+from utils.profile_diff import SectionCache, history, section_hashes
+from utils.taxonomy import TaxonomyIndex, load_taxonomy
+from utils.scoring_rules import ScoringRules, get_rules
+from app.skill_bank import SkillBank, load_catalogue, np
 
-def analyze_headline(headline: str) -> Dict:
-    h = clean_text(headline)
+_profile_cache = get_cache("profile_strength")
+_sections = SectionCache("profile_section")
+
+# compile the rules at import: their lexicons must be registered before texts are matched
+get_rules()
+
+TAXONOMY_PATH = os.environ.get("TAXONOMY_PATH", os.path.join(os.path.dirname(__file__), "taxonomy.json"))
+_taxonomy = LazyResource("taxonomy", lambda: load_taxonomy(TAXONOMY_PATH), optional=False)
+
+def get_taxonomy() -> TaxonomyIndex:
+    index = _taxonomy.get()
+    if index is None:
+        raise RuntimeError(f"taxonomy could not be loaded from {TAXONOMY_PATH}: {_taxonomy.error}")
+    return index
+
+SKILL_GAP_MODE = os.environ.get("SKILL_GAP_MODE", "exact")
+
+def _load_skill_bank() -> SkillBank:
+    if np is None:
+        raise RuntimeError("numpy is not installed")
+    from app.post_analyzer import SENTENCE_MODEL_KEY, get_sentence_model
+    model = get_sentence_model()
+    if model is None:
+        raise RuntimeError("sentence-transformers model unavailable")
+    return SkillBank.build(model, SENTENCE_MODEL_KEY, load_catalogue(get_taxonomy()))
+
+_skill_bank = LazyResource("skill_bank", _load_skill_bank)
+
+def analyze_headline(headline: str, rules: Optional[ScoringRules] = None) -> Dict:
+    rules = (rules or get_rules()).profile
+    f = TextFeatures.of(headline)
+    h = f.text
     score = 0
     suggestions = []
     if not h:
         return {"score": 0, "suggestions": ["Add a clear headline that states role + value."]}
     # length & clarity
-    words = h.split()
-    if 4 <= len(words) <= 12:
+    if 4 <= f.word_count <= 12:
         score += 40
     else:
         suggestions.append("Keep headline concise (4–12 words) describing role and value.")
     # presence of keywords (role/skill)
-    role_words = ["engineer","developer","data","ai","manager","designer","student","intern"]
-    if any(r in h.lower() for r in role_words):
+    if get_taxonomy().mentions_role(h):
         score += 30
     else:
         suggestions.append("Include your role or main skill (e.g., 'Data Scientist' or 'AI Researcher').")
     # CTA / availability
-    if any(x in h.lower() for x in ["open to", "seeking", "internship", "freelance"]):
+    if f.has_any(rules.availability):
         score += 10
     else:
         suggestions.append("If you're open to work, add 'Open to internships' or similar.")
     # keyword density: add small score for power words
-    if re.search(r"\b(lead|founder|senior|principal|expert|specialist)\b", h, re.I):
+    if rules.patterns["power_words"].search(h):
         score += 20
     return {"score": min(100, score), "suggestions": suggestions}
 
-def analyze_about(about: str) -> Dict:
-    a = clean_text(about)
+def analyze_about(about: str, rules: Optional[ScoringRules] = None) -> Dict:
+    rules = (rules or get_rules()).profile
+    f = TextFeatures.of(about)
+    a = f.text
     if not a:
         return {"score": 0, "suggestions": ["Write a short about section: Hook → achievements → CTA."]}
-    sents = sentence_tokenize(a)
+    sents = f.sentences
     score = 0
     suggestions = []
     if len(sents) >= 3:
@@ -49,24 +94,25 @@ def analyze_about(about: str) -> Dict:
     else:
         suggestions.append("Structure About with 3 parts: hook, top achievements, call-to-action.")
     # presence of metrics
-    if re.search(r"\b\d+%|\b\d+ (?:years|yrs|months|mos)|\b\d+K\b|\b\d+\b", a):
+    if rules.patterns["metric"].search(a):
         score += 30
     else:
         suggestions.append("Add measurable outcomes (e.g., 'increased X by 40%').")
     # tone check (first person)
-    if re.search(r"\bI\b", a):
+    if rules.patterns["first_person"].search(a):
         score += 20
     else:
         suggestions.append("Write in first person to make it personable (use 'I').")
     return {"score": min(100, score), "suggestions": suggestions}
 
-def analyze_experience(experience_list: List[str]) -> Dict:
+def analyze_experience(experience_list: List[str], rules: Optional[ScoringRules] = None) -> Dict:
     """
     experience_list: list of strings (each experience block or bullet)
     """
+    rules = (rules or get_rules()).profile
     if not experience_list:
         return {"score": 0, "suggestions": ["Add at least one role with 3-4 achievement bullets."]}
-    total_bullets = sum(len([b for b in re.split(r"[•\n-]", s) if b.strip()]) for s in experience_list)
+    total_bullets = sum(len([b for b in rules.patterns["bullet_split"].split(s) if b.strip()]) for s in experience_list)
     score = 0
     suggestions = []
     if total_bullets >= 3:
@@ -75,47 +121,115 @@ def analyze_experience(experience_list: List[str]) -> Dict:
         suggestions.append("Use 3–5 bullets per role with measurable achievements.")
     # look for metric mentions
     joined = " ".join(experience_list)
-    if re.search(r"\b(increased|reduced|improved|delivered|launched)\b", joined, re.I):
+    if rules.patterns["action_verbs"].search(joined):
         score += 30
     else:
         suggestions.append("Use action verbs (e.g., 'increased', 'launched').")
     return {"score": min(100, score), "suggestions": suggestions}
 
-def analyze_skills(skills: List[str], target_roles: List[str] = None) -> Dict:
-    """Compare listed skills to a target role skillset (optional)."""
+def analyze_skills(skills: List[str], target_roles: List[str] = None, semantic: Optional[bool] = None) -> Dict:
+    """Compare listed skills to a target role skillset (optional).
+    semantic: also match by embedding similarity (None = SKILL_GAP_MODE);
+    falls back to exact matching when no embedding model is available."""
     suggestions = []
     if not skills:
         return {"score": 0, "suggestions": ["Add core skills relevant to your target role (e.g., Python, SQL)."]}
     score = min(100, len(skills) * 10)
     # if target roles provided, ensure overlap
     if target_roles:
-        lower_skills = set(s.lower() for s in skills)
-        needed = set()
-        # naive mapping - could be improved later
-        role_map = {
-            "data scientist": ["python","pandas","ml","scikit","sql","nlp"],
-            "product manager": ["roadmap","stakeholder","analytics","sql"],
-            "frontend": ["react","javascript","css","html"]
-        }
-        for role in target_roles:
-            for r, req in role_map.items():
-                if r in role.lower():
-                    needed.update(req)
+        taxonomy = get_taxonomy()
+        lower_skills = set(taxonomy.normalize_skills(skills))
+        needed = taxonomy.skills_for_roles(target_roles)
+        if semantic is None:
+            semantic = SKILL_GAP_MODE == "semantic"
+        bank = _skill_bank.get() if semantic else None
+        if bank is not None:
+            for role in target_roles:
+                if not taxonomy.roles_in(role):
+                    needed += [k for k in bank.requirements(role) if k not in needed]
         if needed:
             missing = [k for k in needed if k not in lower_skills]
+            if missing and bank is not None:
+                covered = bank.covered(skills, missing)
+                missing = [k for k in missing if k not in covered]
             if missing:
                 suggestions.append(f"Consider adding skills: {missing[:5]}")
                 score = max(40, score - 10)
     return {"score": score, "suggestions": suggestions}
 
-def profile_strength(headline: str, about: str, experience: List[str], skills: List[str], target_roles: List[str] = None) -> Dict:
-    """Combine checks into one profile strength report."""
-    h = analyze_headline(headline)
-    a = analyze_about(about)
-    e = analyze_experience(experience)
-    s = analyze_skills(skills, target_roles)
-    # simple aggregation
-    final = (h["score"] * 0.25 + a["score"] * 0.35 + e["score"] * 0.25 + s["score"] * 0.15)
+def _skills_tag(target_roles: List[str], semantic: bool) -> str:
+    """Cache-key suffix for skills results: the taxonomy file and, for semantic
+    gaps, the skill bank in use (".exact" when it could not be loaded)."""
+    tag = f".{get_taxonomy().digest[:8]}"
+    if semantic and target_roles:
+        bank = _skill_bank.get()
+        tag += f".{bank.key[:8]}" if bank is not None else ".exact"
+    return tag
+
+def profile_sections(headline: str, about: str, experience: List[str], skills: List[str],
+                     target_roles: List[str] = None, semantic_skills: bool = False) -> Dict[str, str]:
+    """Content hash per section; section results are cached under these."""
+    return section_hashes({
+        "headline": clean_text(headline),
+        "about": about or "",  # raw: its line breaks end sentences
+        "experience": list(experience or []),
+        "skills": [list(skills or []), list(target_roles or []), bool(semantic_skills)],
+    })
+
+def record_version(profile_id: str, report: Dict, sections: Dict[str, str]) -> Dict:
+    """Remember `report` as profile_id's latest version; returns the score diff to the previous one."""
+    scores = {"profile_score": report["profile_score"]}
+    scores.update((name, c["score"]) for name, c in report["components"].items())
+    return history.record(profile_id, sections, scores)
+
+def profile_strength(headline: str, about: str, experience: List[str], skills: List[str], target_roles: List[str] = None,
+                     semantic_skills: Optional[bool] = None, profile_id: Optional[str] = None) -> Dict:
+    """Combine checks into one profile strength report.
+    Each section's checks are cached by its content hash, so re-analysing
+    after an edit only reruns the edited section. With a profile_id the
+    report also carries a "diff" against the last version analysed."""
+    if semantic_skills is None:
+        semantic_skills = SKILL_GAP_MODE == "semantic"
+    hashes = profile_sections(headline, about, experience, skills, target_roles, semantic_skills)
+    rules = get_rules()
+    skills_tag = _skills_tag(target_roles, semantic_skills)
+    key = make_key(hashes, rules.digest, skills_tag)
+    report = _profile_cache.get(key)
+    if report is None:
+        report = _profile_strength(headline, about, experience, skills, target_roles, semantic_skills, hashes, rules,
+                                   skills_tag)
+        _profile_cache.set(key, report)
+    if profile_id:
+        report["diff"] = record_version(profile_id, report, hashes)
+    return report
+
+def _profile_strength(headline: str, about: str, experience: List[str], skills: List[str], target_roles: List[str] = None,
+                      semantic_skills: bool = False, hashes: Optional[Dict[str, str]] = None,
+                      rules: Optional[ScoringRules] = None, skills_tag: Optional[str] = None) -> Dict:
+    rules = rules or get_rules()
+    if hashes is None:
+        return _combine(analyze_headline(headline, rules), analyze_about(about, rules),
+                        analyze_experience(experience, rules), analyze_skills(skills, target_roles, semantic_skills),
+                        rules)
+    # sections scored by the rules file are cached per rules version too,
+    # skills per taxonomy and skill bank
+    tag = f".{rules.digest[:8]}"
+    if skills_tag is None:
+        skills_tag = _skills_tag(target_roles, semantic_skills)
+    return _combine(
+        _sections.get_or_compute("headline", hashes["headline"] + tag, analyze_headline, headline, rules),
+        _sections.get_or_compute("about", hashes["about"] + tag, analyze_about, about, rules),
+        _sections.get_or_compute("experience", hashes["experience"] + tag, analyze_experience, experience, rules),
+        _sections.get_or_compute("skills", hashes["skills"] + skills_tag, analyze_skills,
+                                 skills, target_roles, semantic_skills),
+        rules,
+    )
+
+def _combine(h: Dict, a: Dict, e: Dict, s: Dict, rules: Optional[ScoringRules] = None) -> Dict:
+    # weighted aggregation (weights from the rules file)
+    final = (rules or get_rules()).profile.combine(
+        {"headline": h["score"], "about": a["score"], "experience": e["score"], "skills": s["score"]}
+    )
     suggestions = []
     suggestions += h.get("suggestions", [])
     suggestions += a.get("suggestions", [])
@@ -0,0 +1,241 @@
+# app/skill_bank.py
+"""
+Skill catalogue embeddings for semantic skill-gap analysis.
+- every taxonomy skill name and alias (plus SKILL_CATALOGUE_PATH, one
+  skill per line) is embedded once into a row-normalized float32 matrix
+- the matrix is saved as .npy, keyed by model name + catalogue hash, and
+  memory-mapped on load, so worker processes share its pages
+- top_k() for a batch of queries is one matmul + argpartition; from
+  SKILL_IVF_MIN rows up an IVF index (spherical k-means lists, the
+  SKILL_IVF_NPROBE nearest lists are scanned) replaces the full scan
+- listed skills are embedded once per process (memoized)
+
+Env: SKILL_BANK_CACHE_DIR, SKILL_CATALOGUE_PATH, SKILL_IVF_MIN, SKILL_IVF_NPROBE,
+     SKILL_MATCH_THRESHOLD, SKILL_TOP_K
+"""
+
+import os
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+from app.topic_bank import topics_key, _normalize
+
+DEFAULT_CACHE_DIR = os.environ.get("SKILL_BANK_CACHE_DIR", "models/cache/skill_bank")
+IVF_MIN = int(os.environ.get("SKILL_IVF_MIN", "20000"))
+IVF_NPROBE = int(os.environ.get("SKILL_IVF_NPROBE", "8"))
+# cosine similarity at which a listed skill counts as covering a required one
+MATCH_THRESHOLD = float(os.environ.get("SKILL_MATCH_THRESHOLD", "0.5"))
+TOP_K = int(os.environ.get("SKILL_TOP_K", "10"))
+
+_MEMO_MAX = 50000
+
+
+def load_catalogue(taxonomy, path: Optional[str] = None) -> List[Tuple[str, str]]:
+    """(phrase, canonical skill) rows: taxonomy names and aliases, then extra lines from `path`."""
+    rows = taxonomy.skill_phrases()
+    path = path if path is not None else os.environ.get("SKILL_CATALOGUE_PATH")
+    if path:
+        seen = {p for p, _ in rows}
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                skill = line.strip().lower()
+                if skill and not skill.startswith("#") and skill not in seen:
+                    seen.add(skill)
+                    rows.append((skill, skill))
+    return rows
+
+
+def _save(path: str, arr):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        np.save(f, arr)
+    os.replace(tmp, path)
+
+
+class IVFIndex:
+    """Inverted-file index: rows grouped by nearest k-means centroid. The
+    vectors are stored list by list, so each probed list is one contiguous
+    slice of the (memory-mapped) array; `order` maps back to catalogue rows."""
+
+    def __init__(self, centroids, vectors, order, offsets):
+        self.centroids = centroids
+        self.vectors = vectors
+        self.order = order
+        self.offsets = offsets
+
+    @classmethod
+    def train(cls, matrix, nlist: int, iters: int = 8, seed: int = 0) -> "IVFIndex":
+        rng = np.random.default_rng(seed)
+        n = matrix.shape[0]
+        sample = np.asarray(matrix[np.sort(rng.choice(n, min(n, nlist * 64), replace=False))])
+        centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(iters):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assign, sample)
+            filled = np.bincount(assign, minlength=nlist) > 0
+            centroids[filled] = _normalize(sums[filled])
+        assign = np.concatenate([np.argmax(matrix[i:i + 65536] @ centroids.T, axis=1)
+                                 for i in range(0, n, 65536)])
+        order = np.argsort(assign, kind="stable").astype(np.int64)
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+        return cls(centroids.astype(np.float32), np.asarray(matrix[order]), order, offsets)
+
+    def save(self, path: str):
+        """Write to `path`.npz (lists) + `path`.vectors.npy (memory-mappable)."""
+        _save(f"{path}.vectors.npy", self.vectors)
+        tmp = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(tmp, centroids=self.centroids, order=self.order, offsets=self.offsets)
+        os.replace(tmp, f"{path}.npz")
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        with np.load(f"{path}.npz") as z:
+            centroids, order, offsets = z["centroids"], z["order"], z["offsets"]
+        vectors = np.load(f"{path}.vectors.npy", mmap_mode="r")
+        if vectors.shape[0] != order.shape[0]:
+            raise ValueError("IVF files do not match")
+        return cls(centroids, vectors, order, offsets)
+
+    def search(self, query, n: int, nprobe: int):
+        """(catalogue rows, similarities) of the best `n` rows in the `nprobe` lists nearest `query`."""
+        nprobe = min(nprobe, len(self.centroids))
+        lists = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = [np.arange(self.offsets[l], self.offsets[l + 1]) for l in lists]
+        sims = [self.vectors[self.offsets[l]:self.offsets[l + 1]] @ query for l in lists]
+        rows, sims = np.concatenate(rows), np.concatenate(sims)
+        n = min(n, len(rows))
+        if not n:
+            return rows[:0], sims[:0]
+        top = np.argpartition(-sims, n - 1)[:n]
+        return self.order[rows[top]], sims[top]
+
+
+class SkillBank:
+    def __init__(self, model, phrases: Sequence[str], skills: Sequence[str], matrix,
+                 ivf: Optional[IVFIndex] = None, key: str = ""):
+        self.model = model
+        self.key = key  # model name + catalogue hash
+        self.phrases = list(phrases)
+        self.skills = list(skills)  # canonical skill per row
+        self.matrix = matrix
+        self.ivf = ivf
+        self._memo: Dict[str, "np.ndarray"] = {}
+        self._memo_lock = threading.Lock()
+
+    @classmethod
+    def build(cls, model, model_name: str, catalogue: Sequence[Tuple[str, str]],
+              cache_dir: str = DEFAULT_CACHE_DIR, ivf_min: int = IVF_MIN) -> "SkillBank":
+        """Embed the catalogue with `model` (or memory-map it from the on-disk cache)."""
+        phrases = [p for p, _ in catalogue]
+        skills = [s for _, s in catalogue]
+        key = topics_key(model_name, [f"{p}\0{s}" for p, s in catalogue])
+        path = os.path.join(cache_dir, f"{key}.npy") if cache_dir else None
+        matrix = None
+        if path and os.path.isfile(path):
+            try:
+                matrix = np.load(path, mmap_mode="r")
+                if matrix.shape[0] != len(phrases):
+                    matrix = None
+            except Exception:
+                matrix = None
+        if matrix is None:
+            matrix = _normalize(np.asarray(
+                model.encode(phrases, convert_to_numpy=True, normalize_embeddings=True), dtype=np.float32))
+            if path:
+                try:
+                    os.makedirs(cache_dir, exist_ok=True)
+                    _save(path, matrix)
+                    matrix = np.load(path, mmap_mode="r")
+                except Exception:
+                    pass
+        ivf = None
+        if len(phrases) >= ivf_min:
+            nlist = max(1, int(np.sqrt(len(phrases))))
+            ivf_path = os.path.join(cache_dir, f"{key}.ivf{nlist}") if cache_dir else None
+            if ivf_path and os.path.isfile(f"{ivf_path}.npz"):
+                try:
+                    ivf = IVFIndex.load(ivf_path)
+                except Exception:
+                    ivf = None
+            if ivf is None:
+                ivf = IVFIndex.train(matrix, nlist)
+                if ivf_path:
+                    try:
+                        ivf.save(ivf_path)
+                        ivf = IVFIndex.load(ivf_path)
+                    except Exception:
+                        pass
+        return cls(model, phrases, skills, matrix, ivf, key)
+
+    # ---- embeddings ----
+    def embed(self, texts: Sequence[str]):
+        """Normalized embeddings for `texts` (n, d); each distinct text is encoded once per process."""
+        keys = [t.strip().lower() for t in texts]
+        found = {k: self._memo.get(k) for k in keys}
+        todo = [k for k, v in found.items() if v is None]
+        if todo:
+            vecs = np.asarray(self.model.encode(todo, convert_to_numpy=True, normalize_embeddings=True),
+                              dtype=np.float32)
+            fresh = dict(zip(todo, _normalize(vecs)))
+            found.update(fresh)
+            with self._memo_lock:
+                if len(self._memo) + len(fresh) > _MEMO_MAX:
+                    self._memo.clear()
+                self._memo.update(fresh)
+        if not keys:
+            return np.zeros((0, self.matrix.shape[1]), dtype=np.float32)
+        return np.stack([found[k] for k in keys])
+
+    # ---- search ----
+    def top_k(self, queries, k: int = TOP_K, nprobe: int = IVF_NPROBE) -> List[List[Tuple[str, float]]]:
+        """Nearest catalogue skills (canonical name, cosine) per query embedding,
+        best first; aliases of one skill count once."""
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        # a skill can own several rows (aliases): over-fetch, then dedupe
+        fetch = min(len(self.skills), k * 3)
+        out = []
+        if self.ivf is None:
+            sims = queries @ self.matrix.T
+            top = np.argpartition(-sims, fetch - 1, axis=1)[:, :fetch]
+            for q in range(len(queries)):
+                out.append(self._ranked(top[q], sims[q, top[q]], k))
+            return out
+        for q in queries:
+            rows, sims = self.ivf.search(q, fetch, nprobe)
+            out.append(self._ranked(rows, sims, k))
+        return out
+
+    def _ranked(self, rows, sims, k: int) -> List[Tuple[str, float]]:
+        best: Dict[str, float] = {}
+        for r, s in sorted(zip(rows.tolist(), sims.tolist()), key=lambda x: -x[1]):
+            name = self.skills[r]
+            if name not in best:
+                best[name] = s
+                if len(best) >= k:
+                    break
+        return list(best.items())
+
+    def covered(self, listed: Sequence[str], needed: Sequence[str],
+                threshold: float = MATCH_THRESHOLD, k: int = TOP_K) -> Dict[str, str]:
+        """{needed skill: listed skill covering it}: a listed skill covers the
+        needed skills among its k nearest catalogue neighbours at >= threshold."""
+        if not listed or not needed:
+            return {}
+        want = set(needed)
+        out: Dict[str, str] = {}
+        for skill, neighbours in zip(listed, self.top_k(self.embed(listed), k)):
+            for name, sim in neighbours:
+                if sim >= threshold and name in want and name not in out:
+                    out[name] = skill
+        return out
+
+    def requirements(self, role: str, threshold: float = MATCH_THRESHOLD, k: int = TOP_K) -> List[str]:
+        """Catalogue skills nearest a role the taxonomy does not know."""
+        return [name for name, sim in self.top_k(self.embed([role]), k)[0] if sim >= threshold]
+
@@ -0,0 +1,112 @@
+# app/topic_bank.py
+"""
+Topic bank for novelty scoring.
+- reference topics are embedded once into a row-normalized NumPy matrix
+- the matrix is cached on disk, keyed by model name + topic list hash
+- novelty for one post is a single matrix-vector product; a batch of
+  posts is one matmul
+- the most recently used _MEMO_MAX banks stay in memory; callers pass
+  cache_dir=None for topic lists that should not be persisted (e.g.
+  lists supplied per request)
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Sequence
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DEFAULT_CACHE_DIR = os.environ.get("TOPIC_BANK_CACHE_DIR", "models/cache/topic_bank")
+
+# in-process LRU so a topic list is only looked up / embedded once while in use
+_MEMO_MAX = 64
+_BANKS: "OrderedDict[str, TopicBank]" = OrderedDict()
+_banks_lock = threading.Lock()
+
+
+def topics_key(model_name: str, topics: Sequence[str]) -> str:
+    """Stable cache key for (model, topic list)."""
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    for t in topics:
+        h.update(b"\0")
+        h.update(t.encode("utf-8"))
+    return h.hexdigest()[:32]
+
+
+def _normalize(mat):
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+class TopicBank:
+    def __init__(self, model_name: str, topics: Sequence[str], matrix):
+        self.model_name = model_name
+        self.topics = list(topics)
+        self.matrix = _normalize(np.asarray(matrix, dtype=np.float32))
+        # mean cosine similarity to all topics == dot product with the mean row
+        self._centroid = self.matrix.mean(axis=0)
+
+    @classmethod
+    def build(cls, model, model_name: str, topics: Sequence[str],
+              cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> "TopicBank":
+        """Embed topics with `model` (or load them from the on-disk cache)."""
+        key = topics_key(model_name, topics)
+        path = os.path.join(cache_dir, f"{key}.npy") if cache_dir else None
+        if path and os.path.isfile(path):
+            try:
+                matrix = np.load(path)
+                if matrix.shape[0] == len(topics):
+                    return cls(model_name, topics, matrix)
+            except Exception:
+                pass
+        matrix = model.encode(list(topics), convert_to_numpy=True, normalize_embeddings=True)
+        bank = cls(model_name, topics, matrix)
+        if path:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp = f"{path}.{os.getpid()}.tmp"
+                with open(tmp, "wb") as f:
+                    np.save(f, bank.matrix)
+                os.replace(tmp, path)
+            except Exception:
+                pass
+        return bank
+
+    def similarities(self, embeddings):
+        """Cosine similarity of each embedding (n, d) to every topic -> (n, k)."""
+        embs = _normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        return embs @ self.matrix.T
+
+    def novelty_many(self, embeddings) -> List[float]:
+        """Novelty 0-100 for each embedding: lower mean similarity = more novel."""
+        embs = _normalize(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        mean_sims = embs @ self._centroid
+        # similarity in [-1,1] -> map to novelty 0-100
+        return np.clip((1.0 - mean_sims) * 50 + 50, 0.0, 100.0).astype(float).tolist()
+
+    def novelty(self, embedding) -> float:
+        return self.novelty_many(embedding)[0]
+
+
+def get_topic_bank(model, model_name: str, topics: Sequence[str],
+                   cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> TopicBank:
+    """Return the (memoized) bank for this model + topic list; cache_dir=None keeps it off disk."""
+    key = topics_key(model_name, topics)
+    with _banks_lock:
+        bank = _BANKS.get(key)
+        if bank is not None:
+            _BANKS.move_to_end(key)
+            return bank
+    bank = TopicBank.build(model, model_name, topics, cache_dir=cache_dir)
+    with _banks_lock:
+        _BANKS[key] = bank
+        while len(_BANKS) > _MEMO_MAX:
+            _BANKS.popitem(last=False)
+    return bank
@@ -0,0 +1,115 @@
+# benchmarks/bench_embeddings.py
+"""
+Embedding backends compared: torch (sentence-transformers) vs the int8
+ONNX export (utils/embeddings.py).
+
+Each backend runs in its own subprocess, so import cost and resident
+memory are its own:
+- load s:     import + model load
+- rss MB:     resident set after load, and peak after the throughput run
+- 1-item ms:  p50 / p95 latency of encode([post]) (the API's shape)
+- posts/s:    throughput of encode(posts), both at EMBEDDING_BATCH_SIZE
+- agreement:  per-post cosine between the two backends' embeddings
+              (min / mean), against the documented ONNX_MIN_COSINE
+
+The ONNX model must exist first: python main.py export-onnx
+Usage: python -m benchmarks.bench_embeddings [--posts 512] [--threads 1] [--backends torch,onnx]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.corpus import make_posts
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except Exception:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _peak_mb() -> float:
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(backend: str, model: str, n: int, out: str):
+    from utils.embeddings import BATCH_SIZE, load_embedder
+
+    posts = make_posts(n, "medium")
+    t0 = time.perf_counter()
+    emb = load_embedder(model, backend)
+    load_s = time.perf_counter() - t0
+    rss_loaded = _rss_mb()
+    emb.encode(posts[:8])  # first-call allocations
+    lat = []
+    for p in posts[:100]:
+        t0 = time.perf_counter()
+        emb.encode([p])
+        lat.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    vecs = emb.encode(posts, batch_size=BATCH_SIZE, convert_to_numpy=True, normalize_embeddings=True)
+    rate = len(posts) / (time.perf_counter() - t0)
+    np.save(out, np.asarray(vecs, dtype=np.float32))
+    print(json.dumps({
+        "load_s": load_s, "rss_loaded": rss_loaded, "rss_peak": _peak_mb(),
+        "p50_ms": float(np.percentile(lat, 50) * 1e3), "p95_ms": float(np.percentile(lat, 95) * 1e3),
+        "posts_s": rate,
+    }))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--backends", default="torch,onnx")
+    ap.add_argument("--posts", type=int, default=512)
+    ap.add_argument("--threads", type=int, default=1)
+    ap.add_argument("--model", default=None, help="model name (default: the app's sentence model)")
+    ap.add_argument("--child", default=None, help=argparse.SUPPRESS)
+    ap.add_argument("--out", default=None, help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    if args.model is None:
+        from app.post_analyzer import SENTENCE_MODEL_NAME
+        args.model = SENTENCE_MODEL_NAME
+    if args.child:
+        child(args.child, args.model, args.posts, args.out)
+        return
+
+    from utils.embeddings import ONNX_MIN_COSINE
+    env = dict(os.environ, EMBEDDING_THREADS=str(args.threads), OMP_NUM_THREADS=str(args.threads))
+    tmp = tempfile.mkdtemp()
+    print(f"{'backend':>8}{'load s':>8}{'rss MB':>8}{'peak MB':>9}{'p50 ms':>8}{'p95 ms':>8}{'posts/s':>9}")
+    outs = {}
+    for backend in args.backends.split(","):
+        out = os.path.join(tmp, f"{backend}.npy")
+        proc = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_embeddings", "--child", backend, "--out", out,
+             "--model", args.model, "--posts", str(args.posts)],
+            env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            err = (proc.stderr.strip().splitlines() or ["?"])[-1]
+            print(f"{backend:>8}  unavailable: {err[:100]}")
+            continue
+        r = json.loads(proc.stdout.strip().splitlines()[-1])
+        outs[backend] = np.load(out)
+        print(f"{backend:>8}{r['load_s']:>8.2f}{r['rss_loaded']:>8.0f}{r['rss_peak']:>9.0f}"
+              f"{r['p50_ms']:>8.2f}{r['p95_ms']:>8.2f}{r['posts_s']:>9.0f}")
+    if len(outs) == 2:
+        a, b = outs.values()
+        cos = (a * b).sum(axis=1)
+        print(f"agreement: cosine min {cos.min():.4f} mean {cos.mean():.4f} "
+              f"(tolerance: >= {ONNX_MIN_COSINE} per post)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_post_history.py
+"""
+Micro-benchmark for the per-user post history (app/post_history.py).
+
+A synthetic history (clustered random unit vectors, MiniLM's 384 dims,
+with benchmarks.corpus posts as texts) at growing sizes; per size:
+- add:     ingest time per post (signatures + appends)
+- nearest: sign-hash prefilter + exact float16 rerank, vs an exact scan
+           of the whole float16 matrix; recall@1 against the exact scan
+- dups:    SimHash prefilter + MinHash check for edited copies of stored
+           posts, vs MinHash against every row; recall of the original
+
+No embedding model needed. Usage:
+  python -m benchmarks.bench_post_history [--sizes 1000,10000,100000] [--queries 200]
+"""
+
+import argparse
+import random
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+from app.post_history import PostHistory
+from app.topic_bank import _normalize
+from benchmarks.bench_skill_bank import catalogue
+from benchmarks.corpus import make_posts
+from utils.near_dup import jaccard, minhash, shingles
+
+
+def _edit(text: str, rng: random.Random) -> str:
+    """A light edit: one word dropped and a closing line added."""
+    words = text.split(" ")
+    del words[rng.randrange(len(words))]
+    return " ".join(words) + "\n\nThoughts?"
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,10000,100000")
+    ap.add_argument("--queries", type=int, default=200)
+    args = ap.parse_args()
+
+    print(f"{'rows':>8}{'add us':>8}{'near ms':>9}{'exact ms':>10}{'recall@1':>10}"
+          f"{'dup ms':>8}{'all-mh ms':>11}{'dup recall':>12}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        tmp = tempfile.mkdtemp()
+        store = PostHistory(tmp)
+        embs = catalogue(n)
+        texts = make_posts(n, "medium", seed=n)
+        t0 = time.perf_counter()
+        for i in range(0, n, 10000):
+            store.add([(f"p{j}", texts[j]) for j in range(i, min(n, i + 10000))], embs[i:i + 10000])
+        t_add = (time.perf_counter() - t0) / n
+
+        rng = np.random.default_rng(1)
+        picks = rng.integers(0, n, args.queries)
+        queries = _normalize(embs[picks] + 0.05 * rng.standard_normal((args.queries, embs.shape[1])).astype(np.float32))
+        t0 = time.perf_counter()
+        got = [store.nearest(q, 1)[0][0] for q in queries]
+        t_near = (time.perf_counter() - t0) / args.queries
+        emb, _, mh = store._view
+        t0 = time.perf_counter()
+        want = []
+        for q in queries:
+            sims = np.concatenate([np.asarray(emb[i:i + 8192], dtype=np.float32) @ q for i in range(0, n, 8192)])
+            want.append(f"p{int(np.argmax(sims))}")
+        t_exact = (time.perf_counter() - t0) / args.queries
+        recall = np.mean([g == w for g, w in zip(got, want)])
+
+        prng = random.Random(2)
+        edits = [(f"p{j}", _edit(texts[j], prng)) for j in picks.tolist()]
+        t0 = time.perf_counter()
+        found = [pid in [d for d, _ in store.duplicates(text)] for pid, text in edits]
+        t_dup = (time.perf_counter() - t0) / len(edits)
+        t0 = time.perf_counter()
+        for _, text in edits:
+            jaccard(mh, minhash(shingles(text)))
+        t_all = (time.perf_counter() - t0) / len(edits)
+
+        print(f"{n:>8}{t_add * 1e6:>8.0f}{t_near * 1e3:>9.2f}{t_exact * 1e3:>10.2f}{recall:>10.3f}"
+              f"{t_dup * 1e3:>8.2f}{t_all * 1e3:>11.2f}{np.mean(found):>12.3f}")
+        del emb, mh, store
+        shutil.rmtree(tmp)
+
+
+if __name__ == "__main__":
+    main()
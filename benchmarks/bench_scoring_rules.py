@@ -0,0 +1,106 @@
+# benchmarks/bench_scoring_rules.py
+"""
+Micro-benchmark for the compiled scoring rules (utils/scoring_rules.py).
+
+Per batch size, on benchmarks.corpus posts whose TextFeatures (sentences,
+lexicon hits) are built beforehand, so only scoring is timed:
+- literal:  the per-post scorers with hard-coded weights and keyword
+            lists that the rules file replaced
+- per-post: the public scorers (structure_score, ...) on one post at a
+            time, each fetching the current rules
+- matrix:   the whole batch as one component matrix + final scores
+Readability (textstat, per text either way) is left out.
+
+Also timed: get_rules() when throttled (the default) and when it stats
+the file on every call (SCORING_RULES_CHECK_S=0), and compiling the file.
+
+Usage: python -m benchmarks.bench_scoring_rules [--sizes 1,32,1000] [--repeat 5]
+"""
+
+import argparse
+import time
+
+from app import post_analyzer as pa
+from benchmarks.corpus import make_posts
+from utils import scoring_rules
+from utils.text_features import TextFeatures, lexicon_terms
+
+CTAS = lexicon_terms(["dm", "comment", "share", "like", "follow", "connect", "visit"])
+STORY = lexicon_terms(["story", "learned", "today i", "this happened", "i was"])
+POSITIVE = lexicon_terms(["great", "good", "amazing", "love", "useful", "helpful", "win", "success", "improve"])
+NEGATIVE = lexicon_terms(["problem", "worse", "issue", "bad", "fail", "losing", "loss"])
+WEIGHTS = {"structure": 0.30, "readability": 0.20, "hashtags": 0.10, "sentiment": 0.10, "novelty": 0.30}
+
+
+def literal(f: TextFeatures) -> float:
+    sents = f.sentences
+    structure = 0.0
+    if f.text:
+        first = sents[0] if sents else ""
+        structure += 25 if 5 <= len(first.split()) <= 25 else 0
+        structure += 20 if "\n" in f.text or len(sents) >= 3 else 0
+        structure += 20 if f.has_any(CTAS) else 0
+        structure += 15 if f.has_any(STORY) else 0
+        structure += 10 if len(sents) > 1 else 0
+    n = len(f.hashtags)
+    hashtags = 0.0 if not n else 100.0 if 3 <= n <= 7 else 50.0 if n < 3 else 70.0
+    p = sum(f.count(w) for w in POSITIVE)
+    q = sum(f.count(w) for w in NEGATIVE)
+    sentiment = 50.0 if p + q == 0 else max(0.0, min(100.0, 50 + (p - q) * 10))
+    comps = {"readability": 0.0, "structure": min(100.0, structure), "hashtags": hashtags,
+             "sentiment": sentiment, "novelty": 50.0}
+    return max(0.0, min(100.0, sum(comps[k] * w for k, w in WEIGHTS.items())))
+
+
+def per_post(f: TextFeatures) -> float:
+    comps = {"readability": 0.0, "structure": pa.structure_score(f), "hashtags": pa.hashtag_score(f),
+             "sentiment": pa.simple_sentiment_score(f), "novelty": 50.0}
+    return pa.compute_final_score(comps)
+
+
+def matrix(feats) -> list:
+    rules = scoring_rules.get_rules()
+    return rules.post.final(rules.post.matrix(feats, [0.0] * len(feats), [50.0] * len(feats)))
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1,32,1000")
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    print(f"{'posts':>6}{'literal us/post':>17}{'per-post us/post':>18}{'matrix us/post':>16}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        feats = [TextFeatures(p) for p in make_posts(n, "medium", seed=n)]
+        for f in feats:
+            f.hits, f.sentences, f.hashtags  # features are not what is timed
+        want = [literal(f) for f in feats]
+        assert max(abs(a - b) for a, b in zip(want, matrix(feats))) < 1e-9
+        rows = [
+            _best(lambda: [literal(f) for f in feats], args.repeat),
+            _best(lambda: [per_post(f) for f in feats], args.repeat),
+            _best(lambda: matrix(feats), args.repeat),
+        ]
+        print(f"{n:>6}" + "".join(f"{t / n * 1e6:>{w}.1f}" for t, w in zip(rows, (17, 18, 16))))
+
+    source = scoring_rules._source
+    calls = 10000
+    for label, interval in (("throttled", scoring_rules.CHECK_SECONDS), ("stat every call", 0.0)):
+        source.check_seconds, source._next_check = interval, 0.0
+        t = _best(lambda: [scoring_rules.get_rules() for _ in range(calls)], args.repeat)
+        print(f"get_rules() {label:<16}{t / calls * 1e6:>8.2f} us")
+    t = _best(lambda: scoring_rules.load_rules(source.path), args.repeat)
+    print(f"compile rules file          {t * 1e3:>8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/bench_segmenter.py
+"""
+Accuracy and throughput of sentence segmenters.
+
+Segmenters compared:
+- native: utils/segmenter.py (what sentence_tokenize uses by default)
+- regex:  the old fallback, re.split(r"[.!?]\\s+") over clean_text
+- punkt:  nltk punkt over clean_text (skipped if nltk / its data is missing)
+
+Accuracy: boundary precision / recall / F1 on GOLD, hand-labelled
+LinkedIn-style texts ("¦" marks each sentence end). Boundaries are
+compared by position among the text's word characters, so segmenters
+that normalize whitespace, keep or drop final punctuation, or keep or
+drop list markers are scored alike.
+Throughput: us per post over benchmarks.corpus posts, per size tier.
+
+Usage: python -m benchmarks.bench_segmenter [--posts 2000] [--repeat 3] [--show-errors]
+"""
+
+import argparse
+import re
+import time
+
+from benchmarks.corpus import TIERS, make_posts
+from utils.segmenter import split_sentences
+from utils.text_cleaning import _load_punkt, clean_text
+
+GOLD = [
+    "I made a mistake that cost us 3 months.¦\n\nHere's what happened.¦\n\n#leadership #startups",
+    "Dr. Smith joined us in Jan. 2024 as head of data.¦ He rebuilt the pipeline in 6 weeks!¦",
+    "We grew revenue 3.5x, e.g. from $1.2M to $4.2M.¦ Most of it came from one change.¦",
+    "Want the template?¦ Grab it at https://example.com/guide?ref=li.¦ It's free.¦",
+    "3 lessons from hiring 40 engineers:¦\n1. Hire slowly¦\n2. Write the job down first¦\n3. Onboard with a checklist¦",
+    "What worked for us:¦\n✅ Daily deploys¦\n✅ Small PRs¦\n✅ Blameless postmortems¦\n\nWhat would you add?¦",
+    "Led the churn model rollout¦ • Cut onboarding from 6 weeks to 10 days¦ • Managed a team of 6¦",
+    "I used to think more meetings meant more alignment...¦ I was wrong.¦",
+    "She told me: \"Ship it.\"¦ So we did.¦ (Best decision this year.)¦",
+    "The U.S. team moved faster than anyone expected.¦ Why?¦ Fewer handoffs.¦",
+    "Big news 🚀¦\n\nWe just closed our Series A!¦\nThank you to everyone who believed in us 🙏¦",
+    "Data without context is just noise.¦ Context comes from people, not dashboards.¦\n\nAgree or disagree?¦",
+    "Email me at jane.doe@acme.io.¦ Or DM me here.¦",
+    "Our Q3 loss forced us to rethink pricing, i.e. we stopped discounting.¦ Margins went up 8%.¦",
+    "Stop writing status reports nobody reads.¦\n\nInstead:¦\n👉 Share one metric¦\n👉 Share one blocker¦\n👉 Ask for one decision¦",
+    "Version 2.0 is live.¦ It is 40% faster than v1.9 on the same hardware.¦",
+    "We hired J. R. Martin as CTO.¦ He starts on Monday.¦",
+    "Failure is useful when you write down what you learned.¦ Most teams skip that step… don't.¦",
+    "Excited to share that I've started a new position as Senior Data Scientist at Acme Inc.¦",
+    "Follow for more lessons like this.¦\n\n#ai #data #career #growth",
+    "It's not about the tools.¦ It's about the people using them.¦ Always has been.¦",
+    "Results after 90 days:¦\n- 2x pipeline¦\n- 30% shorter sales cycle¦\n- 0 new hires¦",
+    "Prof. Lee's talk at St. Gallen changed how I think about pricing.¦ Slides: bit.ly/pricing-talk¦",
+    "Hot take: most dashboards are built for the builder, not the reader.¦ Fight me 😅¦",
+    "Ask yourself three questions.¦ Is it measurable?¦ Is it owned?¦ Is it shipped?¦",
+]
+
+
+def legacy_regex(text: str):
+    return [s.strip() for s in re.split(r"[.!?]\s+", clean_text(text)) if s.strip()]
+
+
+def _squeeze(text: str) -> str:
+    return re.sub(r"\W+", "", text)
+
+
+def gold_boundaries(doc: str):
+    """(text, boundary positions in the squeezed text), final boundary excluded."""
+    squeezed = re.sub(r"[^\w¦]+", "", doc)
+    marks, pos = set(), 0
+    for ch in squeezed:
+        if ch == "¦":
+            marks.add(pos)
+        else:
+            pos += 1
+    return doc.replace("¦", ""), marks - {pos}
+
+
+def predicted_boundaries(text: str, sentences):
+    squeezed = _squeeze(text)
+    out, cursor = set(), 0
+    for s in sentences:
+        s = _squeeze(s)
+        at = squeezed.find(s, cursor)
+        if not s or at < 0:
+            continue
+        cursor = at + len(s)
+        out.add(cursor)
+    return out - {len(squeezed)}
+
+
+def accuracy(segment, show_errors: bool = False):
+    tp = fp = fn = 0
+    for doc in GOLD:
+        text, want = gold_boundaries(doc)
+        got = predicted_boundaries(text, segment(text))
+        tp += len(want & got)
+        fp += len(got - want)
+        fn += len(want - got)
+        if show_errors and want != got:
+            print(f"    {segment(text)}")
+    p = tp / max(1, tp + fp)
+    r = tp / max(1, tp + fn)
+    return p, r, 2 * p * r / max(1e-9, p + r)
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--show-errors", action="store_true")
+    args = ap.parse_args()
+
+    segmenters = {"native": split_sentences, "regex": legacy_regex}
+    try:
+        punkt = _load_punkt()
+        segmenters["punkt"] = lambda t: punkt(clean_text(t))
+    except Exception as e:
+        print(f"punkt unavailable ({type(e).__name__}); install nltk + its punkt data to compare")
+
+    tiers = sorted(TIERS, key=lambda t: TIERS[t]["sentences"])
+    print(f"{'segmenter':>10}{'prec':>7}{'recall':>8}{'f1':>7}" + "".join(f"{t + ' us':>12}" for t in tiers))
+    for name, segment in segmenters.items():
+        p, r, f1 = accuracy(segment, args.show_errors)
+        times = []
+        for tier in tiers:
+            posts = make_posts(args.posts, tier)
+            times.append(_best(lambda: [segment(x) for x in posts], args.repeat) / len(posts))
+        print(f"{name:>10}{p:>7.3f}{r:>8.3f}{f1:>7.3f}" + "".join(f"{t * 1e6:>12.1f}" for t in times))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_skill_bank.py
+"""
+Micro-benchmark for skill-catalogue nearest-neighbour search.
+
+Synthetic catalogues (clustered random unit vectors, MiniLM's 384 dims)
+at growing sizes; per size, for a batch of queries near catalogue rows:
+- exact: one matmul over the memory-mapped matrix + argpartition
+- ivf:   IVFIndex with sqrt(n) lists, SKILL_IVF_NPROBE lists probed
+- recall@k of ivf, counted by score (ties between rows do not count as misses)
+
+No embedding model needed. Usage:
+  python -m benchmarks.bench_skill_bank [--sizes 1000,20000,200000] [--queries 200]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from app.skill_bank import IVF_NPROBE, IVFIndex, SkillBank, _save
+from app.topic_bank import _normalize
+
+
+def catalogue(n: int, dim: int = 384, clusters: int = 512, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    centers = _normalize(rng.standard_normal((clusters, dim)).astype(np.float32))
+    # within-cluster spread about 0.8 of the center's norm: related skills
+    noise = rng.standard_normal((n, dim)).astype(np.float32) * (0.8 / np.sqrt(dim))
+    return _normalize(centers[rng.integers(0, clusters, n)] + noise)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1000,20000,200000")
+    ap.add_argument("--queries", type=int, default=200)
+    ap.add_argument("--k", type=int, default=10)
+    ap.add_argument("--nprobe", type=int, default=IVF_NPROBE)
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    print(f"{'rows':>8}{'exact ms/q':>12}{'ivf ms/q':>10}{'recall':>8}{'train s':>9}")
+    for n in [int(s) for s in args.sizes.split(",")]:
+        path = os.path.join(tmp, f"cat{n}.npy")
+        _save(path, catalogue(n))
+        matrix = np.load(path, mmap_mode="r")
+        names = [f"skill{i}" for i in range(n)]
+        rng = np.random.default_rng(1)
+        queries = _normalize(np.asarray(matrix[rng.integers(0, n, args.queries)])
+                             + 0.05 * rng.standard_normal((args.queries, matrix.shape[1])).astype(np.float32))
+
+        exact = SkillBank(None, names, names, matrix)
+        t0 = time.perf_counter()
+        want = exact.top_k(queries, args.k)
+        t_exact = (time.perf_counter() - t0) / args.queries
+
+        t0 = time.perf_counter()
+        ivf = IVFIndex.train(matrix, max(1, int(np.sqrt(n))))
+        t_train = time.perf_counter() - t0
+        ivf.save(os.path.join(tmp, f"ivf{n}"))
+        approx = SkillBank(None, names, names, matrix, IVFIndex.load(os.path.join(tmp, f"ivf{n}")))
+        t0 = time.perf_counter()
+        got = approx.top_k(queries, args.k, nprobe=args.nprobe)
+        t_ivf = (time.perf_counter() - t0) / args.queries
+
+        # a hit is any returned score at least as good as the exact k-th score
+        recall = np.mean([sum(s >= w[-1][1] - 1e-6 for _, s in g) / len(w) for g, w in zip(got, want)])
+        print(f"{n:>8}{t_exact * 1e3:>12.3f}{t_ivf * 1e3:>10.3f}{recall:>8.3f}{t_train:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+# benchmarks/bench_speculative.py
+"""
+Speculative decoding on our prompt templates.
+
+Runs every template (local rewrite suggestions, local image ideas,
+backend post / profile / image prompts) through the model with drafting
+off and with each drafter, at temperature 0, and reports per mode:
+- ms per completion and generated tokens/s
+- speedup over no drafting
+- draft acceptance rate (accepted / proposed draft tokens)
+- whether the text matches the non-speculative output (it should)
+
+Needs llama_cpp and a real GGUF (the stub has no draft support):
+  LLM_MODEL_PATH=models/mistral-7b-instruct.Q4_K_M.gguf \
+      python -m benchmarks.bench_speculative [--draft models/small.gguf] [--n 4] [--out spec.json]
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from benchmarks.corpus import make_posts, make_profiles
+from utils.llm_registry import load_params
+from utils.prompt_budget import PromptBudget
+from utils.speculative import PROMPT_LOOKUP, draft_kwargs
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _backend_optimizer():
+    # the backend ships its own `app` package; load the module by path
+    path = ROOT / "linkedin-optimizer-backend" / "app" / "optimizer.py"
+    spec = importlib.util.spec_from_file_location("backend_optimizer", path)
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod
+
+
+def prompts(n: int, vocab) -> List[Tuple[str, str, int]]:
+    """(template, prompt, max_tokens) for n inputs per template, budgeted like the apps do."""
+    from app.image_suggester import IMAGE_PROMPT
+    from app.post_analyzer import SUGGESTION_PROMPT, SUGGESTION_MAX_TOKENS
+    opt = _backend_optimizer()
+    posts = make_posts(n, "medium")
+    profiles = make_profiles(n, "medium")
+    metrics = {"overall": 68, "scores": {"readability": 61, "structure": 70, "engagement": 80, "keywords": 60}}
+    n_ctx = load_params()["n_ctx"]
+
+    def budget(max_tokens: int) -> PromptBudget:
+        return PromptBudget.for_llm(vocab, max_tokens, n_ctx=n_ctx)
+
+    def fit(template: str, text: str, max_tokens: int) -> str:
+        return budget(max_tokens).fit(template, {"text": text})["text"]
+
+    out = []
+    for post, prof in zip(posts, profiles):
+        payload = {"headline": prof["headline"], "about": prof["about"], "experience": "\n".join(prof["experience"])}
+        out += [
+            ("suggestions", SUGGESTION_PROMPT.format(
+                text=fit(SUGGESTION_PROMPT.format(text="", n=3), post, SUGGESTION_MAX_TOKENS), n=3),
+             SUGGESTION_MAX_TOKENS),
+            ("images", IMAGE_PROMPT % (fit(IMAGE_PROMPT % ("", 3), post, 120), 3), 120),
+            ("backend_post", opt.build_post_prompt(post, metrics, budget(256)), 256),
+            ("backend_profile", opt.build_profile_prompt(payload, metrics, budget(300)), 300),
+            ("backend_images", opt.build_image_suggest_prompt(post, budget(200)), 200),
+        ]
+    return out
+
+
+def run_mode(llama_cpp, model_path: str, draft: Optional[str], cases) -> Dict:
+    params = {k: v for k, v in load_params().items() if k != "draft"}
+    params.update(draft_kwargs(draft, llama_cpp))
+    drafter = params.get("draft_model")
+    llm = llama_cpp.Llama(model_path=model_path, verbose=False, **params)
+    per_template: Dict[str, Dict] = {}
+    texts = []
+    for template, prompt, max_tokens in cases:
+        llm.reset()  # time each prompt from a cold context, like a new request
+        t0 = time.perf_counter()
+        res = llm.create_completion(prompt, max_tokens=max_tokens, temperature=0.0)
+        dt = time.perf_counter() - t0
+        texts.append(res["choices"][0]["text"])
+        row = per_template.setdefault(template, {"seconds": 0.0, "tokens": 0, "n": 0})
+        row["seconds"] += dt
+        row["tokens"] += res["usage"]["completion_tokens"]
+        row["n"] += 1
+    total_s = sum(r["seconds"] for r in per_template.values())
+    total_t = sum(r["tokens"] for r in per_template.values())
+    return {
+        "ms_per_completion": round(1000 * total_s / len(cases), 1),
+        "tokens_per_second": round(total_t / total_s, 2) if total_s else None,
+        "acceptance": round(drafter.accepted / drafter.proposed, 3) if drafter and drafter.proposed else None,
+        "templates": {k: {"ms": round(1000 * r["seconds"] / r["n"], 1),
+                          "tokens_per_second": round(r["tokens"] / r["seconds"], 2) if r["seconds"] else None}
+                      for k, r in per_template.items()},
+        "_texts": texts,
+    }
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--model", default=os.environ.get("LLM_MODEL_PATH"))
+    ap.add_argument("--draft", action="append", default=[],
+                    help="draft GGUF to compare (repeatable); prompt lookup is always included")
+    ap.add_argument("--n", type=int, default=4, help="inputs per template")
+    ap.add_argument("--out", help="write results as JSON")
+    args = ap.parse_args(argv)
+
+    try:
+        import llama_cpp
+    except ImportError:
+        print("llama_cpp is not installed", file=sys.stderr)
+        return 2
+    if not args.model or not os.path.isfile(args.model):
+        print("set LLM_MODEL_PATH (or --model) to a GGUF file", file=sys.stderr)
+        return 2
+
+    cases = prompts(args.n, llama_cpp.Llama(model_path=args.model, vocab_only=True, verbose=False))
+    modes = [("off", None), (PROMPT_LOOKUP, PROMPT_LOOKUP)] + [(Path(d).name, d) for d in args.draft]
+    results = {}
+    for name, draft in modes:
+        results[name] = run_mode(llama_cpp, args.model, draft, cases)
+
+    base = results["off"]
+    print(f"{'mode':<28}{'ms/compl':>10}{'tok/s':>9}{'speedup':>9}{'accept':>8}  same output")
+    for name, r in results.items():
+        r["speedup"] = round(base["ms_per_completion"] / r["ms_per_completion"], 2)
+        r["same_output"] = r["_texts"] == base["_texts"]
+        acc = f"{r['acceptance']:.0%}" if r["acceptance"] is not None else "-"
+        print(f"{name:<28}{r['ms_per_completion']:>10.1f}{r['tokens_per_second'] or 0:>9.2f}"
+              f"{r['speedup']:>8.2f}x{acc:>8}  {r['same_output']}")
+        for template, t in r["templates"].items():
+            print(f"  {template:<26}{t['ms']:>10.1f}{t['tokens_per_second'] or 0:>9.2f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump({k: {kk: vv for kk, vv in v.items() if kk != "_texts"} for k, v in results.items()}, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+# benchmarks/bench_taxonomy.py
+"""
+Micro-benchmark for the compiled role / skill taxonomy.
+
+The shipped taxonomy (app/taxonomy.json) padded with synthetic roles and
+skills to growing sizes; per size:
+- compile: JSON dict -> TaxonomyIndex
+- load:    unpickling the compiled form (what a new process pays)
+- match:   find() per headline / skills list, against the naive scan it
+           replaced (substring test of every role name against the text)
+
+Usage: python -m benchmarks.bench_taxonomy [--sizes 100,10000,100000] [--repeat 3]
+"""
+
+import argparse
+import json
+import pickle
+import random
+import time
+
+from app.profile_analyzer import TAXONOMY_PATH
+from utils.taxonomy import TaxonomyIndex
+
+HEADLINES = [
+    "Senior Data Scientist | NLP, Python, scikit-learn | Open to work",
+    "Front-End Engineer building React apps for fintech",
+    "Product Owner & Scrum Master helping teams ship faster",
+    "Student at MIT - machine learning, PyTorch, Kubernetes enthusiast",
+    "Helping founders grow through content marketing and SEO",
+]
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def padded(source, size: int, seed: int = 0):
+    """`source` plus synthetic skills and roles up to `size` entries."""
+    rng = random.Random(seed)
+    src = json.loads(json.dumps(source))
+    skills, roles = src.setdefault("skills", {}), src.setdefault("roles", {})
+    n_skills = max(0, size * 5 // 6 - len(skills))
+    for i in range(n_skills):
+        skills[f"skill{i} lib"] = {"aliases": [f"sk{i}", f"skill {i} framework"]}
+    names = list(skills)
+    for i in range(max(0, size - len(skills) - len(roles))):
+        roles[f"role{i} specialist"] = {"aliases": [f"r{i} lead"], "skills": rng.sample(names, 6)}
+    return src
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="100,10000,100000")
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    with open(TAXONOMY_PATH) as f:
+        base = json.load(f)
+    texts = HEADLINES * 20
+    print(f"{'entries':>8}{'compile ms':>12}{'load ms':>10}{'find us':>10}{'naive us':>10}")
+    for size in [int(s) for s in args.sizes.split(",")]:
+        src = padded(base, size)
+        t0 = time.perf_counter()
+        index = TaxonomyIndex(src)
+        t_compile = time.perf_counter() - t0
+        blob = pickle.dumps(index, protocol=pickle.HIGHEST_PROTOCOL)
+        t_load = _best(lambda: pickle.loads(blob), args.repeat)
+        t_find = _best(lambda: [index.find(t) for t in texts], args.repeat)
+        names = [r.lower() for r in src["roles"]]
+        t_naive = _best(lambda: [[r for r in names if r in t.lower()] for t in texts], args.repeat)
+        print(f"{len(index):>8}{t_compile * 1e3:>12.1f}{t_load * 1e3:>10.1f}"
+              f"{t_find / len(texts) * 1e6:>10.1f}{t_naive / len(texts) * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
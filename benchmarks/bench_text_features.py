@@ -0,0 +1,107 @@
+# benchmarks/bench_text_features.py
+"""
+Micro-benchmark for the shared TextFeatures path.
+
+Compares:
+- per-scorer: every scorer gets the raw string and re-derives its own
+  features (what each public scorer does when called on its own)
+- shared:     one TextFeatures per post, passed to every scorer
+- lexicon strategies: str.count per term vs one combined regex vs a
+  pyahocorasick automaton (if installed), at growing lexicon sizes
+
+Usage: python -m benchmarks.bench_text_features [--posts 2000] [--repeat 3]
+"""
+
+import argparse
+import random
+import re
+import time
+
+from app import post_analyzer as pa
+from utils.text_features import Lexicon, LEXICON, TextFeatures
+
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+_WORDS = (
+    "I learned a great lesson today about data teams and growth . we shipped "
+    "a new metrics dashboard ! comment below if you want the story , share "
+    "with your network . the problem was a bad loss in Q3 ? #ai #data #career"
+).split()
+
+
+def make_posts(n: int, seed: int = 0):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(_WORDS) for _ in range(rng.randint(20, 250))) for _ in range(n)]
+
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def per_scorer(posts):
+    for p in posts:
+        pa.readability_score(p)
+        pa.structure_score(p)
+        pa.hashtag_score(p)
+        pa.simple_sentiment_score(p)
+        pa.novelty_score(p)
+
+
+def shared(posts):
+    for p in posts:
+        f = TextFeatures(p)
+        pa.readability_score(f)
+        pa.structure_score(f)
+        pa.hashtag_score(f)
+        pa.simple_sentiment_score(f)
+        pa.novelty_score(f)
+
+
+def lexicon_strategies(posts, sizes, repeat):
+    rng = random.Random(1)
+    lowers = [TextFeatures(p).lower for p in posts]
+    base = LEXICON.terms
+    for size in sizes:
+        terms = list(base)
+        while len(terms) < size:
+            terms.append("".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(3, 10))))
+        counter = Lexicon(terms, automaton=False)
+        regex = re.compile("|".join(map(re.escape, sorted(terms, key=len, reverse=True))))
+        rows = {
+            "str.count": _best(lambda: [counter.count_all(t) for t in lowers], repeat),
+            "regex": _best(lambda: [regex.findall(t) for t in lowers], repeat),
+        }
+        if ahocorasick is not None:
+            auto = Lexicon(terms, automaton=True)
+            rows["aho-corasick"] = _best(lambda: [auto.count_all(t) for t in lowers], repeat)
+        cells = "  ".join(f"{k}={v / len(lowers) * 1e6:7.1f}us" for k, v in rows.items())
+        print(f"  lexicon {size:5d} terms: {cells}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--posts", type=int, default=2000)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    posts = make_posts(args.posts)
+    shared(posts[:10])  # warm lazy resources
+    t_per = _best(lambda: per_scorer(posts), args.repeat)
+    t_shared = _best(lambda: shared(posts), args.repeat)
+    print(f"scorers ({args.posts} posts)")
+    print(f"  per-scorer: {t_per / args.posts * 1e6:7.1f}us/post")
+    print(f"  shared    : {t_shared / args.posts * 1e6:7.1f}us/post  ({t_per / t_shared:.2f}x)")
+    print("lexicon matching (per post)")
+    lexicon_strategies(posts[:500], [len(LEXICON.terms), 256, 2048], args.repeat)
+
+
+if __name__ == "__main__":
+    main()
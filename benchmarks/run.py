@@ -0,0 +1,396 @@
+# benchmarks/run.py
+"""
+Reproducible benchmark suite with a regression gate.
+
+Suites (each runs in its own subprocess, since both apps ship an `app`
+package):
+- micro:   per-function timings (clean_text, sentence_tokenize,
+           TextFeatures, raw_score_components, analyze_posts,
+           profile_strength) at every corpus tier
+- app:     load test of the top-level FastAPI app (/analyze_post with and
+           without rewrites and tiered with slo_ms=0, /analyze_posts,
+           /analyze_profile, /suggest_images)
+- backend: load test of linkedin-optimizer-backend /api/v1/* routes
+           (plain and SSE), plus its metrics helpers
+
+LLM calls go to benchmarks.stub_llm (STUB_LLM_TOKEN_MS per token), so
+everything runs offline. Result caches are disabled so every request
+does the full work.
+
+Results are written as JSON ({"meta", "results": {name: {...}}}); every
+entry has a primary "value" in milliseconds (lower is better). With
+--baseline, a run fails (exit 1) when any value grows by more than
+--tolerance over the stored baseline, or a benchmark starts erroring.
+
+Usage:
+  python -m benchmarks.run                                  # all suites, all tiers
+  python -m benchmarks.run --suite micro --tier small
+  python -m benchmarks.run --save-baseline                  # store benchmarks/baseline.json
+  python -m benchmarks.run --baseline benchmarks/baseline.json --tolerance 0.25
+"""
+
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.corpus import TIERS, make_posts, make_profiles
+
+ROOT = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT / "linkedin-optimizer-backend"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+SUITES = ("micro", "app", "backend")
+
+# differences below this are timer noise, never a regression
+MIN_ABS_MS = 0.05
+
+
+# ---- timing helpers ----
+def time_per_item(fn: Callable, items: List, repeat: int) -> Dict:
+    """Best-of-`repeat` pass over `items`; value = ms per item."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for it in items:
+            fn(it)
+        best = min(best, time.perf_counter() - t0)
+    per = best / max(1, len(items))
+    return {"value": round(per * 1000, 4), "unit": "ms/item", "items": len(items),
+            "items_per_second": round(1 / per, 1) if per else None}
+
+
+def time_batch(fn: Callable, items: List, repeat: int) -> Dict:
+    """Best-of-`repeat` single call on the whole list; value = ms per item."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(items)
+        best = min(best, time.perf_counter() - t0)
+    per = best / max(1, len(items))
+    return {"value": round(per * 1000, 4), "unit": "ms/item", "items": len(items),
+            "items_per_second": round(1 / per, 1) if per else None}
+
+
+def _pct(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    i = min(len(sorted_vals) - 1, max(0, int(round(q * (len(sorted_vals) - 1)))))
+    return sorted_vals[i]
+
+
+def load_test(send: Callable[[object], Optional[float]], payloads: List, concurrency: int) -> Dict:
+    """Send every payload with `concurrency` client threads.
+
+    send(payload) raises on failure and may return a time-to-first-byte.
+    value = p50 latency (ms).
+    """
+    lat, ttfb, errors = [], [], []
+
+    def one(p):
+        t0 = time.perf_counter()
+        try:
+            first = send(p)
+        except Exception as e:
+            errors.append(str(e)[:200])
+            return
+        lat.append((time.perf_counter() - t0) * 1000)
+        if first is not None:
+            ttfb.append((first - t0) * 1000)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        # untimed warm-up round: executor workers spawn and import lazily
+        for p in payloads[:concurrency]:
+            try:
+                send(p)
+            except Exception:
+                pass
+        started = time.perf_counter()
+        list(pool.map(one, payloads))
+    wall = time.perf_counter() - started
+    lat.sort()
+    ttfb.sort()
+    res = {
+        "value": round(_pct(lat, 0.50), 3),
+        "unit": "ms p50",
+        "p95_ms": round(_pct(lat, 0.95), 3),
+        "p99_ms": round(_pct(lat, 0.99), 3),
+        "mean_ms": round(statistics.fmean(lat), 3) if lat else 0.0,
+        "requests": len(payloads),
+        "concurrency": concurrency,
+        "rps": round(len(lat) / wall, 1) if wall else None,
+        "errors": len(errors),
+    }
+    if ttfb:
+        res["ttfb_p50_ms"] = round(_pct(ttfb, 0.50), 3)
+    if errors:
+        res["first_error"] = errors[0]
+    return res
+
+
+def _post(client, path: str):
+    def send(body):
+        r = client.post(path, json=body)
+        if r.status_code != 200:
+            raise RuntimeError(f"{path}: HTTP {r.status_code} {r.text[:120]}")
+        return None
+    return send
+
+
+def _post_stream(client, path: str):
+    def send(body):
+        first = None
+        with client.stream("POST", path, json=body) as r:
+            if r.status_code != 200:
+                raise RuntimeError(f"{path}: HTTP {r.status_code}")
+            tail = ""
+            for chunk in r.iter_text():
+                if first is None:
+                    first = time.perf_counter()
+                tail = (tail + chunk)[-256:]
+            if "event: error" in tail:
+                raise RuntimeError(f"{path}: stream ended with an error event")
+        return first
+    return send
+
+
+def _drain_jobs(jobs, timeout: float = 120.0):
+    """Wait for background enrichment jobs, so they don't hold the
+    inference pool while the next scenario is timed."""
+    deadline = time.perf_counter() + timeout
+    while jobs.active() and time.perf_counter() < deadline:
+        time.sleep(0.01)
+
+
+# ---- suites (run inside a child process) ----
+def suite_micro(tiers: List[str], n: int, repeat: int) -> Dict[str, Dict]:
+    from utils.text_cleaning import clean_text, sentence_tokenize
+    from utils.text_features import TextFeatures
+    from app.post_analyzer import raw_score_components, raw_score_components_batch, analyze_posts
+    from app.profile_analyzer import profile_strength
+
+    out = {}
+    for tier in tiers:
+        posts = make_posts(n, tier)
+        profiles = make_profiles(max(1, n // 4), tier)
+        cleaned = [clean_text(p) for p in posts]
+        out[f"micro.clean_text[{tier}]"] = time_per_item(clean_text, posts, repeat)
+        out[f"micro.sentence_tokenize[{tier}]"] = time_per_item(sentence_tokenize, cleaned, repeat)
+        out[f"micro.text_features[{tier}]"] = time_per_item(lambda p: TextFeatures(p).hits, posts, repeat)
+        out[f"micro.raw_score_components[{tier}]"] = time_per_item(raw_score_components, posts, repeat)
+        out[f"micro.raw_score_components_batch[{tier}]"] = time_batch(raw_score_components_batch, posts, repeat)
+        out[f"micro.analyze_posts[{tier}]"] = time_batch(analyze_posts, posts, repeat)
+        out[f"micro.profile_strength[{tier}]"] = time_per_item(
+            lambda p: profile_strength(p["headline"], p["about"], p["experience"], p["skills"], p["target_roles"]),
+            profiles, repeat,
+        )
+    return out
+
+
+def suite_app(tiers: List[str], n: int, concurrency: int) -> Dict[str, Dict]:
+    from fastapi.testclient import TestClient
+    import main
+    from utils.jobs import jobs
+
+    out = {}
+    with TestClient(main.app) as client:
+        for tier in tiers:
+            posts = make_posts(n, tier)
+            profiles = make_profiles(n, tier)
+            plain = [{"text": p, "use_llm": False} for p in posts]
+            rewrite = [{"text": p, "use_llm": True} for p in posts[: max(1, n // 4)]]
+            tiered = [dict(b, slo_ms=0) for b in rewrite]
+            batches = [{"texts": posts[i:i + 16], "use_llm": False} for i in range(0, len(posts), 16)]
+            out[f"app.analyze_post[{tier}]"] = load_test(_post(client, "/analyze_post"), plain, concurrency)
+            out[f"app.analyze_post.llm[{tier}]"] = load_test(_post(client, "/analyze_post"), rewrite, concurrency)
+            out[f"app.analyze_post.tiered[{tier}]"] = load_test(_post(client, "/analyze_post"), tiered, concurrency)
+            _drain_jobs(jobs)
+            out[f"app.analyze_posts.x16[{tier}]"] = load_test(_post(client, "/analyze_posts"), batches, concurrency)
+            out[f"app.analyze_profile[{tier}]"] = load_test(_post(client, "/analyze_profile"), profiles, concurrency)
+            out[f"app.suggest_images[{tier}]"] = load_test(_post(client, "/suggest_images"), rewrite, concurrency)
+    return out
+
+
+def suite_backend(tiers: List[str], n: int, concurrency: int, repeat: int) -> Dict[str, Dict]:
+    if importlib.util.find_spec("textstat") is None:
+        return {"_skipped": {"reason": "textstat is not installed (required by the backend)"}}
+    # the backend's own `app` package must shadow the top-level one
+    sys.path.insert(0, str(BACKEND_DIR))
+    fd, fake_model = tempfile.mkstemp(suffix=".gguf")
+    os.close(fd)
+    os.environ["LLM_MODEL_PATH"] = fake_model
+
+    from fastapi.testclient import TestClient
+    import main
+    from app import optimizer
+
+    prefix = os.getenv("API_PREFIX", "/api/v1")
+    out = {}
+    try:
+        for tier in tiers:
+            posts = make_posts(n, tier)
+            out[f"backend.analyze_text_metrics[{tier}]"] = time_per_item(optimizer.analyze_text_metrics, posts, repeat)
+        with TestClient(main.app) as client:
+            for tier in tiers:
+                posts = [{"text": p} for p in make_posts(n, tier)]
+                profiles = [
+                    {"headline": p["headline"], "about": p["about"], "experience": "\n".join(p["experience"])}
+                    for p in make_profiles(n, tier)
+                ]
+                for route, payloads in (("analyze-post", posts), ("analyze-profile", profiles),
+                                        ("suggest-images", posts)):
+                    out[f"backend.{route}[{tier}]"] = load_test(
+                        _post(client, f"{prefix}/{route}"), payloads, concurrency)
+                    out[f"backend.{route}.stream[{tier}]"] = load_test(
+                        _post_stream(client, f"{prefix}/{route}/stream"), payloads, concurrency)
+    finally:
+        os.unlink(fake_model)
+    return out
+
+
+# ---- orchestration ----
+def _child_env() -> Dict[str, str]:
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(ROOT)] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else []))
+    env["RESULT_CACHE_SIZE"] = "0"   # measure real work, not cache hits
+    env["RESULT_CACHE_DB"] = ""
+    env.setdefault("STUB_LLM_TOKEN_MS", "2")
+    return env
+
+
+def run_suite_subprocess(suite: str, args) -> Dict[str, Dict]:
+    fd, path = tempfile.mkstemp(suffix=".json")
+    os.close(fd)
+    cmd = [sys.executable, "-m", "benchmarks.run", "--child", suite, "--json-out", path,
+           "--tier", args.tier, "--n", str(args.n), "--repeat", str(args.repeat),
+           "--concurrency", str(args.concurrency)]
+    try:
+        proc = subprocess.run(cmd, cwd=str(ROOT), env=_child_env())
+        if proc.returncode != 0:
+            return {f"{suite}._failed": {"reason": f"suite exited with {proc.returncode}", "errors": 1}}
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.unlink(path)
+
+
+def run_child(suite: str, args):
+    from benchmarks import stub_llm
+    stub_llm.install()
+    tiers = sorted(TIERS) if args.tier == "all" else [args.tier]
+    if suite == "micro":
+        res = suite_micro(tiers, args.n, args.repeat)
+    elif suite == "app":
+        res = suite_app(tiers, args.n, args.concurrency)
+    else:
+        res = suite_backend(tiers, args.n, args.concurrency, args.repeat)
+    if "_skipped" in res:
+        res = {f"{suite}._skipped": res["_skipped"]}
+    with open(args.json_out, "w", encoding="utf-8") as f:
+        json.dump(res, f)
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=str(ROOT),
+                              capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], tolerance: float) -> List[str]:
+    """Regressions of `results` against `baseline` (human-readable lines)."""
+    problems = []
+    for name, base in baseline.items():
+        cur = results.get(name)
+        if cur is None or "value" not in base:
+            continue
+        if cur.get("errors", 0) > base.get("errors", 0):
+            problems.append(f"{name}: {cur['errors']} errors (baseline {base.get('errors', 0)})")
+        if "value" not in cur:
+            continue
+        limit = base["value"] * (1 + tolerance)
+        if cur["value"] > limit and cur["value"] - base["value"] > MIN_ABS_MS:
+            problems.append(f"{name}: {cur['value']:.3f} {cur.get('unit', 'ms')} "
+                            f"> {base['value']:.3f} +{tolerance:.0%}")
+    return problems
+
+
+def _print_table(results: Dict[str, Dict]):
+    width = max((len(k) for k in results), default=10)
+    for name, r in sorted(results.items()):
+        if "value" in r:
+            extra = f"  errors={r['errors']}" if r.get("errors") else ""
+            print(f"{name:<{width}}  {r['value']:>10.3f} {r.get('unit', '')}{extra}")
+        else:
+            print(f"{name:<{width}}  {r.get('reason', '')}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the benchmark suite")
+    parser.add_argument("--suite", default=",".join(SUITES), help="comma-separated: " + ",".join(SUITES))
+    parser.add_argument("--tier", default="all", choices=sorted(TIERS) + ["all"])
+    parser.add_argument("--n", type=int, default=200, help="records per tier")
+    parser.add_argument("--repeat", type=int, default=3, help="micro: best of N passes")
+    parser.add_argument("--concurrency", type=int, default=8, help="load tests: client threads")
+    parser.add_argument("--out", help="write results JSON here")
+    parser.add_argument("--baseline", help="fail when results regress against this file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = +25%%)")
+    parser.add_argument("--save-baseline", nargs="?", const=str(DEFAULT_BASELINE), metavar="PATH",
+                        help=f"store results as the new baseline (default {DEFAULT_BASELINE.name})")
+    parser.add_argument("--child", choices=SUITES, help=argparse.SUPPRESS)
+    parser.add_argument("--json-out", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        run_child(args.child, args)
+        return 0
+
+    results: Dict[str, Dict] = {}
+    for suite in [s.strip() for s in args.suite.split(",") if s.strip()]:
+        if suite not in SUITES:
+            parser.error(f"unknown suite {suite!r}")
+        print(f"[bench] running {suite} ...", file=sys.stderr)
+        results.update(run_suite_subprocess(suite, args))
+
+    report = {
+        "meta": {
+            "git": _git_rev(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "args": {k: v for k, v in vars(args).items() if k not in ("child", "json_out")},
+        },
+        "results": results,
+    }
+    _print_table(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"[bench] baseline saved to {args.save_baseline}", file=sys.stderr)
+
+    failed = any(k.endswith("._failed") for k in results)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+        problems = compare(results, baseline, args.tolerance)
+        for p in problems:
+            print(f"[bench] REGRESSION {p}", file=sys.stderr)
+        failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
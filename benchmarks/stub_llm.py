@@ -0,0 +1,199 @@
+# benchmarks/stub_llm.py
+"""
+Offline stand-in for llama_cpp, so benchmarks exercise the real request
+path (registry, ModelServer scheduling, streaming, parsing) without a
+GGUF model.
+
+install() registers a fake `llama_cpp` module. Its Llama emits a canned
+completion that matches the prompt (JSON for the backend prompts,
+bullet lines for the local rewrite prompts), one "token" per word,
+sleeping STUB_LLM_TOKEN_MS per token to model decode speed.
+
+Prompt evaluation is modelled too: the stub keeps its "KV" token list
+(eval / save_state / load_state / reset like llama.cpp), reuses the
+longest common prefix with the previous prompt and sleeps
+STUB_LLM_PROMPT_TOKEN_MS per newly evaluated prompt token.
+
+LlamaGrammar.from_json_schema is accepted (the canned JSON already fits
+the backend schemas); JSON replies end with trailing whitespace, as real
+models often emit, so the server's early stop is exercised.
+"""
+
+import json
+import os
+import sys
+import time
+import types
+from typing import Dict, Iterator, List
+
+_POST_REPLY = {
+    "hooks": ["I made one change that doubled our reach.", "Nobody talks about this.", "Here's the lesson."],
+    "headlines": ["How we doubled reach", "The lesson from Q3", "Why small wins compound"],
+    "suggestions": [
+        {"title": "Stronger hook", "description": "Open with the result, then the story."},
+        {"title": "Add a metric", "description": "Quantify the impact in the first three lines."},
+        {"title": "Clear CTA", "description": "End with a question to invite comments."},
+        {"title": "Shorter paragraphs", "description": "Break long blocks into one-line paragraphs."},
+        {"title": "Hashtags", "description": "Use three to five specific hashtags."},
+    ],
+}
+_PROFILE_REPLY = {
+    "headline": "Data Scientist | Turning messy data into revenue | Python, SQL, ML",
+    "about": "I build models that ship. Over 5 years I have led teams that cut churn and grew revenue.",
+    "experience": ["Led a churn model rollout, increasing retention by 12%"],
+}
+_IMAGE_REPLY = [
+    {"type": "photo", "title": "Team at whiteboard", "description": "Candid shot of the team planning."},
+    {"type": "chart", "title": "Growth curve", "description": "Simple line chart of the key metric."},
+    {"type": "carousel", "title": "5 lessons", "description": "One slide per lesson, bold type."},
+    {"type": "quote", "title": "Key takeaway", "description": "Pull quote on a brand-colour card."},
+]
+_LINES_REPLY = (
+    "- Open with a one-line hook that states the result.\n"
+    "- Add one concrete metric to show impact.\n"
+    "- End with a question to invite comments.\n"
+)
+
+
+def _reply_for(prompt: str) -> str:
+    p = prompt.lower()
+    if "image" in p and "json" in p:
+        return json.dumps(_IMAGE_REPLY) + "\n\n \n"
+    if "following section to" in p and "json" in p:
+        section = next((k for k in _PROFILE_REPLY if f"\n{k}:\n" in p), "headline")
+        return json.dumps({section: _PROFILE_REPLY[section]}) + "\n\n \n"
+    if "profile" in p and "json" in p:
+        return json.dumps(_PROFILE_REPLY) + "\n\n \n"
+    if "json" in p:
+        return json.dumps(_POST_REPLY) + "\n\n \n"
+    return _LINES_REPLY
+
+
+def _tokens(text: str) -> List[str]:
+    # keep whitespace attached so "".join(tokens) == text
+    out, cur = [], ""
+    for ch in text:
+        cur += ch
+        if ch in " \n":
+            out.append(cur)
+            cur = ""
+    if cur:
+        out.append(cur)
+    return out
+
+
+class StoppingCriteriaList(list):
+    def __call__(self, input_ids, logits) -> bool:
+        return any(f(input_ids, logits) for f in self)
+
+
+class LlamaGrammar:
+    def __init__(self, schema: str):
+        self.schema = schema
+
+    @classmethod
+    def from_json_schema(cls, json_schema: str, verbose: bool = True) -> "LlamaGrammar":
+        json.loads(json_schema)
+        return cls(json_schema)
+
+
+class Llama:
+    def __init__(self, model_path: str, n_ctx: int = 2048, **kwargs):
+        self.model_path = model_path
+        self._n_ctx = n_ctx
+        self.token_seconds = float(os.environ.get("STUB_LLM_TOKEN_MS", "2")) / 1000.0
+        self.prompt_token_seconds = float(os.environ.get("STUB_LLM_PROMPT_TOKEN_MS", "0.2")) / 1000.0
+        self._input_ids: List[int] = []
+        self.evaluated = 0  # prompt tokens actually evaluated (for tests / benchmarks)
+
+    def n_ctx(self) -> int:
+        return self._n_ctx
+
+    def tokenize(self, text: bytes, add_bos: bool = True, special: bool = False) -> List[int]:
+        # ~4 bytes per token, like BPE on English text; ids depend on content
+        ids = [int.from_bytes(text[i:i + 4].ljust(4, b" "), "little") % 32000 for i in range(0, len(text), 4)]
+        return ([1] if add_bos else []) + ids
+
+    def detokenize(self, tokens: List[int]) -> bytes:
+        return b"x" * (4 * len(tokens))
+
+    # ---- KV state ----
+    @property
+    def n_tokens(self) -> int:
+        return len(self._input_ids)
+
+    @property
+    def input_ids(self) -> List[int]:
+        return list(self._input_ids)
+
+    def reset(self):
+        self._input_ids = []
+
+    def eval(self, tokens: List[int]):
+        if self.prompt_token_seconds:
+            time.sleep(self.prompt_token_seconds * len(tokens))
+        self.evaluated += len(tokens)
+        self._input_ids.extend(tokens)
+
+    def save_state(self) -> Dict:
+        return {"input_ids": list(self._input_ids)}
+
+    def load_state(self, state: Dict):
+        self._input_ids = list(state["input_ids"])
+
+    def _eval_prompt(self, prompt: str):
+        tokens = self.tokenize(prompt.encode("utf-8"), special=True)
+        keep = 0
+        for a, b in zip(self._input_ids, tokens[:-1]):
+            if a != b:
+                break
+            keep += 1
+        self._input_ids = self._input_ids[:keep]
+        self.eval(tokens[keep:])
+        return tokens
+
+    def _decode(self, prompt: str, max_tokens: int, stopping_criteria) -> Iterator[str]:
+        for i, tok in enumerate(_tokens(_reply_for(prompt))):
+            if max_tokens and i >= max_tokens:
+                return
+            if self.token_seconds:
+                time.sleep(self.token_seconds)
+            yield tok
+            if stopping_criteria and stopping_criteria(None, None):
+                return
+
+    def create_completion(self, prompt: str, max_tokens: int = 16, temperature: float = 0.8,
+                          stream: bool = False, stopping_criteria=None, **kwargs):
+        if stream:
+            return self._stream(prompt, max_tokens, stopping_criteria)
+        n_prompt = len(self._eval_prompt(prompt))
+        parts = list(self._decode(prompt, max_tokens, stopping_criteria))
+        return {
+            "id": "stub",
+            "object": "text_completion",
+            "choices": [{"text": "".join(parts), "index": 0,
+                         "finish_reason": "length" if len(parts) == max_tokens else "stop"}],
+            "usage": {"prompt_tokens": n_prompt, "completion_tokens": len(parts),
+                      "total_tokens": n_prompt + len(parts)},
+        }
+
+    def _stream(self, prompt: str, max_tokens: int, stopping_criteria) -> Iterator[Dict]:
+        self._eval_prompt(prompt)
+        for tok in self._decode(prompt, max_tokens, stopping_criteria):
+            yield {"id": "stub", "object": "text_completion",
+                   "choices": [{"text": tok, "index": 0, "finish_reason": None}]}
+        yield {"id": "stub", "object": "text_completion",
+               "choices": [{"text": "", "index": 0, "finish_reason": "stop"}]}
+
+    __call__ = create_completion
+
+
+def install():
+    """Make `import llama_cpp` return the stub (call before the apps are imported)."""
+    mod = types.ModuleType("llama_cpp")
+    mod.Llama = Llama
+    mod.StoppingCriteriaList = StoppingCriteriaList
+    mod.LlamaGrammar = LlamaGrammar
+    mod.__stub__ = True
+    sys.modules["llama_cpp"] = mod
+    return mod
@@ -1,27 +1,164 @@
 # backend/app/api.py
+import asyncio
+import json
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Optional
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from app.model_server import server
+from app.model_server import server, ServerBusy, DeadlineExceeded
 from app import optimizer
+from utils.executors import cpu_pool, Overloaded
+from utils.metrics import stage
+from utils.json_stream import JsonStreamParser
+from utils.jobs import jobs
+from utils.profile_diff import SectionCache, history, section_hashes
 
 api_router = APIRouter()
 
+# completion lengths; prompts are budgeted to leave this much room in n_ctx
+POST_MAX_TOKENS = 256
+PROFILE_MAX_TOKENS = 300
+IMAGE_MAX_TOKENS = 200
+SECTION_MAX_TOKENS = {"headline": 48, "about": 200, "experience": 200}
+
+# enrichment links point back at this router
+API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
+
+
+async def _generate(prompt: str, **kwargs):
+    """server.generate with queue-full / deadline errors mapped to HTTP codes."""
+    try:
+        return await server.generate(prompt, **kwargs)
+    except ServerBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+
+async def _cpu(fn, *args):
+    """Deterministic metrics run on the CPU executor tier, not the event loop."""
+    try:
+        return await cpu_pool.run(fn, *args)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _stream_response(first: Dict, prompt: str, parse: Callable[[str], Any], **kwargs) -> StreamingResponse:
+    """SSE: `first` (deterministic metrics) immediately, then LLM tokens as they decode.
+
+    Events: metrics -> (token, partial?)* -> done {"text", "result"}   (or error {"detail"})
+    `partial` carries the JSON completed so far, whenever another value closes.
+    """
+    try:
+        chunks = server.stream(prompt, **kwargs)
+    except ServerBusy as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+    async def events() -> AsyncIterator[str]:
+        yield _sse("metrics", first)
+        parts = []
+        parser = JsonStreamParser()
+        try:
+            async for chunk in chunks:
+                parts.append(chunk)
+                yield _sse("token", {"text": chunk})
+                parser.feed(chunk)
+                partial = parser.poll()
+                if partial is not None and not parser.done:
+                    yield _sse("partial", partial)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        text = "".join(parts)
+        with stage("parse"):
+            result = parse(text)
+        yield _sse("done", {"text": text, "result": result})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# slo_ms: latency target. Metrics (and rule-based suggestions) come back
+# at once; LLM suggestions are included only if ready within slo_ms, else
+# the response links a background job ("enrichment") to fetch them from.
 class PostRequest(BaseModel):
     text: str
+    slo_ms: Optional[int] = None
 
+# profile_id: stable id of the profile being edited. Sections are then
+# scored and rewritten one by one, unchanged ones come from cache, and
+# the response carries a "diff" against the last version analysed.
 class ProfileRequest(BaseModel):
     headline: str = ""
     about: str = ""
     experience: str = ""
+    slo_ms: Optional[int] = None
+    profile_id: Optional[str] = None
+
+_section_metrics = SectionCache("profile_section_metrics")
+_section_rewrites = SectionCache("profile_rewrite")
+
+
+async def _llm_suggestions(build, parse, max_tokens: int, temperature: float, schema: Dict):
+    """Background enrichment: budget the prompt, generate, parse."""
+    prompt = build(await server.prompt_budget(max_tokens))
+    llm_resp = await _generate(prompt, max_tokens=max_tokens, temperature=temperature, schema=schema)
+    with stage("parse"):
+        return parse(llm_resp["text"])
+
+
+async def _rewrite_section(section: str, text: str, score: int) -> Dict:
+    max_tokens = SECTION_MAX_TOKENS[section]
+    prompt = optimizer.build_section_prompt(section, text, score, await server.prompt_budget(max_tokens))
+    llm_resp = await _generate(prompt, max_tokens=max_tokens, temperature=0.2,
+                              schema=optimizer.SECTION_SCHEMAS[section])
+    with stage("parse"):
+        return optimizer.parse_llm_response(llm_resp["text"])
+
+
+async def _incremental_rewrite(payload: Dict, hashes: Dict, sections: Dict) -> Dict:
+    """Profile rewrite assembled per section; only edited sections reach the model."""
+    parts = await asyncio.gather(*(
+        _section_rewrites.aget_or_compute(name, hashes[name], _rewrite_section,
+                                          name, payload[name], sections[name]["score"])
+        for name in optimizer.PROFILE_SECTIONS
+    ))
+    return {name: part[name] for name, part in zip(optimizer.PROFILE_SECTIONS, parts) if name in part}
+
+
+async def _tiered(fast: Dict, slo_ms: int, kind: str, work) -> Dict:
+    """`fast` now, plus `work`'s result as "suggestions" if it ends within slo_ms."""
+    deadline = time.monotonic() + max(0, slo_ms) / 1000.0
+    try:
+        job_id = jobs.submit(kind, work)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    return await jobs.resolve(fast, "suggestions", job_id, deadline, url_prefix=API_PREFIX)
 
 @api_router.post("/analyze-post")
 async def analyze_post(req: PostRequest):
     # run local analyzer logic (fast local metrics)
-    metrics = optimizer.analyze_text_metrics(req.text)
+    metrics = await _cpu(optimizer.analyze_text_metrics, req.text)
+    if req.slo_ms is not None:
+        fast = {"overallScore": metrics["overall"], "scores": metrics["scores"], "metrics": metrics["metrics"],
+                "suggestions": optimizer.rule_post_suggestions(req.text)}
+        return await _tiered(fast, req.slo_ms, "post_suggestions", _llm_suggestions(
+            lambda budget: optimizer.build_post_prompt(req.text, metrics, budget),
+            optimizer.parse_llm_response, POST_MAX_TOKENS, 0.2, optimizer.POST_SCHEMA))
     # run LLM for creative suggestions (wrapped)
-    prompt = optimizer.build_post_prompt(req.text, metrics)
-    llm_resp = await server.generate(prompt, max_tokens=256, temperature=0.2)
-    suggestions = optimizer.parse_llm_response(llm_resp["text"])
+    prompt = optimizer.build_post_prompt(req.text, metrics, await server.prompt_budget(POST_MAX_TOKENS))
+    llm_resp = await _generate(prompt, max_tokens=POST_MAX_TOKENS, temperature=0.2,
+                              schema=optimizer.POST_SCHEMA)
+    with stage("parse"):
+        suggestions = optimizer.parse_llm_response(llm_resp["text"])
     return {
         "overallScore": metrics["overall"],
         "scores": metrics["scores"],
@@ -33,15 +170,91 @@ async def analyze_post(req: PostRequest):
 @api_router.post("/analyze-profile")
 async def analyze_profile(req: ProfileRequest):
     payload = {"headline": req.headline, "about": req.about, "experience": req.experience}
-    metrics = optimizer.analyze_profile_metrics(payload)
-    prompt = optimizer.build_profile_prompt(payload, metrics)
-    llm_resp = await server.generate(prompt, max_tokens=300, temperature=0.2)
-    suggestions = optimizer.parse_llm_response(llm_resp["text"])
+    if req.profile_id:
+        return await _analyze_profile_incremental(req, payload)
+    metrics = await _cpu(optimizer.analyze_profile_metrics, payload)
+    if req.slo_ms is not None:
+        fast = {"overallScore": metrics["overall"], "scores": metrics["scores"], "suggestions": None}
+        return await _tiered(fast, req.slo_ms, "profile_rewrite", _llm_suggestions(
+            lambda budget: optimizer.build_profile_prompt(payload, metrics, budget),
+            optimizer.parse_llm_response, PROFILE_MAX_TOKENS, 0.2, optimizer.PROFILE_SCHEMA))
+    prompt = optimizer.build_profile_prompt(payload, metrics, await server.prompt_budget(PROFILE_MAX_TOKENS))
+    llm_resp = await _generate(prompt, max_tokens=PROFILE_MAX_TOKENS, temperature=0.2,
+                              schema=optimizer.PROFILE_SCHEMA)
+    with stage("parse"):
+        suggestions = optimizer.parse_llm_response(llm_resp["text"])
     return {"overallScore": metrics["overall"], "scores": metrics["scores"], "suggestions": suggestions}
 
+async def _analyze_profile_incremental(req: ProfileRequest, payload: Dict) -> Dict:
+    hashes = section_hashes(payload)
+    sections = dict(zip(optimizer.PROFILE_SECTIONS, await asyncio.gather(*(
+        _section_metrics.aget_or_compute(name, hashes[name], _cpu,
+                                         optimizer.profile_section_metrics, name, payload[name])
+        for name in optimizer.PROFILE_SECTIONS
+    ))))
+    metrics = optimizer.combine_profile_metrics(sections)
+    diff = history.record(req.profile_id, hashes, {"overallScore": metrics["overall"], **metrics["scores"]})
+    rewrite = _incremental_rewrite(payload, hashes, sections)
+    if req.slo_ms is not None:
+        fast = {"overallScore": metrics["overall"], "scores": metrics["scores"], "suggestions": None, "diff": diff}
+        return await _tiered(fast, req.slo_ms, "profile_rewrite", rewrite)
+    return {"overallScore": metrics["overall"], "scores": metrics["scores"],
+            "suggestions": await rewrite, "diff": diff}
+
 @api_router.post("/suggest-images")
 async def suggest_images(req: PostRequest):
-    prompt = optimizer.build_image_suggest_prompt(req.text)
-    llm_resp = await server.generate(prompt, max_tokens=200, temperature=0.6)
-    suggestions = optimizer.parse_image_suggestions(llm_resp["text"])
+    if req.slo_ms is not None:
+        fast = {"suggestions": optimizer.rule_image_suggestions(req.text)}
+        return await _tiered(fast, req.slo_ms, "image_suggestions", _llm_suggestions(
+            lambda budget: optimizer.build_image_suggest_prompt(req.text, budget),
+            optimizer.parse_image_suggestions, IMAGE_MAX_TOKENS, 0.6, optimizer.IMAGE_SCHEMA))
+    prompt = optimizer.build_image_suggest_prompt(req.text, await server.prompt_budget(IMAGE_MAX_TOKENS))
+    llm_resp = await _generate(prompt, max_tokens=IMAGE_MAX_TOKENS, temperature=0.6,
+                              schema=optimizer.IMAGE_SCHEMA)
+    with stage("parse"):
+        suggestions = optimizer.parse_image_suggestions(llm_resp["text"])
     return {"suggestions": suggestions}
+
+
+# ---- streaming (SSE) variants ----
+@api_router.post("/analyze-post/stream")
+async def analyze_post_stream(req: PostRequest):
+    metrics = await _cpu(optimizer.analyze_text_metrics, req.text)
+    prompt = optimizer.build_post_prompt(req.text, metrics, await server.prompt_budget(POST_MAX_TOKENS))
+    first = {"overallScore": metrics["overall"], "scores": metrics["scores"], "metrics": metrics["metrics"]}
+    return _stream_response(first, prompt, optimizer.parse_llm_response,
+                            max_tokens=POST_MAX_TOKENS, temperature=0.2, schema=optimizer.POST_SCHEMA)
+
+@api_router.post("/analyze-profile/stream")
+async def analyze_profile_stream(req: ProfileRequest):
+    payload = {"headline": req.headline, "about": req.about, "experience": req.experience}
+    metrics = await _cpu(optimizer.analyze_profile_metrics, payload)
+    prompt = optimizer.build_profile_prompt(payload, metrics, await server.prompt_budget(PROFILE_MAX_TOKENS))
+    first = {"overallScore": metrics["overall"], "scores": metrics["scores"]}
+    return _stream_response(first, prompt, optimizer.parse_llm_response,
+                            max_tokens=PROFILE_MAX_TOKENS, temperature=0.2, schema=optimizer.PROFILE_SCHEMA)
+
+@api_router.post("/suggest-images/stream")
+async def suggest_images_stream(req: PostRequest):
+    prompt = optimizer.build_image_suggest_prompt(req.text, await server.prompt_budget(IMAGE_MAX_TOKENS))
+    return _stream_response({}, prompt, optimizer.parse_image_suggestions,
+                            max_tokens=IMAGE_MAX_TOKENS, temperature=0.6, schema=optimizer.IMAGE_SCHEMA)
+
+
+# ---- background enrichment jobs ----
+@api_router.get("/jobs/{job_id}")
+async def get_job(job_id: str, wait_ms: int = 0):
+    """Job status / result; wait_ms long-polls until it finishes."""
+    job = await jobs.wait(job_id, wait_ms / 1000.0) if wait_ms > 0 else jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return job
+
+@api_router.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str, timeout_ms: int = 120000):
+    """SSE: status, then result (or error) as soon as the job ends."""
+    return StreamingResponse(
+        jobs.sse(job_id, timeout_ms / 1000.0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
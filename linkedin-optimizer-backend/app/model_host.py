@@ -0,0 +1,158 @@
+# backend/app/model_host.py
+"""
+Model-host process: owns the llama.cpp contexts and serves completions to
+API workers over a Unix socket (protocol: see RemoteModelServer).
+- API workers run with LLM_HOST_SOCKET=<path> and load no model, so
+  `uvicorn --workers N` scales request handling, not model memory
+- the host is pinned to a CPU set (--cpus / LLM_HOST_CPUS) and splits
+  those cores between its LLM_PARALLEL slots, so llama.cpp threads do
+  not compete with API workers or other hosts
+- --pool N starts N hosts on disjoint CPU slices (sockets <path>.0 ..
+  <path>.N-1, list them all in LLM_HOST_SOCKET); the GGUF is mmap'd, so
+  the hosts share one copy of the weights in the page cache
+
+Run (from linkedin-optimizer-backend/):
+    python -m app.model_host --socket /tmp/linkedin-llm.sock --cpus 0-7
+    LLM_HOST_SOCKET=/tmp/linkedin-llm.sock uvicorn main:app --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# shared helpers (utils/) live at the repo root, two levels up
+sys.path.append(str(Path(__file__).resolve().parent.parent.parent))
+# a host serves its own model, never forwards to another host
+os.environ.pop("LLM_HOST_SOCKET", None)
+
+from app.model_server import server, ServerBusy, DeadlineExceeded, _STREAM_LIMIT
+
+
+def parse_cpus(spec: str) -> List[int]:
+    """"0-3,8,10-11" -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = set()
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.update(range(int(lo), int(hi or lo) + 1))
+    return sorted(cpus)
+
+
+def pin(cpus: Optional[List[int]], parallel: int):
+    """Pin this process to `cpus` and size llama.cpp threads to match."""
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+    if "LLM_N_THREADS" not in os.environ:
+        n = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 2)
+        os.environ["LLM_N_THREADS"] = str(max(1, n // max(1, parallel)))
+
+
+async def _send(writer: asyncio.StreamWriter, msg: Dict):
+    writer.write(json.dumps(msg).encode("utf-8") + b"\n")
+    await writer.drain()
+
+
+class ModelHost:
+    def __init__(self, path: str):
+        self.path = path
+        self.server = server
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            req = json.loads(await reader.readline() or b"{}")
+            op = req.get("op")
+            if op == "info":
+                llms = await asyncio.get_running_loop().run_in_executor(None, self.server.load)
+                await _send(writer, {"info": {"n_ctx": llms[0].n_ctx(), "pid": os.getpid(),
+                                              "parallel": self.server.parallel}})
+            elif op in ("generate", "stream"):
+                kwargs = dict(max_tokens=req.get("max_tokens", 256), temperature=req.get("temperature", 0.2),
+                              timeout=req.get("timeout"), schema=req.get("schema"))
+                if op == "generate":
+                    await _send(writer, {"result": await self.server.generate(req["prompt"], **kwargs)})
+                else:
+                    async for chunk in self.server.stream(req["prompt"], **kwargs):
+                        await _send(writer, {"chunk": chunk})
+                    await _send(writer, {"done": True})
+            else:
+                await _send(writer, {"error": "error", "detail": f"unknown op {op!r}"})
+        except (ConnectionError, BrokenPipeError):
+            pass  # client went away; ModelServer drops the request
+        except ServerBusy as e:
+            await _send(writer, {"error": "busy", "detail": str(e)})
+        except DeadlineExceeded as e:
+            await _send(writer, {"error": "deadline", "detail": str(e)})
+        except Exception as e:
+            try:
+                await _send(writer, {"error": "error", "detail": str(e)})
+            except Exception:
+                pass
+        finally:
+            writer.close()
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)  # stale socket from a previous run
+        srv = await asyncio.start_unix_server(self.handle, path=self.path, limit=_STREAM_LIMIT)
+        # load the model (and prefix states) before taking traffic
+        await asyncio.get_running_loop().run_in_executor(None, self.server.load)
+        print(f"model host {os.getpid()} ready on {self.path}", flush=True)
+        stop = asyncio.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            asyncio.get_running_loop().add_signal_handler(sig, stop.set)
+        async with srv:
+            await stop.wait()
+        if os.path.exists(self.path):  # newer asyncio removes it on close
+            os.unlink(self.path)
+
+
+def _run_pool(path: str, n: int, cpus: List[int]) -> int:
+    """Start n hosts on disjoint CPU slices; wait for them (SIGTERM stops all)."""
+    size = max(1, len(cpus) // n)
+    procs = []
+    for i in range(n):
+        part = cpus[i * size:(i + 1) * size] if i < n - 1 else cpus[i * size:]
+        spec = ",".join(map(str, part or cpus))
+        procs.append(subprocess.Popen([sys.executable, "-m", "app.model_host",
+                                       "--socket", f"{path}.{i}", "--cpus", spec]))
+
+    def _stop(*_):
+        for p in procs:
+            p.terminate()
+
+    signal.signal(signal.SIGTERM, _stop)
+    try:
+        return max(p.wait() for p in procs)
+    except KeyboardInterrupt:
+        _stop()
+        return max(p.wait() for p in procs)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Serve the LLM to API workers over a Unix socket")
+    ap.add_argument("--socket", default=os.getenv("LLM_HOST_SOCKET_PATH", "/tmp/linkedin-llm.sock"))
+    ap.add_argument("--cpus", default=os.getenv("LLM_HOST_CPUS", ""), help='CPU set, e.g. "0-7"')
+    ap.add_argument("--pool", type=int, default=1, help="number of host processes")
+    args = ap.parse_args(argv)
+
+    cpus = parse_cpus(args.cpus) if args.cpus else (
+        sorted(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else list(range(os.cpu_count() or 1)))
+    if args.pool > 1:
+        return _run_pool(args.socket, args.pool, cpus)
+
+    host = ModelHost(args.socket)
+    pin(cpus, host.server.parallel)
+    asyncio.run(host.serve())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
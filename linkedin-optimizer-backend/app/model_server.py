@@ -1,23 +1,107 @@
 # linkedin-optimizer-backend/app/model_server.py
+"""
+Async front-end for the local LLM.
+
+Requests are queued and picked up by a scheduler that:
+- collects pending prompts for a short window (LLM_BATCH_WINDOW_MS),
+- decodes identical prompts only once and fans the result out,
+- spreads the rest over LLM_PARALLEL model contexts ("slots") that share
+  the mmap'd weights, so independent requests decode concurrently,
+- rejects new work once LLM_MAX_QUEUE requests are waiting (ServerBusy),
+- enforces a per-request deadline, also stopping generation mid-way.
+
+stream() yields text chunks as they are decoded (for SSE endpoints).
+With a JSON schema, sampling is constrained by a GBNF grammar compiled
+from it (once per schema and slot; LLM_GRAMMAR=0 disables it) and
+generation stops as soon as the top-level JSON value closes.
+Completions are cached by (model path, prompt, sampling params, schema).
+Queue wait, generation time, token counts and tokens/s are exported
+through utils.metrics.
+
+With LLM_HOST_SOCKET set (one or more comma-separated Unix socket paths),
+`server` is a RemoteModelServer instead: API workers hold no model and
+forward requests to model-host processes (app/model_host.py), so
+`uvicorn --workers N` scales request handling without loading N models.
+"""
 
 import os
 import asyncio
-from typing import Optional
-from llama_cpp import Llama
+import json
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from utils.lazy import LazyResource, optional_module, READY
+from utils.llm_registry import registry, load_params
+from utils.result_cache import get_cache, make_key
+from utils.prefix_cache import prefix_cache
+from utils.prompt_budget import PromptBudget, compact_json
+from utils.json_stream import JsonStreamParser
+from utils import metrics
+
+_llama_cpp = optional_module("llama_cpp")
+
+queue_wait_seconds = metrics.Histogram("llm_queue_wait_seconds", "Time from enqueue to decode start")
+generate_seconds = metrics.Histogram("llm_generate_seconds", "Decode time per completion", ("mode",))
+prompt_tokens = metrics.Histogram("llm_prompt_tokens", "Prompt tokens per completion", buckets=metrics.TOKEN_BUCKETS)
+completion_tokens = metrics.Histogram("llm_completion_tokens", "Generated tokens per completion",
+                                      buckets=metrics.TOKEN_BUCKETS)
+tokens_per_second = metrics.Histogram("llm_tokens_per_second", "Decode speed", buckets=metrics.RATE_BUCKETS)
+requests_total = metrics.Counter("llm_requests", "LLM requests by outcome", ("outcome",))
+early_stops_total = metrics.Counter("llm_json_early_stops", "Completions stopped as soon as their JSON closed")
+
+
+class ServerBusy(RuntimeError):
+    """The request queue is full; the caller should retry later."""
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request did not finish before its deadline."""
+
+
+class _Request:
+    def __init__(self, prompt: str, params: Dict, deadline: float, future: asyncio.Future,
+                 sink: Optional[asyncio.Queue] = None):
+        self.prompt = prompt
+        self.params = params
+        self.deadline = deadline
+        self.future = future
+        self.sink = sink  # receives text chunks, then None, when streaming
+        self.enqueued = time.monotonic()
+
+    def key(self) -> Tuple:
+        return (self.prompt, tuple(sorted(self.params.items())))
+
 
 class ModelServer:
     def __init__(self):
-        self._llm: Optional[Llama] = None
-        self._lock = asyncio.Lock()
+        self.parallel = max(1, int(os.getenv("LLM_PARALLEL", "2")))
+        self.max_queue = max(1, int(os.getenv("LLM_MAX_QUEUE", "32")))
+        self.batch_window = float(os.getenv("LLM_BATCH_WINDOW_MS", "10")) / 1000.0
+        self.default_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+        self.use_grammar = os.getenv("LLM_GRAMMAR", "1").strip().lower() not in ("0", "false", "no", "off")
+        self._grammars: Dict[Tuple[str, int], object] = {}  # (schema json, slot) -> LlamaGrammar
+        # llama_cpp is imported and the model loaded on first use / warmup
+        self._llm = LazyResource("llm", self._load_model, optional=False)
+        self._executor = ThreadPoolExecutor(max_workers=self.parallel, thread_name_prefix="llm")
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._slots: Optional[asyncio.Queue] = None
+        self._scheduler: Optional[asyncio.Task] = None
+        self._cache = get_cache("llm_completions")
 
-    def load(self):
+    def load(self) -> List:
         """
         Load model only when needed.
         Path must come from environment variable.
+        Returns one llama context per slot.
         """
-        if self._llm is not None:
-            return
+        llms = self._llm.get()
+        if llms is None:
+            raise RuntimeError(f"LLM could not be loaded: {self._llm.error}")
+        return llms
 
+    def _load_model(self):
         model_path = os.getenv("LLM_MODEL_PATH")
 
         if not model_path:
@@ -30,27 +114,433 @@ class ModelServer:
                 f"LLM model file not found at: {model_path}"
             )
 
-        self._llm = Llama(
-            model_path=model_path,
-            n_ctx=int(os.getenv("LLM_N_CTX", "2048"))
-        )
+        # split the CPU budget between slots unless threads are pinned explicitly
+        overrides = {}
+        if "LLM_N_THREADS" not in os.environ:
+            overrides["n_threads"] = max(1, load_params()["n_threads"] * 2 // self.parallel)
+        # the server keeps its handles for the life of the process
+        return [
+            registry.acquire(model_path, instance=i, **overrides).llm
+            for i in range(self.parallel)
+        ]
+
+    # ---- scheduling ----
+    def _ensure_scheduler(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is loop and self._scheduler is not None and not self._scheduler.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._slots = asyncio.Queue()
+        for i in range(self.parallel):
+            self._slots.put_nowait(i)
+        self._scheduler = loop.create_task(self._schedule())
 
-    async def generate(self, prompt: str, max_tokens=256, temperature=0.2):
-        async with self._lock:
-            if self._llm is None:
-                self.load()
+    async def _schedule(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            window_end = loop.time() + self.batch_window
+            while True:
+                remaining = window_end - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
 
-            loop = asyncio.get_running_loop()
+            groups: Dict[Tuple, List[_Request]] = {}
+            for req in batch:
+                groups.setdefault(req.key(), []).append(req)
+
+            for group in groups.values():
+                now = time.monotonic()
+                live = []
+                for req in group:
+                    if req.future.done():
+                        _close_sink(req)
+                        continue
+                    if req.deadline <= now:
+                        req.future.set_exception(DeadlineExceeded("request expired in queue"))
+                        _close_sink(req)
+                        continue
+                    live.append(req)
+                if not live:
+                    continue
+                # waiting for a free slot is the backpressure: the queue fills up meanwhile
+                slot = await self._slots.get()
+                loop.create_task(self._run(slot, live))
+
+    async def _run(self, slot: int, group: List[_Request]):
+        loop = asyncio.get_running_loop()
+        try:
+            llms = await loop.run_in_executor(self._executor, self.load)
+            llm = llms[slot]
+            started = time.monotonic()
+            for req in group:
+                queue_wait_seconds.observe(started - req.enqueued)
+            deadline = max(r.deadline for r in group)
+            params = dict(group[0].params)
+            schema = params.pop("json_schema", None)
+
+            def _past_deadline(input_ids, logits):
+                return time.monotonic() >= deadline
+
+            sinks = [r.sink for r in group if r.sink is not None]
+
+            def _push(chunk):
+                for sink in sinks:
+                    loop.call_soon_threadsafe(sink.put_nowait, chunk)
 
             def _run():
-                return self._llm.create_completion(
-                    prompt=prompt,
-                    max_tokens=max_tokens,
-                    temperature=temperature,
+                llama_cpp = _llama_cpp.get()
+                # restore the template's instruction prefix so only the user text is evaluated
+                prefix_cache.prepare(llm, group[0].prompt)
+                kwargs = dict(
+                    prompt=group[0].prompt,
+                    stopping_criteria=llama_cpp.StoppingCriteriaList([_past_deadline]),
+                    **params,
                 )
+                if schema is not None:
+                    grammar = self._grammar(llama_cpp, schema, slot)
+                    if grammar is not None:
+                        kwargs["grammar"] = grammar
+                if not sinks and schema is None:
+                    return llm.create_completion(**kwargs)
+                # streaming: fan every chunk out, and rebuild the full completion;
+                # JSON completions end as soon as the top-level value closes
+                parser = JsonStreamParser() if schema is not None else None
+                parts, last = [], {}
+                stream = llm.create_completion(stream=True, **kwargs)
+                for last in stream:
+                    chunk = last["choices"][0]["text"]
+                    if chunk:
+                        parts.append(chunk)
+                        _push(chunk)
+                        if parser is not None and parser.feed(chunk):
+                            break
+                text = "".join(parts)
+                choice = dict(last["choices"][0]) if last else {}
+                if parser is not None and parser.done:
+                    if hasattr(stream, "close"):
+                        stream.close()  # stops llama.cpp decoding
+                    early_stops_total.inc()
+                    text = text[:parser.end]
+                    choice["finish_reason"] = "stop"
+                choice["text"] = text
+                # llama.cpp sends no usage when streaming; one chunk is one token
+                n_prompt = len(llm.tokenize(group[0].prompt.encode("utf-8")))
+                usage = {"prompt_tokens": n_prompt, "completion_tokens": len(parts),
+                         "total_tokens": n_prompt + len(parts)}
+                return dict(last, choices=[choice], usage=usage)
+
+            result = await loop.run_in_executor(self._executor, _run)
+            self._observe(result, time.monotonic() - started, bool(sinks))
+            resp = {"text": result["choices"][0]["text"], "raw": result}
+            # keyed like generate() / stream() look it up: the schema is part of the key
+            self._cache.set(self._cache_key(group[0].prompt, group[0].params), resp)
+            for req in group:
+                if not req.future.done():
+                    req.future.set_result(resp)
+            requests_total.inc(len(group), outcome="ok")
+        except Exception as e:
+            requests_total.inc(len(group), outcome="error")
+            for req in group:
+                if not req.future.done():
+                    req.future.set_exception(e)
+        finally:
+            for req in group:
+                _close_sink(req)
+            self._slots.put_nowait(slot)
+
+    def _grammar(self, llama_cpp, schema: str, slot: int):
+        """Compiled grammar for `schema` (JSON text). Grammars carry parse state,
+        so each slot gets its own; runs on the slot's executor thread."""
+        if not self.use_grammar:
+            return None
+        key = (schema, slot)
+        if key not in self._grammars:
+            grammar = None
+            factory = getattr(getattr(llama_cpp, "LlamaGrammar", None), "from_json_schema", None)
+            if factory is not None:
+                try:
+                    grammar = factory(schema, verbose=False)
+                except Exception:
+                    grammar = None  # unsupported schema: decode unconstrained, the parser still applies
+            self._grammars[key] = grammar
+        return self._grammars[key]
+
+    @staticmethod
+    def _observe(result: Dict, seconds: float, streamed: bool):
+        if not metrics.ENABLED:
+            return
+        generate_seconds.observe(seconds, mode="stream" if streamed else "complete")
+        usage = result.get("usage") or {}
+        if usage.get("prompt_tokens") is not None:
+            prompt_tokens.observe(usage["prompt_tokens"])
+        n_out = usage.get("completion_tokens")
+        if n_out is not None:
+            completion_tokens.observe(n_out)
+            if seconds > 0:
+                tokens_per_second.observe(n_out / seconds)
+
+    @staticmethod
+    def _cache_key(prompt: str, params: Dict) -> str:
+        return make_key(os.getenv("LLM_MODEL_PATH"), prompt, params)
+
+    def _enqueue(self, prompt: str, params: Dict, timeout: float,
+                 sink: Optional[asyncio.Queue] = None) -> asyncio.Future:
+        self._ensure_scheduler()
+        future = self._loop.create_future()
+        req = _Request(prompt, params, time.monotonic() + timeout, future, sink)
+        try:
+            self._queue.put_nowait(req)
+        except asyncio.QueueFull:
+            requests_total.inc(outcome="busy")
+            raise ServerBusy(f"LLM queue is full ({self.max_queue} waiting)")
+        return future
+
+    @staticmethod
+    def _params(max_tokens: int, temperature: float, schema: Optional[Dict]) -> Dict:
+        params = {"max_tokens": max_tokens, "temperature": temperature}
+        if schema is not None:
+            params["json_schema"] = compact_json(schema)
+        return params
+
+    async def generate(self, prompt: str, max_tokens=256, temperature=0.2, timeout: Optional[float] = None,
+                       schema: Optional[Dict] = None):
+        """Queue a completion and wait for it. Returns {"text", "raw"}.
+
+        `schema` (a JSON schema) constrains the output to matching JSON.
+        Raises ServerBusy when the queue is full and DeadlineExceeded when
+        the request takes longer than `timeout` seconds (LLM_REQUEST_TIMEOUT).
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        params = self._params(max_tokens, temperature, schema)
+        cached = self._cache.get(self._cache_key(prompt, params))
+        if cached is not None:
+            requests_total.inc(outcome="cached")
+            return cached
+        future = self._enqueue(prompt, params, timeout)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            requests_total.inc(outcome="deadline")
+            raise DeadlineExceeded(f"LLM request exceeded {timeout:g}s deadline")
+
+    def stream(self, prompt: str, max_tokens=256, temperature=0.2,
+               timeout: Optional[float] = None, schema: Optional[Dict] = None) -> AsyncIterator[str]:
+        """Queue a completion and return an async iterator over its text chunks.
+
+        Admission happens right away (ServerBusy is raised here, before any
+        response has started); generation errors are raised from the iterator.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        params = self._params(max_tokens, temperature, schema)
+        cached = self._cache.get(self._cache_key(prompt, params))
+        if cached is not None:
+            requests_total.inc(outcome="cached")
+            return _replay(cached["text"])
+        sink: asyncio.Queue = asyncio.Queue()
+        future = self._enqueue(prompt, params, timeout, sink)
+        return self._iter_stream(future, sink, time.monotonic() + timeout)
+
+    async def _iter_stream(self, future: asyncio.Future, sink: asyncio.Queue,
+                           deadline: float) -> AsyncIterator[str]:
+        try:
+            while True:
+                remaining = deadline - time.monotonic()
+                try:
+                    chunk = await asyncio.wait_for(sink.get(), max(0.0, remaining))
+                except asyncio.TimeoutError:
+                    requests_total.inc(outcome="deadline")
+                    raise DeadlineExceeded("LLM stream exceeded its deadline")
+                if chunk is None:
+                    break
+                yield chunk
+            await future  # re-raise generation errors
+        finally:
+            if not future.done():
+                future.cancel()
+
+    async def prompt_budget(self, max_tokens: int) -> PromptBudget:
+        """Token budget for a prompt answered with `max_tokens`, using the model's
+        tokenizer (the model is loaded if needed; an estimate if it cannot be)."""
+        try:
+            if self._llm.state == READY:
+                llms = self.load()
+            else:
+                llms = await asyncio.get_running_loop().run_in_executor(self._executor, self.load)
+        except Exception:
+            return PromptBudget.estimated(max_tokens)
+        return PromptBudget.for_llm(llms[0], max_tokens)
+
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+
+# ---- remote (model-host) client ----
+_STREAM_LIMIT = 1 << 22  # max bytes per protocol line
+
+
+class RemoteModelServer:
+    """Same interface as ModelServer, served by model-host processes.
+
+    Protocol: one request per connection, newline-delimited JSON. The
+    client sends {"op", ...}; the host answers {"result"} / {"info"}, or
+    {"chunk"}* then {"done"} when streaming, or {"error", "detail"}.
+    Requests go to the host with the fewest requests in flight.
+    """
+
+    def __init__(self, sockets: List[str]):
+        self.sockets = sockets
+        self.default_timeout = float(os.getenv("LLM_REQUEST_TIMEOUT", "120"))
+        self._inflight = [0] * len(sockets)
+        # ready once a host has the model loaded; prompt budgets need its n_ctx
+        self._info = LazyResource("llm_host", self._load_info, optional=False)
+        # tokenizer only (no weights), for prompt budgets
+        self._vocab = LazyResource("llm_vocab", self._load_vocab)
+
+    def _load_info(self) -> Dict:
+        last: Optional[Exception] = None
+        for path in self.sockets:
+            try:
+                with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.settimeout(self.default_timeout)
+                    sock.connect(path)
+                    sock.sendall(json.dumps({"op": "info"}).encode("utf-8") + b"\n")
+                    msg = json.loads(sock.makefile("rb").readline() or b"{}")
+                if "info" in msg:
+                    return msg["info"]
+                last = RuntimeError(msg.get("detail") or "model host gave no info")
+            except OSError as e:
+                last = e
+        raise RuntimeError(f"no model host reachable at {self.sockets}: {last}")
+
+    @staticmethod
+    def _load_vocab():
+        llama_cpp = _llama_cpp.get()
+        model_path = os.getenv("LLM_MODEL_PATH")
+        if llama_cpp is None or not model_path or not os.path.isfile(model_path):
+            return None
+        return llama_cpp.Llama(model_path=model_path, vocab_only=True, verbose=False)
+
+    async def _request(self, payload: Dict):
+        """Open a connection to the least busy host and send `payload`.
+        The host's in-flight slot is taken before the first await, so a burst
+        spreads over the hosts; the caller releases it (_inflight[i] -= 1)."""
+        i = min(range(len(self.sockets)), key=self._inflight.__getitem__)
+        self._inflight[i] += 1
+        try:
+            reader, writer = await asyncio.open_unix_connection(self.sockets[i], limit=_STREAM_LIMIT)
+        except BaseException as e:
+            self._inflight[i] -= 1
+            if not isinstance(e, OSError):
+                raise
+            requests_total.inc(outcome="busy")
+            raise ServerBusy(f"model host unavailable ({self.sockets[i]}): {e}")
+        try:
+            writer.write(json.dumps(payload).encode("utf-8") + b"\n")
+            await writer.drain()
+        except BaseException:
+            self._inflight[i] -= 1
+            writer.close()
+            raise
+        return i, reader, writer
+
+    @staticmethod
+    async def _read(reader: asyncio.StreamReader) -> Dict:
+        line = await reader.readline()
+        if not line:
+            raise RuntimeError("model host closed the connection")
+        msg = json.loads(line)
+        if "error" in msg:
+            kind, detail = msg["error"], msg.get("detail", "")
+            if kind == "busy":
+                raise ServerBusy(detail)
+            if kind == "deadline":
+                raise DeadlineExceeded(detail)
+            raise RuntimeError(detail)
+        return msg
+
+    @staticmethod
+    def _payload(op: str, prompt: str, max_tokens: int, temperature: float, timeout: float,
+                 schema: Optional[Dict]) -> Dict:
+        return {"op": op, "prompt": prompt, "max_tokens": max_tokens, "temperature": temperature,
+                "timeout": timeout, "schema": schema}
+
+    async def generate(self, prompt: str, max_tokens=256, temperature=0.2, timeout: Optional[float] = None,
+                       schema: Optional[Dict] = None):
+        timeout = self.default_timeout if timeout is None else timeout
+        i, reader, writer = await self._request(
+            self._payload("generate", prompt, max_tokens, temperature, timeout, schema))
+        try:
+            # the host enforces the deadline; this only guards against a hung host
+            msg = await asyncio.wait_for(self._read(reader), timeout + 5)
+            return msg["result"]
+        except asyncio.TimeoutError:
+            requests_total.inc(outcome="deadline")
+            raise DeadlineExceeded(f"LLM request exceeded {timeout:g}s deadline")
+        finally:
+            self._inflight[i] -= 1
+            writer.close()
+
+    def stream(self, prompt: str, max_tokens=256, temperature=0.2,
+               timeout: Optional[float] = None, schema: Optional[Dict] = None) -> AsyncIterator[str]:
+        timeout = self.default_timeout if timeout is None else timeout
+        return self._iter_remote(self._payload("stream", prompt, max_tokens, temperature, timeout, schema),
+                                 time.monotonic() + timeout + 5)
+
+    async def _iter_remote(self, payload: Dict, deadline: float) -> AsyncIterator[str]:
+        i, reader, writer = await self._request(payload)
+        try:
+            while True:
+                try:
+                    msg = await asyncio.wait_for(self._read(reader), max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    requests_total.inc(outcome="deadline")
+                    raise DeadlineExceeded("LLM stream exceeded its deadline")
+                if "chunk" in msg:
+                    yield msg["chunk"]
+                elif msg.get("done"):
+                    break
+        finally:
+            self._inflight[i] -= 1
+            writer.close()
+
+    async def prompt_budget(self, max_tokens: int) -> PromptBudget:
+        loop = asyncio.get_running_loop()
+        info = self._info.get() if self._info.state == READY else await loop.run_in_executor(None, self._info.get)
+        if info is None:
+            self._info.reset()  # host may come up later; ask again next time
+            return PromptBudget.estimated(max_tokens)
+        vocab = self._vocab.get() if self._vocab.state == READY else await loop.run_in_executor(None, self._vocab.get)
+        if vocab is None:
+            return PromptBudget.estimated(max_tokens, n_ctx=info["n_ctx"])
+        return PromptBudget.for_llm(vocab, max_tokens, n_ctx=info["n_ctx"])
+
+    def queue_depth(self) -> int:
+        return sum(self._inflight)
+
+
+async def _replay(text: str) -> AsyncIterator[str]:
+    yield text
+
+
+def _close_sink(req: _Request):
+    if req.sink is not None:
+        req.sink.put_nowait(None)
+
+
+def _make_server():
+    sockets = [s.strip() for s in os.getenv("LLM_HOST_SOCKET", "").split(",") if s.strip()]
+    return RemoteModelServer(sockets) if sockets else ModelServer()
+
 
-            result = await loop.run_in_executor(None, _run)
-            return result["choices"][0]["text"]
+server = _make_server()
 
 
-server = ModelServer()
+@metrics.register_collector
+def _queue_metrics():
+    yield "llm_queue_depth", "gauge", {}, server.queue_depth()
@@ -1,17 +1,39 @@
 # backend/app/optimizer.py
 
-from typing import Dict, Any, List
-import json
-import textstat
+from typing import Dict, Any, List, Optional
+import re
+from utils.lazy import LazyResource
+from utils.metrics import stage, timed
+from utils.prefix_cache import prompt_prefix
+from utils.prompt_budget import PromptBudget, compact_json
+from utils.json_stream import extract_json
+from utils.rule_suggestions import text_suggestions, image_suggestions
+from utils.text_features import TextFeatures
+
+
+def _load_textstat():
+    import textstat
+    return textstat
+
+
+_textstat = LazyResource("textstat", _load_textstat, optional=False)
 
 
 # -----------------------------
 # TEXT / POST METRICS
 # -----------------------------
+@timed("post_metrics")
 def analyze_text_metrics(text: str) -> Dict[str, Any]:
     words = len(text.split())
     sentences = max(1, text.count("."))
-    readability = int(textstat.flesch_reading_ease(text)) if text.strip() else 100
+    if text.strip():
+        textstat = _textstat.get()
+        if textstat is None:
+            raise RuntimeError(f"textstat is not available: {_textstat.error}")
+        with stage("textstat"):
+            readability = int(textstat.flesch_reading_ease(text))
+    else:
+        readability = 100
 
     scores = {
         "readability": readability,
@@ -36,48 +58,224 @@ def analyze_text_metrics(text: str) -> Dict[str, Any]:
     }
 
 
+# -----------------------------
+# PROFILE METRICS
+# -----------------------------
+# Each section is scored on its own, so an edited profile only rescores
+# the edited section (api.py caches the rest by content hash).
+PROFILE_SECTIONS = ("headline", "about", "experience")
+_SECTION_METRIC = {"headline": "headlineWords", "about": "aboutWords", "experience": "experienceBullets"}
+
+
+def profile_section_metrics(section: str, text: str) -> Dict[str, Any]:
+    text = text or ""
+    if section == "headline":
+        words = len(text.split())
+        return {"score": 100 if 4 <= words <= 12 else (50 if words else 0), "count": words}
+    if section == "about":
+        score = analyze_text_metrics(text)["scores"]["readability"] if text.strip() else 0
+        return {"score": score, "count": len(text.split())}
+    if section == "experience":
+        bullets = [b for b in re.split(r"[•\n]", text) if b.strip()]
+        return {"score": min(100, len(bullets) * 25), "count": len(bullets)}
+    raise ValueError(f"unknown profile section: {section}")
+
+
+def combine_profile_metrics(sections: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    scores = {name: sections[name]["score"] for name in PROFILE_SECTIONS}
+    metrics = {_SECTION_METRIC[name]: sections[name]["count"] for name in PROFILE_SECTIONS}
+    overall = int(sum(scores.values()) / len(scores))
+
+    return {
+        "overall": overall,
+        "scores": scores,
+        "metrics": metrics
+    }
+
+
+@timed("profile_metrics")
+def analyze_profile_metrics(payload: Dict[str, str]) -> Dict[str, Any]:
+    return combine_profile_metrics({
+        name: profile_section_metrics(name, payload.get(name, "") or "") for name in PROFILE_SECTIONS
+    })
+
+
 # -----------------------------
 # PROMPT BUILDERS
 # -----------------------------
-def build_post_prompt(text: str, metrics: Dict[str, Any]) -> str:
-    return (
-        "You are an expert LinkedIn copywriter.\n\n"
-        "TASK:\n"
-        "1. Write 3 short hooks\n"
-        "2. Write 3 improved headlines\n"
-        "3. Write 5 concise suggestions (title + description)\n\n"
-        "RULES:\n"
-        "- Return ONLY valid JSON\n"
-        "- No explanations\n\n"
-        f"TEXT:\n{text}\n\n"
-        f"METRICS:\n{json.dumps(metrics, indent=2)}"
-    )
+# static instructions come first so their KV state is cached (utils/prefix_cache.py)
+POST_PROMPT_PREFIX = prompt_prefix(
+    "You are an expert LinkedIn copywriter.\n\n"
+    "TASK:\n"
+    "1. Write 3 short hooks\n"
+    "2. Write 3 improved headlines\n"
+    "3. Write 5 concise suggestions (title + description)\n\n"
+    "RULES:\n"
+    "- Return ONLY valid JSON\n"
+    "- No explanations\n\n"
+    "TEXT:\n"
+)
 
+PROFILE_PROMPT_PREFIX = prompt_prefix(
+    "You are a LinkedIn profile optimization expert.\n\n"
+    "Rewrite the following sections to be professional, concise, and punchy.\n\n"
+    "HEADLINE:\n"
+)
+
+# one section at a time (incremental re-analysis); the section name follows
+# the prefix, so all three sections share its cached KV state
+SECTION_PROMPT_PREFIX = prompt_prefix(
+    "You are a LinkedIn profile optimization expert.\n\n"
+    "Rewrite the following section to be professional, concise, and punchy.\n\n"
+)
+
+IMAGE_PROMPT_PREFIX = prompt_prefix(
+    "Suggest 4 image ideas suitable for a LinkedIn post.\n"
+    "Each suggestion must include:\n"
+    "- type\n"
+    "- title\n"
+    "- short description\n\n"
+    "Return ONLY JSON.\n\n"
+    "POST TEXT:\n"
+)
 
-def build_profile_prompt(payload: dict, metrics: dict) -> str:
-    return (
-        "You are a LinkedIn profile optimization expert.\n\n"
-        "Rewrite the following sections to be professional, concise, and punchy.\n\n"
-        f"HEADLINE:\n{payload.get('headline', '')}\n\n"
-        f"ABOUT:\n{payload.get('about', '')}\n\n"
-        f"EXPERIENCE:\n{payload.get('experience', '')}\n\n"
-        f"METRICS:\n{json.dumps(metrics, indent=2)}\n\n"
-        "Return ONLY JSON."
-    )
 
+# Builders take an optional PromptBudget: user text is then cut so the
+# prompt leaves room for max_tokens inside n_ctx.
+@timed("prompt_build")
+def build_post_prompt(text: str, metrics: Dict[str, Any], budget: Optional[PromptBudget] = None) -> str:
+    tail = f"\n\nMETRICS:\n{compact_json(metrics)}"
+    if budget is not None:
+        text = budget.fit(POST_PROMPT_PREFIX + tail, {"text": text})["text"]
+    return POST_PROMPT_PREFIX + text + tail
 
-def build_image_suggest_prompt(text: str) -> str:
+
+@timed("prompt_build")
+def build_profile_prompt(payload: dict, metrics: dict, budget: Optional[PromptBudget] = None) -> str:
+    fields = {k: payload.get(k, "") or "" for k in ("headline", "about", "experience")}
+    tail = f"\n\nMETRICS:\n{compact_json(metrics)}\n\nReturn ONLY JSON."
+    if budget is not None:
+        fields = budget.fit(PROFILE_PROMPT_PREFIX + "\n\nABOUT:\n\n\nEXPERIENCE:\n" + tail, fields)
     return (
-        "Suggest 4 image ideas suitable for a LinkedIn post.\n"
-        "Each suggestion must include:\n"
-        "- type\n"
-        "- title\n"
-        "- short description\n\n"
-        "Return ONLY JSON.\n\n"
-        f"POST TEXT:\n{text}"
+        PROFILE_PROMPT_PREFIX
+        + f"{fields['headline']}\n\n"
+        f"ABOUT:\n{fields['about']}\n\n"
+        f"EXPERIENCE:\n{fields['experience']}"
+        + tail
     )
 
 
+@timed("prompt_build")
+def build_section_prompt(section: str, text: str, score: int, budget: Optional[PromptBudget] = None) -> str:
+    head = f"{section.upper()}:\n"
+    tail = f"\n\nSCORE: {score}\n\nReturn ONLY JSON."
+    if budget is not None:
+        text = budget.fit(SECTION_PROMPT_PREFIX + head + tail, {"text": text})["text"]
+    return SECTION_PROMPT_PREFIX + head + text + tail
+
+
+@timed("prompt_build")
+def build_image_suggest_prompt(text: str, budget: Optional[PromptBudget] = None) -> str:
+    if budget is not None:
+        text = budget.fit(IMAGE_PROMPT_PREFIX, {"text": text})["text"]
+    return IMAGE_PROMPT_PREFIX + text
+
+
+# -----------------------------
+# RESPONSE SCHEMAS
+# -----------------------------
+# passed to server.generate(schema=...): decoding is grammar-constrained to
+# these shapes and stops once the JSON closes
+def _strings(n: int) -> Dict[str, Any]:
+    return {"type": "array", "items": {"type": "string"}, "minItems": n, "maxItems": n}
+
+
+def _objects(fields: List[str], n: int) -> Dict[str, Any]:
+    item = {
+        "type": "object",
+        "properties": {f: {"type": "string"} for f in fields},
+        "required": fields,
+        "additionalProperties": False,
+    }
+    return {"type": "array", "items": item, "minItems": n, "maxItems": n}
+
+
+POST_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "hooks": _strings(3),
+        "headlines": _strings(3),
+        "suggestions": _objects(["title", "description"], 5),
+    },
+    "required": ["hooks", "headlines", "suggestions"],
+    "additionalProperties": False,
+}
+
+PROFILE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "headline": {"type": "string"},
+        "about": {"type": "string"},
+        "experience": {"type": "array", "items": {"type": "string"}},
+    },
+    "required": ["headline", "about", "experience"],
+    "additionalProperties": False,
+}
+
+# {"headline": ...} etc.: one section of PROFILE_SCHEMA each
+SECTION_SCHEMAS = {
+    name: {
+        "type": "object",
+        "properties": {name: PROFILE_SCHEMA["properties"][name]},
+        "required": [name],
+        "additionalProperties": False,
+    }
+    for name in PROFILE_SCHEMA["required"]
+}
+
+IMAGE_SCHEMA = _objects(["type", "title", "description"], 4)
+
+
 # -----------------------------
 # RESPONSE PARSERS
 # -----------------------------
+# Tolerant of prose / code fences around the JSON and of completions cut
+# off by max_tokens (the completed part is kept).
+def parse_llm_response(text: str) -> Dict[str, Any]:
+    value = extract_json(text)
+    if isinstance(value, dict):
+        return value
+    if isinstance(value, list):
+        return {"suggestions": value}
+    return {"raw": (text or "").strip()}
+
+
+def parse_image_suggestions(text: str) -> List[Dict[str, Any]]:
+    value = extract_json(text)
+    if isinstance(value, dict):
+        value = value.get("images") or value.get("suggestions") or [value]
+    if not isinstance(value, list):
+        # unstructured answer: one idea per non-empty line
+        value = [line.strip(" -*•\t") for line in (text or "").splitlines() if line.strip(" -*•\t")]
+    return [
+        item if isinstance(item, dict) else {"type": "idea", "title": str(item), "description": ""}
+        for item in value
+    ]
+
+
+# -----------------------------
+# RULE-BASED SUGGESTIONS (fast tier)
+# -----------------------------
+# Same shapes as the parsed LLM output, so clients render either.
+def rule_post_suggestions(text: str) -> Dict[str, Any]:
+    rules = text_suggestions(TextFeatures(text))
+    return {"hooks": [], "headlines": [], "suggestions": [{"title": r, "description": ""} for r in rules]}
+
+
+def rule_image_suggestions(text: str) -> List[Dict[str, Any]]:
+    out = []
+    for rule in image_suggestions(TextFeatures(text), 4):
+        kind, sep, title = rule.partition(": ")
+        out.append({"type": kind.lower(), "title": title, "description": ""} if sep
+                   else {"type": "idea", "title": rule, "description": ""})
+    return out
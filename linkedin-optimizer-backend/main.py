@@ -1,8 +1,19 @@
 # backend/main.py
 import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+
+# shared helpers (utils/) live at the repo root, one level up
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
 from app.api import api_router
+from utils.lazy import warmup_in_background, load_status, is_ready
+from utils.metrics import instrument
+from utils.executors import cpu_pool, shutdown_executors
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -10,7 +21,17 @@ load_dotenv()
 API_PREFIX = os.getenv("API_PREFIX", "/api/v1")
 APP_TITLE = "LinkedIn Optimizer API"
 
-app = FastAPI(title=APP_TITLE)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load the LLM + textstat in the background so the port opens immediately
+    warmup_in_background()
+    cpu_pool.start(warm_modules=["app.optimizer"])
+    yield
+    shutdown_executors()
+
+
+app = FastAPI(title=APP_TITLE, lifespan=lifespan)
+instrument(app)  # GET /metrics (METRICS_ENABLED=0 to turn off)
 
 # CORS - allow Lovable dev + localhost; add any other domains you use
 allowed_origins = [
@@ -36,8 +57,17 @@ async def health():
 
 @app.get("/ready")
 async def ready():
-    # optionally expand to check model loaded, disk space, etc.
-    return {"status": "ready"}
+    components = load_status()
+    if is_ready():
+        status = "ready"
+    elif any(c["state"] == "failed" for c in components.values()):
+        status = "failed"
+    else:
+        status = "loading"
+    return JSONResponse(
+        status_code=200 if status == "ready" else 503,
+        content={"status": status, "components": components},
+    )
 
 # include your API router
 app.include_router(api_router, prefix=API_PREFIX)
@@ -5,27 +5,57 @@ Runner and lightweight API for the LinkedIn Optimizer local prototype.
 Usage:
 - CLI: python main.py
 - Server: python main.py --serve  (runs FastAPI + uvicorn)
+- Bulk: python main.py bulk --in posts.jsonl --out scores.jsonl --workers 4 [--resume]
+- ONNX: python main.py export-onnx [--out DIR]  (int8 embedding model for EMBEDDING_BACKEND=onnx)
 """
 
 import argparse
 import os
-from fastapi import FastAPI
+import time
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import List, Optional
 
 # local modules
-from app.post_analyzer import analyze_post
+from app.post_analyzer import analyze_post, analyze_posts, generate_text_suggestions, add_to_history
 from app.image_suggester import suggest_images
-from app.profile_analyzer import profile_strength
+from app.profile_analyzer import profile_strength, profile_sections, record_version, SKILL_GAP_MODE
+from utils.lazy import warmup_in_background, load_status, is_ready
+from utils.metrics import instrument
+from utils.executors import cpu_pool, inference_pool, Overloaded, shutdown_executors
+from utils.jobs import jobs
+from utils.scoring_rules import rules_status
 
 DEFAULT_MODEL_PATH = os.environ.get(
     "MISTRAL_MODEL_PATH", "models/mistral-7b-instruct-v0.1.Q4_K_M.gguf"
 )
 
 # ---- FastAPI models ----
+# slo_ms (with use_llm): latency target. Rule-based results come back at
+# once; LLM output is merged in only if it is ready within slo_ms, else
+# the response links a background job ("enrichment") to fetch it from.
+# user_id: novelty is then measured against that user's stored posts
+# (POST /history/{user_id}/posts), and the report gets "originality"
 class PostIn(BaseModel):
     text: str
     use_llm: Optional[bool] = False
+    slo_ms: Optional[int] = None
+    user_id: Optional[str] = None
+
+class PostsIn(BaseModel):
+    texts: List[str]
+    use_llm: Optional[bool] = False
+    top_topics: Optional[List[str]] = None
+    user_id: Optional[str] = None
+
+class HistoryPost(BaseModel):
+    id: str
+    text: str
+
+class HistoryIn(BaseModel):
+    posts: List[HistoryPost]
 
 class ProfileIn(BaseModel):
     headline: str
@@ -33,28 +63,126 @@ class ProfileIn(BaseModel):
     experience: Optional[List[str]] = []
     skills: Optional[List[str]] = []
     target_roles: Optional[List[str]] = []
+    # match skills by embedding similarity too (None = SKILL_GAP_MODE)
+    semantic_skills: Optional[bool] = None
+    # stable id across edits: the report then includes a score diff vs the last version
+    profile_id: Optional[str] = None
 
 # ---- FastAPI app ----
-app = FastAPI(title="LinkedIn Optimizer (local prototype)")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # load embedding model / textstat / punkt / llama_cpp without blocking startup
+    warmup_in_background()
+    cpu_pool.start(warm_modules=["app.post_analyzer", "app.profile_analyzer"])
+    yield
+    shutdown_executors()
+
+app = FastAPI(title="LinkedIn Optimizer (local prototype)", lifespan=lifespan)
+instrument(app)  # GET /metrics (METRICS_ENABLED=0 to turn off)
+
+async def _run(pool, fn, *args, **kwargs):
+    """Run blocking work on an executor tier; a saturated tier is a 503."""
+    try:
+        return await pool.run(fn, *args, **kwargs)
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+@app.get("/ready")
+def api_ready():
+    ready = is_ready()
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "loading", "components": load_status()},
+    )
+
+def _enrich(kind: str, fn, *args, **kwargs) -> str:
+    """Start LLM work as a background job on the inference tier; returns the job id.
+    `fn` must raise rather than fall back to rules, so a finished job is LLM output."""
+    try:
+        return jobs.submit(kind, _run(inference_pool, fn, *args, **kwargs))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+
+def _deadline(slo_ms: int) -> float:
+    return time.monotonic() + max(0, slo_ms) / 1000.0
 
 @app.post("/analyze_post")
-def api_analyze_post(body: PostIn):
+async def api_analyze_post(body: PostIn):
     model_path = DEFAULT_MODEL_PATH if body.use_llm else None
-    res = analyze_post(body.text, model_path_for_rewrites=model_path)
+    if model_path and body.slo_ms is not None:
+        deadline = _deadline(body.slo_ms)
+        # the fast tier first: if it is rejected, no orphaned job is left running
+        res = await _run(cpu_pool, analyze_post, body.text, user_id=body.user_id)
+        job_id = _enrich("post_suggestions", generate_text_suggestions, body.text, model_path=model_path, n=3,
+                         fallback=False)
+        return await jobs.resolve(res, "suggestions", job_id, deadline)
+    pool = inference_pool if model_path else cpu_pool
+    res = await _run(pool, analyze_post, body.text, model_path_for_rewrites=model_path, user_id=body.user_id)
     return res
 
+@app.post("/analyze_posts")
+async def api_analyze_posts(body: PostsIn):
+    model_path = DEFAULT_MODEL_PATH if body.use_llm else None
+    pool = inference_pool if model_path else cpu_pool
+    res = await _run(pool, analyze_posts, body.texts, model_path_for_rewrites=model_path,
+                     top_topics=body.top_topics, user_id=body.user_id)
+    return {"results": res}
+
+@app.post("/history/{user_id}/posts")
+async def api_add_history(user_id: str, body: HistoryIn):
+    """Store past posts (ids already stored are skipped)."""
+    return await _run(cpu_pool, add_to_history, user_id, [{"id": p.id, "text": p.text} for p in body.posts])
+
 @app.post("/suggest_images")
-def api_suggest_images(body: PostIn):
-    model_path = DEFAULT_MODEL_PATH if body.use_llm else DEFAULT_MODEL_PATH
-    return {"suggestions": suggest_images(body.text, model_path=model_path, n=3)}
+async def api_suggest_images(body: PostIn):
+    model_path = DEFAULT_MODEL_PATH if body.use_llm else None
+    if model_path and body.slo_ms is not None:
+        deadline = _deadline(body.slo_ms)
+        res = {"suggestions": await _run(cpu_pool, suggest_images, body.text, model_path=None, n=3)}
+        job_id = _enrich("image_suggestions", suggest_images, body.text, model_path=model_path, n=3,
+                         fallback=False)
+        return await jobs.resolve(res, "suggestions", job_id, deadline)
+    pool = inference_pool if model_path else cpu_pool
+    return {"suggestions": await _run(pool, suggest_images, body.text, model_path=model_path, n=3)}
 
 @app.post("/analyze_profile")
-def api_analyze_profile(body: ProfileIn):
-    res = profile_strength(
-        body.headline, body.about, body.experience or [], body.skills or [], body.target_roles or []
+async def api_analyze_profile(body: ProfileIn):
+    res = await _run(
+        cpu_pool, profile_strength,
+        body.headline, body.about, body.experience or [], body.skills or [], body.target_roles or [],
+        body.semantic_skills,
     )
+    if body.profile_id:
+        # history is kept here, not in the pool's worker processes
+        semantic = body.semantic_skills if body.semantic_skills is not None else SKILL_GAP_MODE == "semantic"
+        sections = profile_sections(body.headline, body.about, body.experience or [], body.skills or [],
+                                    body.target_roles or [], semantic)
+        res["diff"] = record_version(body.profile_id, res, sections)
     return res
 
+@app.get("/scoring_rules")
+def api_scoring_rules():
+    """Rules file in use; edits are picked up within SCORING_RULES_CHECK_S by every process."""
+    return rules_status()
+
+# ---- background enrichment jobs ----
+@app.get("/jobs/{job_id}")
+async def api_job(job_id: str, wait_ms: int = 0):
+    """Job status / result; wait_ms long-polls until it finishes."""
+    job = await jobs.wait(job_id, wait_ms / 1000.0) if wait_ms > 0 else jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="unknown or expired job")
+    return job
+
+@app.get("/jobs/{job_id}/stream")
+async def api_job_stream(job_id: str, timeout_ms: int = 120000):
+    """SSE: status, then result (or error) as soon as the job ends."""
+    return StreamingResponse(
+        jobs.sse(job_id, timeout_ms / 1000.0),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # ---- CLI runner ----
 def cli_loop():
     print("\n--- LINKEDIN OPTIMIZER (LOCAL PROTOTYPE) ---")
@@ -75,7 +203,7 @@ def cli_loop():
             if not text.strip():
                 continue
             use = input("Use local LLM to suggest images? (y/N): ").strip().lower() == "y"
-            res = suggest_images(text, model_path=DEFAULT_MODEL_PATH if use else DEFAULT_MODEL_PATH, n=3)
+            res = suggest_images(text, model_path=DEFAULT_MODEL_PATH if use else None, n=3)
             print("\nImage suggestions:")
             for r in res:
                 print("-", r)
@@ -98,12 +226,33 @@ def cli_loop():
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
+    parser.add_argument("command", nargs="?", choices=["bulk", "export-onnx"],
+                        help="bulk: score a JSONL/CSV corpus offline; export-onnx: build the int8 embedding model")
     parser.add_argument("--serve", action="store_true", help="Run FastAPI server")
     parser.add_argument("--host", default="127.0.0.1")
     parser.add_argument("--port", default=7860, type=int)
+    parser.add_argument("--in", dest="inp", help="bulk: input .jsonl or .csv")
+    parser.add_argument("--out", help="bulk: output .jsonl; export-onnx: model directory")
+    parser.add_argument("--workers", type=int, default=None, help="bulk: worker processes (0 = in-process)")
+    parser.add_argument("--chunk-size", type=int, default=64, help="bulk: records per worker task")
+    parser.add_argument("--resume", action="store_true", help="bulk: continue from <out>.ckpt")
+    parser.add_argument("--use-llm", action="store_true", help="bulk: LLM rewrites (slow; loads a model per worker)")
     args = parser.parse_args()
 
-    if args.serve:
+    if args.command == "bulk":
+        if not args.inp or not args.out:
+            parser.error("bulk needs --in and --out")
+        from app.bulk import run_bulk
+        run_bulk(
+            args.inp, args.out, workers=args.workers, chunk_size=args.chunk_size,
+            resume=args.resume, model_path=DEFAULT_MODEL_PATH if args.use_llm else None,
+        )
+    elif args.command == "export-onnx":
+        from app.post_analyzer import SENTENCE_MODEL_NAME
+        from utils.embeddings import ONNX_DIR, export_onnx
+        worst = export_onnx(SENTENCE_MODEL_NAME, args.out or ONNX_DIR)
+        print(f"wrote {args.out or ONNX_DIR} (lowest cosine vs torch on the probe set: {worst:.4f})")
+    elif args.serve:
         import uvicorn
         uvicorn.run("main:app", host=args.host, port=args.port, reload=False)
     else:
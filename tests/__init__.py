@@ -0,0 +1,22 @@
+# tests/__init__.py
+"""
+Test environment, set before any test module imports the code under
+test (several modules read their env at import time):
+- CPU work runs on threads, so test stubs (tests/backend.py) apply to it
+- on-disk caches go to a temp dir removed at exit, so no run writes into
+  the working tree or loads what an earlier run left behind
+"""
+
+import atexit
+import os
+import shutil
+import tempfile
+
+CACHE_DIR = tempfile.mkdtemp(prefix="optimizer-tests-")
+atexit.register(shutil.rmtree, CACHE_DIR, ignore_errors=True)
+
+os.environ.setdefault("CPU_EXECUTOR", "thread")
+os.environ["LLM_PREFIX_CACHE_DIR"] = os.path.join(CACHE_DIR, "prefix_kv")
+os.environ["TAXONOMY_CACHE_DIR"] = os.path.join(CACHE_DIR, "taxonomy")
+os.environ["TOPIC_BANK_CACHE_DIR"] = os.path.join(CACHE_DIR, "topic_bank")
+os.environ["SKILL_BANK_CACHE_DIR"] = os.path.join(CACHE_DIR, "skill_bank")
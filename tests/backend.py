@@ -0,0 +1,59 @@
+# tests/backend.py
+"""
+Backend test harness.
+- installs the stub llama_cpp (benchmarks/stub_llm.py) and points
+  LLM_MODEL_PATH at a placeholder file, so the real request path runs
+  without a GGUF model
+- puts the backend directory first on sys.path (its `app` package must
+  shadow the top-level one) before anything of the backend is imported
+- without textstat installed, a minimal stand-in (constant readability)
+  takes its place, so the routes run in a plain checkout
+- CPU work runs on threads and the prefix KV cache lives in a temp dir
+  (both set in tests/__init__.py, before anything reads them)
+
+Env: STUB_LLM_TOKEN_MS (set to 0 here unless given)
+"""
+
+import atexit
+import importlib.util
+import os
+import sys
+import tempfile
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(ROOT, "linkedin-optimizer-backend")
+
+HAS_TEXTSTAT = importlib.util.find_spec("textstat") is not None
+
+_model_path = None
+
+
+def setup():
+    """Prepare the environment once; call before importing backend modules."""
+    global _model_path
+    if _model_path is not None:
+        return
+    from benchmarks import stub_llm
+    from utils.lazy import optional_module
+    stub_llm.install()
+    if not HAS_TEXTSTAT:
+        _install_textstat_stub()
+    optional_module("llama_cpp").reset()  # an earlier test may have found no llama_cpp
+    fd, _model_path = tempfile.mkstemp(suffix=".gguf")
+    os.close(fd)
+    atexit.register(os.unlink, _model_path)
+    os.environ["LLM_MODEL_PATH"] = _model_path
+    os.environ.setdefault("STUB_LLM_TOKEN_MS", "0")
+    os.environ.setdefault("STUB_LLM_PROMPT_TOKEN_MS", "0")
+    os.environ.pop("LLM_HOST_SOCKET", None)  # in-process ModelServer
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+
+def _install_textstat_stub():
+    """The part of textstat the backend uses, with a fixed mid-range score."""
+    textstat = types.ModuleType("textstat")
+    textstat.flesch_reading_ease = lambda text: 60.0
+    textstat.flesch_kincaid_grade = lambda text: 8.0
+    sys.modules["textstat"] = textstat
@@ -0,0 +1,39 @@
+# tests/test_app_api.py
+"""Prototype API (main.py): tiered routes."""
+
+import importlib.util
+import os
+import unittest
+from unittest import mock
+
+from tests import backend
+from utils.executors import Overloaded
+
+
+def _load_main():
+    # by path: with the backend harness active, `main` would be the backend's
+    spec = importlib.util.spec_from_file_location("prototype_main", os.path.join(backend.ROOT, "main.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class TieredRouteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        from fastapi.testclient import TestClient
+        cls.main = _load_main()
+        cls.client = TestClient(cls.main.app)
+
+    def test_rejected_fast_tier_starts_no_enrichment_job(self):
+        body = {"text": "We shipped the new onboarding flow today.", "use_llm": True, "slo_ms": 0}
+        with mock.patch.object(self.main.cpu_pool, "run", side_effect=Overloaded("cpu executor is saturated")), \
+                mock.patch.object(self.main.jobs, "submit") as submit:
+            for route in ("/analyze_post", "/suggest_images"):
+                r = self.client.post(route, json=body)
+                self.assertEqual(r.status_code, 503, route)
+        submit.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
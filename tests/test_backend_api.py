@@ -0,0 +1,35 @@
+# tests/test_backend_api.py
+"""Backend LLM routes end to end, on the stub model."""
+
+import unittest
+from unittest import mock
+
+from tests import backend
+
+
+class LLMRouteTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend.setup()
+        from fastapi import FastAPI
+        from fastapi.testclient import TestClient
+        from app import api
+
+        cls.api = api
+        app = FastAPI()
+        app.include_router(api.api_router, prefix=api.API_PREFIX)
+        cls.client = TestClient(app)
+
+    def test_analyze_post_generates_through_server(self):
+        with mock.patch.object(self.api, "_generate", wraps=self.api._generate) as generate:
+            r = self.client.post(f"{self.api.API_PREFIX}/analyze-post",
+                                 json={"text": "We shipped the new onboarding flow today. What would you change?"})
+        self.assertEqual(r.status_code, 200, r.text)
+        self.assertEqual(generate.await_count, 1)
+        body = r.json()
+        self.assertIn("overallScore", body)
+        self.assertTrue(body["suggestions"].get("suggestions"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+# tests/test_lazy.py
+"""Failed required resources are loaded again after their backoff."""
+
+import time
+import unittest
+
+from utils import lazy
+
+
+class Flaky:
+    """Fails the first `failures` loads."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("model file not mounted yet")
+        return "model"
+
+
+class RetryTest(unittest.TestCase):
+    def test_failed_resource_is_retried_after_backoff(self):
+        load = Flaky(1)
+        res = lazy.LazyResource("test-retry", load, optional=False, retry_seconds=0.05)
+        self.assertIsNone(res.get())
+        self.assertEqual(res.state, lazy.FAILED)
+        self.assertIsNone(res.get())  # within the backoff
+        self.assertEqual(load.calls, 1)
+        time.sleep(0.06)
+        self.assertEqual(res.get(), "model")
+        self.assertEqual(res.state, lazy.READY)
+
+    def test_optional_resource_is_not_retried(self):
+        load = Flaky(1)
+        res = lazy.LazyResource("test-optional", load, retry_seconds=0)
+        self.assertIsNone(res.get())
+        self.assertIsNone(res.get())
+        self.assertEqual(load.calls, 1)
+
+    def test_readiness_check_retries_in_background(self):
+        load = Flaky(1)
+        res = lazy.LazyResource("test-ready", load, optional=False, retry_seconds=0)
+        res.get()
+        deadline = time.monotonic() + 5
+        while not lazy.is_ready(["test-ready"]) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(res.state, lazy.READY)
+        self.assertEqual(load.calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,25 @@
+# tests/test_line_breaks.py
+"""Line breaks end sentences, so cached results must not ignore them."""
+
+import unittest
+
+from app import post_analyzer, profile_analyzer
+
+LINES = "We shipped the new onboarding flow today\nActivation is up 18% in a week\nWhat would you try next"
+
+
+class LineBreakCacheTest(unittest.TestCase):
+    def test_post_with_line_breaks_and_its_flattened_text(self):
+        broken = post_analyzer.analyze_post(LINES)
+        flat = post_analyzer.analyze_post(LINES.replace("\n", " "))
+        self.assertGreater(broken["components"]["structure"], flat["components"]["structure"])
+
+    def test_about_with_line_breaks_and_its_flattened_text(self):
+        def about_score(about):
+            report = profile_analyzer.profile_strength("Data Scientist", about, [], [], semantic_skills=False)
+            return report["components"]["about"]["score"]
+        self.assertGreater(about_score(LINES), about_score(LINES.replace("\n", " ")))
+
+
+if __name__ == "__main__":
+    unittest.main()
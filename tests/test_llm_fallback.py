@@ -0,0 +1,70 @@
+# tests/test_llm_fallback.py
+"""Rule-based fallbacks of the LLM paths are not cached, or reported, as LLM output."""
+
+import asyncio
+import time
+import unittest
+from unittest import mock
+
+from app import image_suggester, post_analyzer
+from utils.jobs import FAILED, jobs
+from utils.llm_registry import LLMUnavailable
+
+MODEL = "models/test-model.gguf"
+TEXT = "We rebuilt our onboarding flow in two weeks. Activation went up 18%. What would you try next?"
+
+
+class FallbackCacheTest(unittest.TestCase):
+    def test_post_fallback_is_not_served_once_the_model_answers(self):
+        with mock.patch.object(post_analyzer, "get_llm", return_value=None):  # model unavailable
+            first = post_analyzer.analyze_post(TEXT + " #post", model_path_for_rewrites=MODEL)
+        self.assertTrue(first["suggestions"])
+        with mock.patch.object(post_analyzer, "_llm_text_suggestions", return_value=["from the model"]):
+            again = post_analyzer.analyze_post(TEXT + " #post", model_path_for_rewrites=MODEL)
+        self.assertEqual(again["suggestions"], ["from the model"])
+
+    def test_image_fallback_is_not_served_once_the_model_answers(self):
+        with mock.patch.object(image_suggester, "_get_llm", return_value=None):
+            first = image_suggester.suggest_images(TEXT + " #images", model_path=MODEL)
+        self.assertTrue(first)
+        with mock.patch.object(image_suggester, "_llm_image_suggestions", return_value=["from the model"]):
+            again = image_suggester.suggest_images(TEXT + " #images", model_path=MODEL)
+        self.assertEqual(again, ["from the model"])
+
+    def test_model_output_is_cached(self):
+        with mock.patch.object(image_suggester, "_llm_image_suggestions", return_value=["from the model"]) as llm:
+            image_suggester.suggest_images(TEXT + " #cached", model_path=MODEL)
+            again = image_suggester.suggest_images(TEXT + " #cached", model_path=MODEL)
+        self.assertEqual(again, ["from the model"])
+        self.assertEqual(llm.call_count, 1)
+
+
+class EnrichmentTest(unittest.TestCase):
+    """Background LLM jobs (the slow tier) fail instead of returning the fast tier's rules."""
+
+    def _resolve(self, fn, *args, **kwargs):
+        async def run():
+            job_id = jobs.submit("test", asyncio.to_thread(fn, *args, **kwargs))
+            return await jobs.resolve({"suggestions": ["rules"]}, "suggestions", job_id, time.monotonic() + 5)
+        return asyncio.run(run())
+
+    def test_unavailable_model_fails_the_job(self):
+        with mock.patch.object(post_analyzer, "get_llm", return_value=None):
+            res = self._resolve(post_analyzer.generate_text_suggestions, TEXT, model_path=MODEL, fallback=False)
+        self.assertEqual(res["tier"], "fast")
+        self.assertEqual(res["suggestions"], ["rules"])
+        self.assertEqual(res["enrichment"]["status"], FAILED)
+        with mock.patch.object(image_suggester, "_get_llm", return_value=None):
+            res = self._resolve(image_suggester.suggest_images, TEXT + " #job", model_path=MODEL, fallback=False)
+        self.assertEqual(res["tier"], "fast")
+
+    def test_fallback_false_raises(self):
+        with mock.patch.object(image_suggester, "_get_llm", return_value=None):
+            with self.assertRaises(LLMUnavailable):
+                image_suggester.suggest_images(TEXT + " #raises", model_path=MODEL, fallback=False)
+            # no model asked for: the rules are the answer
+            self.assertTrue(image_suggester.suggest_images(TEXT + " #raises", model_path=None, fallback=False))
+
+
+if __name__ == "__main__":
+    unittest.main()
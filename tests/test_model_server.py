@@ -0,0 +1,41 @@
+# tests/test_model_server.py
+"""ModelServer completion cache, on the stub model."""
+
+import asyncio
+import unittest
+from unittest import mock
+
+from tests import backend
+
+SCHEMA = {"type": "object", "properties": {"hooks": {"type": "array", "items": {"type": "string"}}}}
+PROMPT = "Return JSON with hooks for this post: we cut onboarding time in half."
+
+
+class CompletionCacheTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend.setup()
+        from app.model_server import ModelServer
+        cls.ModelServer = ModelServer
+
+    def _generate(self, server, calls, **kwargs):
+        async def run():
+            return [await server.generate(PROMPT, max_tokens=64, **kw) for kw in calls]
+        with mock.patch.object(server, "_enqueue", wraps=server._enqueue) as enqueue:
+            out = asyncio.run(run())
+        return out, enqueue.call_count
+
+    def test_schema_request_is_served_from_cache(self):
+        server = self.ModelServer()
+        (first, second), decoded = self._generate(server, [{"schema": SCHEMA}, {"schema": SCHEMA}])
+        self.assertEqual(decoded, 1)
+        self.assertEqual(first, second)
+
+    def test_schema_output_is_not_served_to_unconstrained_requests(self):
+        server = self.ModelServer()
+        _, decoded = self._generate(server, [{"schema": SCHEMA, "temperature": 0.5}, {"temperature": 0.5}])
+        self.assertEqual(decoded, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+# tests/test_profile_cache.py
+"""Cached profile reports and skills sections follow the taxonomy and skill bank."""
+
+import types
+import unittest
+from unittest import mock
+
+from app import profile_analyzer as pa
+
+PROFILE = ("Data Scientist | Python", "I build churn models that ship.", ["Led a churn model rollout, +12% retention"])
+
+
+class SkillsCacheKeyTest(unittest.TestCase):
+    def _report(self, skills, roles):
+        return pa.profile_strength(*PROFILE, skills, roles, semantic_skills=False)
+
+    def test_taxonomy_change_recomputes_skills(self):
+        skills, roles = ["python", "sql", "cache-test"], ["Data Scientist"]
+        self._report(skills, roles)
+        with mock.patch.object(pa, "analyze_skills", wraps=pa.analyze_skills) as analyze:
+            self._report(skills, roles)
+            self.assertEqual(analyze.call_count, 0)
+            with mock.patch.object(pa.get_taxonomy(), "digest", "0" * 16):
+                self._report(skills, roles)
+            self.assertEqual(analyze.call_count, 1)
+
+    def test_skill_bank_state_is_part_of_the_tag(self):
+        roles = ["Data Scientist"]
+        with mock.patch.object(pa._skill_bank, "get", return_value=None):
+            exact = pa._skills_tag(roles, True)
+        with mock.patch.object(pa._skill_bank, "get", return_value=types.SimpleNamespace(key="a" * 32)):
+            bank_a = pa._skills_tag(roles, True)
+        with mock.patch.object(pa._skill_bank, "get", return_value=types.SimpleNamespace(key="b" * 32)):
+            bank_b = pa._skills_tag(roles, True)
+        self.assertEqual(len({exact, bank_a, bank_b, pa._skills_tag(roles, False)}), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# tests/test_remote_server.py
+"""RemoteModelServer spreads concurrent requests over its model hosts."""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+
+from tests import backend
+
+
+class LeastBusyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        backend.setup()
+        from app.model_server import RemoteModelServer, ServerBusy
+        cls.RemoteModelServer = RemoteModelServer
+        cls.ServerBusy = ServerBusy
+
+    def test_burst_is_spread_over_hosts(self):
+        async def run(tmp):
+            served = {}
+
+            def host(name):
+                async def handle(reader, writer):
+                    await reader.readline()
+                    served[name] = served.get(name, 0) + 1
+                    await asyncio.sleep(0.05)
+                    writer.write(json.dumps({"result": {"text": "ok", "raw": {}}}).encode("utf-8") + b"\n")
+                    await writer.drain()
+                    writer.close()
+                return handle
+
+            paths = [os.path.join(tmp, f"host{i}.sock") for i in range(2)]
+            hosts = [await asyncio.start_unix_server(host(i), path=p) for i, p in enumerate(paths)]
+            try:
+                server = self.RemoteModelServer(paths)
+                await asyncio.gather(*(server.generate(f"prompt {n}") for n in range(4)))
+                self.assertEqual(server.queue_depth(), 0)
+            finally:
+                for h in hosts:
+                    h.close()
+            return served
+
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(asyncio.run(run(tmp)), {0: 2, 1: 2})
+
+    def test_failed_connect_releases_the_slot(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            server = self.RemoteModelServer([os.path.join(tmp, "missing.sock")])
+            with self.assertRaises(self.ServerBusy):
+                asyncio.run(server.generate("prompt"))
+            self.assertEqual(server.queue_depth(), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
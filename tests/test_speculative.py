@@ -0,0 +1,37 @@
+# tests/test_speculative.py
+"""Draft acceptance is only counted against the completion that proposed it."""
+
+import unittest
+
+from utils.speculative import CountingDraft
+
+
+class FixedDraft:
+    """Always proposes the same tokens."""
+
+    def __init__(self, tokens):
+        self.tokens = tokens
+
+    def __call__(self, input_ids, **kwargs):
+        return list(self.tokens)
+
+
+class CountingDraftTest(unittest.TestCase):
+    def test_continuation_counts_accepted_prefix(self):
+        draft = CountingDraft(FixedDraft([7, 8, 9]))
+        draft([1, 2, 3])
+        draft([1, 2, 3, 7, 8, 5])  # kept 7, 8; the main model chose 5
+        self.assertEqual(draft.proposed, 6)
+        self.assertEqual(draft.accepted, 2)
+
+    def test_new_completion_counts_nothing(self):
+        draft = CountingDraft(FixedDraft([7, 8, 9]))
+        draft([1, 2, 3])
+        draft([4, 5, 6, 7, 8])  # longer, but a different prompt
+        self.assertEqual(draft.accepted, 0)
+        draft([4, 5])  # shorter than the previous context
+        self.assertEqual(draft.accepted, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+# tests/test_taxonomy.py
+"""The taxonomy keeps the original three roles' skills results."""
+
+import ast
+import unittest
+
+from app.profile_analyzer import analyze_skills, get_taxonomy
+
+# the role map analyze_skills had before the taxonomy file
+BASELINE_ROLES = {
+    "data scientist": {"python", "pandas", "ml", "scikit", "sql", "nlp"},
+    "product manager": {"roadmap", "stakeholder", "analytics", "sql"},
+    "frontend": {"react", "javascript", "css", "html"},
+}
+
+# (skills, target roles) -> (score, missing skills) as the role map scored them
+BASELINE_CASES = [
+    (["python", "sql"], ["Data Scientist"], 40, {"pandas", "ml", "scikit", "nlp"}),
+    (["python", "pandas", "ml", "scikit", "sql", "nlp"], ["Senior Data Scientist"], 60, set()),
+    (["roadmap", "stakeholder", "analytics", "sql", "jira"], ["Product Manager"], 50, set()),
+    (["react", "css"], ["Frontend Developer"], 40, {"javascript", "html"}),
+    (["react", "javascript", "css", "html", "sql"], ["frontend", "product manager"], 40,
+     {"roadmap", "stakeholder", "analytics"}),
+    (["python", "pandas", "ml", "scikit", "sql", "excel", "git", "docker", "aws", "spark", "tableau"],
+     ["data scientist"], 90, {"nlp"}),
+    (["python", "sql", "cooking"], ["Chef"], 30, set()),
+    (["python"], [], 10, set()),
+]
+
+
+def _missing(result):
+    if not result["suggestions"]:
+        return set()
+    return set(ast.literal_eval(result["suggestions"][0].split(": ", 1)[1]))
+
+
+class BaselineRolesTest(unittest.TestCase):
+    def test_original_roles_require_the_same_skills(self):
+        taxonomy = get_taxonomy()
+        for role, skills in BASELINE_ROLES.items():
+            self.assertEqual(set(taxonomy.skills_for_roles([role])), skills, role)
+
+    def test_original_roles_score_as_before(self):
+        for skills, roles, score, missing in BASELINE_CASES:
+            with self.subTest(skills=skills, roles=roles):
+                result = analyze_skills(skills, roles, semantic=False)
+                self.assertEqual(result["score"], score)
+                self.assertEqual(_missing(result), missing)
+
+
+if __name__ == "__main__":
+    unittest.main()
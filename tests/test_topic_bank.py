@@ -0,0 +1,34 @@
+# tests/test_topic_bank.py
+"""Topic banks are memoized within a bound and per-request lists stay off disk."""
+
+import unittest
+from unittest import mock
+
+from app import post_analyzer, topic_bank
+
+
+class FakeModel:
+    def encode(self, texts, convert_to_numpy=True, normalize_embeddings=True):
+        rows = [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0] for t in texts]
+        return topic_bank.np.asarray(rows, dtype=topic_bank.np.float32)
+
+
+@unittest.skipIf(topic_bank.np is None, "needs numpy")
+class TopicBankMemoTest(unittest.TestCase):
+    def test_memo_is_bounded(self):
+        model = FakeModel()
+        for i in range(topic_bank._MEMO_MAX + 10):
+            topic_bank.get_topic_bank(model, "fake", [f"topic {i}", "shared"], cache_dir=None)
+        self.assertLessEqual(len(topic_bank._BANKS), topic_bank._MEMO_MAX)
+
+    def test_request_topics_are_not_persisted(self):
+        with mock.patch.object(topic_bank.TopicBank, "build", wraps=topic_bank.TopicBank.build) as build, \
+                mock.patch.object(post_analyzer._sentence_model, "get", return_value=FakeModel()):
+            post_analyzer.analyze_post("A post about shipping faster with small teams.",
+                                       top_topics=["per-request topic", "another one"])
+        self.assertEqual(build.call_count, 1)
+        self.assertIsNone(build.call_args.kwargs["cache_dir"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,217 @@
+# utils/embeddings.py
+"""
+Sentence-embedding backends behind one interface.
+- a backend is anything with SentenceTransformer's
+  encode(texts, batch_size=None, convert_to_numpy=True, normalize_embeddings=True)
+  returning (n, d) float32, so TopicBank / SkillBank / PostHistory take
+  either one unchanged
+- EMBEDDING_BACKEND selects it:
+    torch   sentence-transformers on PyTorch (default)
+    onnx    the same model exported to ONNX and dynamically quantized to
+            int8 (export_onnx(), or `python main.py export-onnx`), run by
+            onnxruntime with the `tokenizers` library: torch is never
+            imported, so start-up and resident memory drop
+- onnx batching: texts are sorted by token count, cut into batches of
+  EMBEDDING_BATCH_SIZE, and each batch is padded to the next
+  EMBEDDING_BUCKETS length (comma list), so short posts never pay for the
+  longest one in the call and the set of input shapes stays bounded
+- EMBEDDING_THREADS: intra-op threads (onnxruntime / torch); 0 = library default
+- tolerance: per text, the cosine between int8 and torch embeddings is
+  at least ONNX_MIN_COSINE (0.97). export_onnx() measures it on a probe
+  set and refuses to write a model below it; benchmarks/bench_embeddings.py
+  reports it on the benchmark corpus
+- embedding_key() names model + backend, for the on-disk embedding caches
+
+Env: EMBEDDING_BACKEND, EMBEDDING_ONNX_DIR, EMBEDDING_THREADS, EMBEDDING_BUCKETS, EMBEDDING_BATCH_SIZE
+"""
+
+import json
+import os
+from typing import List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+TORCH = "torch"
+ONNX = "onnx"
+
+BACKEND = os.environ.get("EMBEDDING_BACKEND", TORCH).strip().lower() or TORCH
+ONNX_DIR = os.environ.get("EMBEDDING_ONNX_DIR", "models/onnx/all-MiniLM-L6-v2")
+THREADS = int(os.environ.get("EMBEDDING_THREADS", "0"))
+# padded batch lengths; default every 16 tokens (coarser steps pad
+# a 140-token post to 256 and halve throughput)
+BUCKETS = tuple(int(b) for b in os.environ.get("EMBEDDING_BUCKETS", "").split(",") if b.strip()) \
+    or tuple(range(16, 513, 16))
+# small batches: on few cores the activations then stay in cache
+BATCH_SIZE = int(os.environ.get("EMBEDDING_BATCH_SIZE", "8"))
+ONNX_MIN_COSINE = 0.97
+
+_PROBE = [
+    "I made a mistake that cost us 3 months.",
+    "We grew revenue 120% without hiring a single salesperson. Here's how.",
+    "Excited to share that I've started a new position as Senior Data Scientist at Acme!",
+    "python, sql, machine learning, stakeholder management",
+    "What do you think? Comment below 👇 #ai #data #leadership",
+    "Led a churn model rollout, increasing retention by 12% and saving $200k per year.",
+]
+
+
+def embedding_key(model_name: str, backend: Optional[str] = None) -> str:
+    """Cache namespace for embeddings of `model_name` made by `backend`."""
+    backend = backend or BACKEND
+    return model_name if backend == TORCH else f"{model_name}+{backend}-int8"
+
+
+def _normalize(mat):
+    norms = np.linalg.norm(mat, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return mat / norms
+
+
+def _bucket(n: int, buckets: Sequence[int], max_len: int) -> int:
+    for b in buckets:
+        if b >= n:
+            return min(b, max_len)
+    return max_len
+
+
+class OnnxEmbedder:
+    """Mean-pooled sentence embeddings from an exported (int8) transformer."""
+
+    def __init__(self, model_dir: str = ONNX_DIR, threads: int = THREADS,
+                 buckets: Sequence[int] = BUCKETS, batch_size: int = BATCH_SIZE):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, "meta.json")) as f:
+            meta = json.load(f)
+        self.model_name = meta["model"]
+        self.dim = meta["dim"]
+        self.max_len = meta["max_seq_length"]
+        self.buckets = sorted(buckets)
+        self.batch_size = batch_size
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, "tokenizer.json"))
+        self.tokenizer.enable_truncation(self.max_len)
+        self.tokenizer.no_padding()
+        self.pad_id = self.tokenizer.token_to_id("[PAD]") or 0
+
+        opts = ort.SessionOptions()
+        opts.intra_op_num_threads = threads
+        opts.inter_op_num_threads = 1
+        opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, meta["file"]), opts, providers=["CPUExecutionProvider"]
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def encode(self, sentences: Union[str, Sequence[str]], batch_size: Optional[int] = None,
+               convert_to_numpy: bool = True, normalize_embeddings: bool = True, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        if texts:
+            encs = self.tokenizer.encode_batch(texts)
+            lengths = [len(e.ids) for e in encs]
+            order = np.argsort(lengths, kind="stable")
+            size = batch_size or self.batch_size
+            for start in range(0, len(order), size):
+                rows = order[start:start + size]
+                seq = _bucket(lengths[rows[-1]], self.buckets, self.max_len)
+                ids = np.full((len(rows), seq), self.pad_id, dtype=np.int64)
+                mask = np.zeros((len(rows), seq), dtype=np.int64)
+                for r, i in enumerate(rows):
+                    n = lengths[i]
+                    ids[r, :n] = encs[i].ids
+                    mask[r, :n] = 1
+                feeds = {"input_ids": ids, "attention_mask": mask}
+                if "token_type_ids" in self._inputs:
+                    feeds["token_type_ids"] = np.zeros_like(ids)
+                hidden = self.session.run(None, feeds)[0]
+                m = mask[..., None].astype(np.float32)
+                out[rows] = (hidden * m).sum(axis=1) / np.maximum(m.sum(axis=1), 1e-9)
+        if normalize_embeddings:
+            out = _normalize(out)
+        return out[0] if single else out
+
+
+def load_embedder(model_name: str, backend: Optional[str] = None):
+    """The embedding backend for `model_name` (raises if it cannot be loaded)."""
+    backend = backend or BACKEND
+    if backend == ONNX:
+        embedder = OnnxEmbedder()
+        if embedder.model_name != model_name:
+            raise ValueError(f"{ONNX_DIR} holds {embedder.model_name}, not {model_name}")
+        return embedder
+    if backend == TORCH:
+        from sentence_transformers import SentenceTransformer
+        if THREADS:
+            import torch
+            torch.set_num_threads(THREADS)
+        return SentenceTransformer(model_name)
+    raise ValueError(f"unknown EMBEDDING_BACKEND: {backend}")
+
+
+def export_onnx(model_name: str, out_dir: str = ONNX_DIR, probe: Optional[List[str]] = None,
+                min_cosine: float = ONNX_MIN_COSINE) -> float:
+    """Export `model_name` to ONNX, quantize it to int8 and check it against
+    the torch model on `probe` texts. Returns the lowest cosine; nothing is
+    kept when it is under min_cosine. Needs torch, sentence-transformers,
+    onnx and onnxruntime (only here: serving needs onnxruntime + tokenizers)."""
+    import inspect
+    import shutil
+    import tempfile
+    import torch
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+    from sentence_transformers import SentenceTransformer
+
+    class _Encoder(torch.nn.Module):
+        # keyword call: positional order of forward() differs between transformers versions
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids).last_hidden_state
+
+    st = SentenceTransformer(model_name, device="cpu")
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent)
+    try:
+        fp32 = os.path.join(tmp, "model_fp32.onnx")
+        sample = st.tokenizer(["export sample"], return_tensors="pt")
+        names = ["input_ids", "attention_mask", "token_type_ids"]
+        axes = {n: {0: "batch", 1: "seq"} for n in names}
+        axes["last_hidden_state"] = {0: "batch", 1: "seq"}
+        kwargs = {}
+        if "dynamo" in inspect.signature(torch.onnx.export).parameters:
+            kwargs["dynamo"] = False  # the TorchScript exporter: no onnxscript needed
+        torch.onnx.export(
+            _Encoder(st[0].auto_model.eval()), tuple(sample[n] for n in names), fp32,
+            input_names=names, output_names=["last_hidden_state"], dynamic_axes=axes, opset_version=17,
+            **kwargs,
+        )
+        quantize_dynamic(fp32, os.path.join(tmp, "model_int8.onnx"), weight_type=QuantType.QInt8)
+        os.remove(fp32)
+        st.tokenizer.save_pretrained(tmp)
+        with open(os.path.join(tmp, "meta.json"), "w") as f:
+            json.dump({"model": model_name, "file": "model_int8.onnx", "pooling": "mean",
+                       "dim": st.get_sentence_embedding_dimension(),
+                       "max_seq_length": st.max_seq_length}, f)
+
+        texts = probe or _PROBE
+        want = st.encode(texts, convert_to_numpy=True, normalize_embeddings=True)
+        got = OnnxEmbedder(tmp).encode(texts)
+        worst = float((want * got).sum(axis=1).min())
+        if worst < min_cosine:
+            raise ValueError(f"int8 model drifts from {model_name}: cosine {worst:.4f} < {min_cosine}")
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp, out_dir)
+        return worst
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
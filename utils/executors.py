@@ -0,0 +1,148 @@
+# utils/executors.py
+"""
+Dedicated executor tiers for the FastAPI apps.
+
+- cpu_pool:       deterministic scoring (textstat, analyzers); a process
+                  pool by default so it never competes with the event loop
+- inference_pool: LLM calls; a small thread pool (llama.cpp releases the GIL)
+
+Each tier admits at most `workers + max_queue` outstanding jobs; beyond
+that run() raises Overloaded right away, which the apps turn into a 503,
+instead of letting requests pile up behind a saturated model.
+
+Env: CPU_EXECUTOR (process|thread), CPU_WORKERS, CPU_MAX_QUEUE,
+     INFERENCE_WORKERS, INFERENCE_MAX_QUEUE
+"""
+
+import asyncio
+import functools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+from utils import metrics
+
+_EXECUTORS: List["BoundedExecutor"] = []
+
+queue_wait_seconds = metrics.Histogram("executor_queue_wait_seconds", "Time a job waited for a worker", ("pool",))
+job_seconds = metrics.Histogram("executor_job_seconds", "Time a job ran on a worker", ("pool",))
+
+
+class Overloaded(RuntimeError):
+    """The executor tier is at its queue limit; retry later."""
+
+
+class BoundedExecutor:
+    def __init__(self, name: str, kind: str, workers: int, max_queue: int):
+        self.name = name
+        self.kind = kind
+        self.workers = max(1, workers)
+        self.max_queue = max(0, max_queue)
+        self._warm_modules: List[str] = []
+        self._pool: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        _EXECUTORS.append(self)
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    if self.kind == "process":
+                        # spawn: the servers run threads, which fork does not copy safely
+                        self._pool = ProcessPoolExecutor(
+                            max_workers=self.workers,
+                            mp_context=multiprocessing.get_context("spawn"),
+                            initializer=_warm_worker,
+                            initargs=(list(self._warm_modules),),
+                        )
+                    else:
+                        self._pool = ThreadPoolExecutor(
+                            max_workers=self.workers, thread_name_prefix=self.name,
+                        )
+        return self._pool
+
+    def start(self, warm_modules: Optional[List[str]] = None):
+        """Create the pool now (at server startup) instead of on the first job.
+
+        warm_modules are imported and warmed up in every worker process.
+        """
+        if warm_modules:
+            self._warm_modules = list(warm_modules)
+        self._get_pool()
+
+    @property
+    def depth(self) -> int:
+        """Jobs running or waiting in this tier."""
+        return self._pending
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                raise Overloaded(f"{self.name} executor is saturated ({self._pending} jobs)")
+            self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(_call, self.name, self.kind == "process", time.time(), fn, args, kwargs)
+            result, observed = await loop.run_in_executor(self._get_pool(), call)
+            if observed:
+                metrics.merge(observed)
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"kind": self.kind, "workers": self.workers, "max_queue": self.max_queue, "depth": self._pending}
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _call(pool: str, remote: bool, submitted: float, fn: Callable, args, kwargs):
+    # runs on the worker; a process worker ships its observations back with the result
+    started = time.time()
+    queue_wait_seconds.observe(max(0.0, started - submitted), pool=pool)
+    try:
+        result = fn(*args, **kwargs)
+    finally:
+        job_seconds.observe(time.time() - started, pool=pool)
+    return result, (metrics.drain() if remote and metrics.ENABLED else None)
+
+
+def _warm_worker(modules: List[str]):
+    # load models / optional libs once per worker instead of on the first request
+    import importlib
+    from utils.lazy import warmup
+    for m in modules:
+        importlib.import_module(m)
+    warmup()
+
+
+cpu_pool = BoundedExecutor(
+    "cpu",
+    kind=os.environ.get("CPU_EXECUTOR", "process"),
+    workers=int(os.environ.get("CPU_WORKERS", str(max(1, (os.cpu_count() or 2) // 2)))),
+    max_queue=int(os.environ.get("CPU_MAX_QUEUE", "64")),
+)
+
+inference_pool = BoundedExecutor(
+    "inference",
+    kind="thread",
+    workers=int(os.environ.get("INFERENCE_WORKERS", "1")),
+    max_queue=int(os.environ.get("INFERENCE_MAX_QUEUE", "8")),
+)
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    return {e.name: e.stats() for e in _EXECUTORS}
+
+
+def shutdown_executors():
+    for e in _EXECUTORS:
+        e.shutdown()
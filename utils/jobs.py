@@ -0,0 +1,134 @@
+# utils/jobs.py
+"""
+Background jobs for LLM enrichment (the slow tier of tiered responses).
+- submit(coro) starts the work on the running event loop and returns a
+  job id right away; the work itself still runs on the executor tiers
+- job records ({"id", "kind", "status", "result" | "error"}) live in a
+  ResultCache, so with RESULT_CACHE_DB set any worker process can answer
+  GET /jobs/{id} for a job started by another one
+- resolve() implements the latency SLO: the job's result is merged into
+  the fast response if it finishes in time, otherwise the response
+  carries a link to fetch (or stream) the result later
+- at most JOB_MAX_ACTIVE jobs run at once (Overloaded beyond that)
+
+Env: JOB_TTL, JOB_MAX_ACTIVE, JOB_MAX_RESULTS
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Dict, Optional
+from utils import metrics
+from utils.executors import Overloaded
+from utils.result_cache import ResultCache
+
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+jobs_total = metrics.Counter("jobs", "Background enrichment jobs by outcome", ("kind", "status"))
+job_seconds = metrics.Histogram("job_seconds", "Background job run time", ("kind",))
+
+
+class JobStore:
+    def __init__(self, ttl: Optional[float] = None, max_active: Optional[int] = None,
+                 max_results: Optional[int] = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get("JOB_TTL", "600"))
+        self.max_active = max_active if max_active is not None else int(os.environ.get("JOB_MAX_ACTIVE", "256"))
+        max_results = max_results if max_results is not None else int(os.environ.get("JOB_MAX_RESULTS", "4096"))
+        self._records = ResultCache("jobs", max_entries=max_results, ttl=self.ttl)
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    def submit(self, kind: str, work: Awaitable) -> str:
+        """Run `work` in the background; returns the job id (raises Overloaded when full)."""
+        if len(self._tasks) >= self.max_active:
+            if asyncio.iscoroutine(work):
+                work.close()
+            jobs_total.inc(kind=kind, status="rejected")
+            raise Overloaded(f"too many background jobs ({self.max_active} running)")
+        job_id = uuid.uuid4().hex
+        self._records.set(job_id, {"id": job_id, "kind": kind, "status": RUNNING})
+        self._tasks[job_id] = asyncio.get_running_loop().create_task(self._run(job_id, kind, work))
+        return job_id
+
+    async def _run(self, job_id: str, kind: str, work: Awaitable):
+        t0 = time.perf_counter()
+        record: Dict[str, Any] = {"id": job_id, "kind": kind}
+        try:
+            record.update(status=DONE, result=await work)
+        except Exception as e:
+            record.update(status=FAILED, error=str(getattr(e, "detail", None) or e))
+        finally:
+            record["seconds"] = round(time.perf_counter() - t0, 3)
+            self._records.set(job_id, record)
+            self._tasks.pop(job_id, None)
+            jobs_total.inc(kind=kind, status=record.get("status", FAILED))
+            job_seconds.observe(record["seconds"], kind=kind)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self._records.get(job_id)
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """The job record once finished, or as it stands after `timeout` seconds."""
+        task = self._tasks.get(job_id)
+        if task is not None:
+            # asyncio.wait never cancels: the job keeps running after a timeout
+            await asyncio.wait({task}, timeout=max(0.0, timeout))
+            return self.get(job_id)
+        # started by another worker: poll the shared record
+        deadline = time.monotonic() + timeout
+        while True:
+            record = self.get(job_id)
+            if record is None or record["status"] != RUNNING or time.monotonic() >= deadline:
+                return record
+            await asyncio.sleep(min(0.2, max(0.0, deadline - time.monotonic())))
+
+    async def resolve(self, fast: Dict[str, Any], field: str, job_id: str, deadline: float,
+                      url_prefix: str = "") -> Dict[str, Any]:
+        """`fast` with the job's result in `field` if it finishes by `deadline`
+        (time.monotonic()); otherwise `fast` plus an "enrichment" link."""
+        record = await self.wait(job_id, deadline - time.monotonic())
+        if record is not None and record["status"] == DONE:
+            fast[field] = record["result"]
+            fast["tier"] = "llm"
+            return fast
+        fast["tier"] = "fast"
+        fast["enrichment"] = {
+            "job_id": job_id,
+            "status": record["status"] if record else FAILED,
+            "url": f"{url_prefix}/jobs/{job_id}",
+            "stream_url": f"{url_prefix}/jobs/{job_id}/stream",
+        }
+        return fast
+
+    async def sse(self, job_id: str, timeout: float) -> AsyncIterator[str]:
+        """Server-sent events for a job: status, then result (or error) when it ends."""
+        record = self.get(job_id)
+        yield _sse("status", {"id": job_id, "status": record["status"] if record else FAILED})
+        if record is not None and record["status"] == RUNNING:
+            record = await self.wait(job_id, timeout)
+        if record is None:
+            yield _sse("error", {"detail": "unknown or expired job"})
+        elif record["status"] == DONE:
+            yield _sse("result", record)
+        elif record["status"] == FAILED:
+            yield _sse("error", {"detail": record.get("error", "")})
+        else:
+            yield _sse("error", {"detail": "job still running; reconnect to keep waiting"})
+
+    def active(self) -> int:
+        return len(self._tasks)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+jobs = JobStore()
+
+
+@metrics.register_collector
+def _job_metrics():
+    yield "jobs_active", "gauge", {}, jobs.active()
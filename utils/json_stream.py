@@ -0,0 +1,128 @@
+# utils/json_stream.py
+"""
+Incremental JSON parsing for LLM output.
+- JsonStreamParser.feed(chunk) consumes text as it is decoded and returns
+  True as soon as the top-level value closes, so generation can stop at
+  the minimum token count (leading prose / code fences are skipped)
+- partial() builds a valid object from everything completed so far
+  (unfinished strings / numbers are left out), for streaming previews
+- extract_json(text): the first JSON value in a completion, or the best
+  partial one if it was cut off
+"""
+
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class JsonStreamParser:
+    def __init__(self):
+        self.text = ""              # JSON text seen so far (from the first { or [)
+        self.started = False
+        self.done = False
+        self.end: Optional[int] = None   # offset in the fed text just past the value
+        self._fed = 0
+        self._stack: List[str] = []      # open containers: "{" / "["
+        self._expect_key: List[bool] = []
+        self._in_str = False
+        self._esc = False
+        self._str_is_key = False
+        self._safe: Optional[Tuple[int, str]] = None  # (cut, closers) of the last complete point
+        self._polled: Optional[int] = None
+
+    def _mark(self, cut: int):
+        closers = "".join("}" if c == "{" else "]" for c in reversed(self._stack))
+        self._safe = (cut, closers)
+
+    def feed(self, chunk: str) -> bool:
+        """Consume decoded text. Returns True once the top-level value is complete."""
+        if self.done or not chunk:
+            return self.done
+        i0 = 0
+        if not self.started:
+            starts = [p for p in (chunk.find("{"), chunk.find("[")) if p >= 0]
+            if not starts:
+                self._fed += len(chunk)
+                return False
+            i0 = min(starts)
+            self.started = True
+        base = len(self.text) - i0
+        self.text += chunk[i0:]
+        stack, expect_key = self._stack, self._expect_key
+        for i in range(i0, len(chunk)):
+            ch = chunk[i]
+            pos = base + i  # index in self.text
+            if self._in_str:
+                if self._esc:
+                    self._esc = False
+                elif ch == "\\":
+                    self._esc = True
+                elif ch == '"':
+                    self._in_str = False
+                    if not self._str_is_key:
+                        self._mark(pos + 1)
+                continue
+            if ch == '"':
+                self._in_str = True
+                self._str_is_key = bool(stack) and stack[-1] == "{" and expect_key[-1]
+            elif ch in "{[":
+                stack.append(ch)
+                expect_key.append(ch == "{")
+                self._mark(pos + 1)
+            elif ch in "}]":
+                if stack:
+                    stack.pop()
+                    expect_key.pop()
+                self._mark(pos + 1)
+                if not stack:
+                    self.done = True
+                    self.end = self._fed + i + 1
+                    self.text = self.text[:pos + 1]
+                    break
+            elif ch == ",":
+                self._mark(pos)
+                if stack and stack[-1] == "{":
+                    expect_key[-1] = True
+            elif ch == ":":
+                if expect_key:
+                    expect_key[-1] = False
+        self._fed += len(chunk)
+        return self.done
+
+    def value(self) -> Any:
+        """The complete value (None until done, or if it is not valid JSON)."""
+        if not self.done:
+            return None
+        try:
+            return json.loads(self.text)
+        except ValueError:
+            return None
+
+    def partial(self) -> Any:
+        """Everything completed so far, closed into a valid value (None if nothing yet)."""
+        if self.done:
+            return self.value()
+        if self._safe is None:
+            return None
+        # cut points sit right after a complete value, an opening bracket or
+        # before a comma, so closing the open containers gives valid JSON
+        cut, closers = self._safe
+        try:
+            return json.loads(self.text[:cut] + closers)
+        except ValueError:
+            return None
+
+    def poll(self) -> Any:
+        """partial(), but only when something new completed since the last poll (else None)."""
+        cut = self.end if self.done else (self._safe[0] if self._safe else None)
+        if cut is None or cut == self._polled:
+            return None
+        self._polled = cut
+        return self.partial()
+
+
+def extract_json(text: str) -> Any:
+    """First JSON value in `text`; the completed part of it if it was cut off; else None."""
+    parser = JsonStreamParser()
+    parser.feed(text or "")
+    value = parser.value() if parser.done else None
+    return value if value is not None else parser.partial()
@@ -0,0 +1,128 @@
+# utils/lazy.py
+"""
+Lazy, thread-safe loading for heavy dependencies (models, optional libs).
+- nothing is imported / loaded until first use or an explicit warmup()
+- every resource tracks its load state so servers can report readiness
+- a missing optional resource is final; a required one that failed is
+  loaded again once LAZY_RETRY_S seconds have passed (on the next get(),
+  or in the background when readiness is checked)
+
+Env: LAZY_RETRY_S
+"""
+
+import importlib
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+PENDING = "pending"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"            # required resource could not be loaded
+UNAVAILABLE = "unavailable"  # optional resource missing; callers use fallbacks
+
+_RESOURCES: Dict[str, "LazyResource"] = {}
+RETRY_SECONDS = float(os.environ.get("LAZY_RETRY_S", "10"))
+
+
+class LazyResource:
+    """Load `factory()` once, on first get(). A required resource that failed
+    is retried after `retry_seconds`; an unavailable optional one is not."""
+
+    def __init__(self, name: str, factory: Callable[[], Any], optional: bool = True,
+                 retry_seconds: Optional[float] = None):
+        self.name = name
+        self.optional = optional
+        self.retry_seconds = RETRY_SECONDS if retry_seconds is None else retry_seconds
+        self._retry_at = 0.0
+        self._factory = factory
+        self._lock = threading.Lock()
+        self._value = None
+        self.state = PENDING
+        self.error: Optional[BaseException] = None
+        self.load_seconds: Optional[float] = None
+        _RESOURCES[name] = self
+
+    def get(self) -> Any:
+        """Return the loaded value, or None if it could not be loaded."""
+        if self.state in (READY, UNAVAILABLE) or (self.state == FAILED and not self.retry_due()):
+            return self._value
+        with self._lock:
+            if self.state != PENDING and not self.retry_due():
+                return self._value
+            self.state = LOADING
+            t0 = time.perf_counter()
+            try:
+                self._value = self._factory()
+                self.state = READY
+            except Exception as e:
+                self._value = None
+                self.error = e
+                self.state = UNAVAILABLE if self.optional else FAILED
+                self._retry_at = time.monotonic() + self.retry_seconds
+            self.load_seconds = time.perf_counter() - t0
+            return self._value
+
+    def retry_due(self) -> bool:
+        """True for a failed required resource whose retry backoff has elapsed."""
+        return self.state == FAILED and time.monotonic() >= self._retry_at
+
+    def reset(self):
+        """Forget the loaded value (or failure) so the next get() loads again."""
+        with self._lock:
+            self._value = None
+            self.error = None
+            self.load_seconds = None
+            self.state = PENDING
+
+    def status(self) -> Dict[str, Any]:
+        out = {"state": self.state}
+        if self.load_seconds is not None:
+            out["load_seconds"] = round(self.load_seconds, 3)
+        if self.error is not None:
+            out["error"] = str(self.error)
+        return out
+
+
+def optional_module(module_name: str) -> LazyResource:
+    """Shared lazy import of an optional module (e.g. "textstat", "llama_cpp")."""
+    res = _RESOURCES.get(module_name)
+    if res is None:
+        res = LazyResource(module_name, lambda: importlib.import_module(module_name))
+    return res
+
+
+def _selected(names: Optional[Iterable[str]]):
+    if names is None:
+        return list(_RESOURCES.values())
+    return [_RESOURCES[n] for n in names if n in _RESOURCES]
+
+
+def load_status(names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    return {r.name: r.status() for r in _selected(names)}
+
+
+def is_ready(names: Optional[Iterable[str]] = None) -> bool:
+    """True once every resource finished loading (missing optional libs count as done).
+    Failed resources due for a retry are loaded again in the background."""
+    resources = _selected(names)
+    due = [r.name for r in resources if r.retry_due()]
+    if due:
+        warmup_in_background(due)
+    return all(r.state in (READY, UNAVAILABLE) for r in resources)
+
+
+def warmup(names: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, Any]]:
+    """Load resources now (blocking). Returns their status."""
+    names = list(names) if names is not None else None
+    for r in _selected(names):
+        r.get()
+    return load_status(names)
+
+
+def warmup_in_background(names: Optional[Iterable[str]] = None) -> threading.Thread:
+    """Run warmup() in a daemon thread so server startup is not blocked."""
+    t = threading.Thread(target=warmup, args=(names,), name="warmup", daemon=True)
+    t.start()
+    return t
@@ -0,0 +1,198 @@
+# utils/llm_registry.py
+"""
+Process-wide registry of llama.cpp models.
+- one Llama instance per (model path, load params), shared by every caller
+- handles are reference counted; idle models (no handles, unused for
+  LLM_IDLE_TTL seconds) are evicted on the next acquire/release
+- failed loads are not cached, so a fixed path / file is picked up on retry
+
+Load params default from env:
+LLM_N_CTX, LLM_N_THREADS, LLM_N_BATCH, LLM_USE_MMAP, LLM_USE_MLOCK,
+LLM_DRAFT (speculative decoding, see utils/speculative.py)
+"""
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from utils.lazy import optional_module
+from utils.prefix_cache import prefix_cache
+from utils.speculative import draft_spec, draft_kwargs
+
+_llama_cpp = optional_module("llama_cpp")
+
+
+class LLMUnavailable(RuntimeError):
+    """The model could not be loaded, failed, or gave no usable answer."""
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    val = os.environ.get(name)
+    if val is None:
+        return default
+    return val.strip().lower() in ("1", "true", "yes", "on")
+
+
+def load_params(**overrides) -> Dict[str, Any]:
+    """Llama() kwargs: env defaults merged with explicit overrides."""
+    params = {
+        "n_ctx": int(os.environ.get("LLM_N_CTX", "2048")),
+        "n_threads": int(os.environ.get("LLM_N_THREADS", str(max(1, (os.cpu_count() or 2) // 2)))),
+        "n_batch": int(os.environ.get("LLM_N_BATCH", "512")),
+        "use_mmap": _env_bool("LLM_USE_MMAP", True),
+        "use_mlock": _env_bool("LLM_USE_MLOCK", False),
+        "draft": draft_spec(),
+    }
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    return params
+
+
+class _Entry:
+    def __init__(self):
+        self.llm = None
+        self.refs = 0
+        self.last_used = time.monotonic()
+        self.load_seconds: Optional[float] = None
+        self.load_lock = threading.Lock()   # one loader per key
+        self.infer_lock = threading.Lock()  # a Llama context is not re-entrant
+
+
+class LLMHandle:
+    """A counted reference to a loaded model. Use as a context manager or call release()."""
+
+    def __init__(self, registry: "LLMRegistry", key: Tuple, entry: _Entry):
+        self._registry = registry
+        self._key = key
+        self._entry = entry
+        self._released = False
+
+    @property
+    def llm(self):
+        return self._entry.llm
+
+    @property
+    def lock(self) -> threading.Lock:
+        return self._entry.infer_lock
+
+    def __call__(self, prompt: str, **kwargs):
+        """Run a completion, serialized with other users of the same model."""
+        with self._entry.infer_lock:
+            self._entry.last_used = time.monotonic()
+            prefix_cache.prepare(self._entry.llm, prompt)
+            return self._entry.llm(prompt, **kwargs)
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self._registry._release(self._key)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class LLMRegistry:
+    def __init__(self, idle_ttl: Optional[float] = None):
+        if idle_ttl is None:
+            idle_ttl = float(os.environ.get("LLM_IDLE_TTL", "900"))
+        self.idle_ttl = idle_ttl
+        self._entries: Dict[Tuple, _Entry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(model_path: str, params: Dict[str, Any], instance: int = 0) -> Tuple:
+        return (os.path.abspath(model_path), tuple(sorted(params.items())), instance)
+
+    def acquire(self, model_path: str, instance: int = 0, **overrides) -> LLMHandle:
+        """Return a handle to the model, loading it once. Raises if it cannot be loaded.
+
+        `instance` selects an independent context of the same model (weights
+        are shared through mmap); parallel schedulers use one per slot.
+        """
+        params = load_params(**overrides)
+        key = self.key(model_path, params, instance)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _Entry()
+            entry.refs += 1
+        try:
+            with entry.load_lock:
+                if entry.llm is None:
+                    llama_cpp = _llama_cpp.get()
+                    if llama_cpp is None:
+                        raise RuntimeError(f"llama_cpp is not available: {_llama_cpp.error}")
+                    t0 = time.perf_counter()
+                    kwargs = {k: v for k, v in params.items() if k != "draft"}
+                    # one drafter per context: it tracks that context's tokens
+                    kwargs.update(draft_kwargs(params["draft"], llama_cpp))
+                    entry.llm = llama_cpp.Llama(model_path=model_path, **kwargs)
+                    entry.load_seconds = time.perf_counter() - t0
+                    # evaluate (or load) the static prompt prefixes once per context
+                    with entry.infer_lock:
+                        prefix_cache.warm(entry.llm)
+        except Exception:
+            self._release(key, drop_unloaded=True)
+            raise
+        entry.last_used = time.monotonic()
+        self.evict_idle()
+        return LLMHandle(self, key, entry)
+
+    def _release(self, key: Tuple, drop_unloaded: bool = False):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs = max(0, entry.refs - 1)
+            entry.last_used = time.monotonic()
+            if drop_unloaded and entry.llm is None and entry.refs == 0:
+                del self._entries[key]
+        self.evict_idle()
+
+    def evict_idle(self, max_idle: Optional[float] = None) -> int:
+        """Unload models with no handles that were idle longer than max_idle (default idle_ttl)."""
+        max_idle = self.idle_ttl if max_idle is None else max_idle
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.refs == 0 and entry.llm is not None and now - entry.last_used >= max_idle:
+                    evicted.append(self._entries.pop(key))
+        for entry in evicted:
+            _close(entry.llm)
+            entry.llm = None
+        return len(evicted)
+
+    def clear(self):
+        """Unload every model that has no outstanding handles."""
+        self.evict_idle(max_idle=0)
+
+    def stats(self) -> List[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            return [
+                {
+                    "model_path": key[0],
+                    "params": dict(key[1]),
+                    "instance": key[2],
+                    "loaded": entry.llm is not None,
+                    "refs": entry.refs,
+                    "idle_seconds": round(now - entry.last_used, 1),
+                    "load_seconds": round(entry.load_seconds, 3) if entry.load_seconds else None,
+                }
+                for key, entry in self._entries.items()
+            ]
+
+
+def _close(llm):
+    close = getattr(llm, "close", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+registry = LLMRegistry()
@@ -0,0 +1,348 @@
+# utils/metrics.py
+"""
+Low-overhead in-process metrics with a Prometheus text exporter.
+- Counter / Gauge / Histogram with labels; stage() times a hot-path
+  section into the shared `stage_seconds{stage=...}` histogram
+- collectors: callbacks sampled at scrape time (cache sizes, executor
+  depth, model load times), so nothing is paid per request
+- process-pool workers drain() their observations and the parent
+  merge()s them, so stages timed in workers still show up
+- instrument(app) adds per-route HTTP latency and GET /metrics
+
+METRICS_ENABLED=0 turns everything into no-ops (no middleware, no
+route, stage() returns a shared null context).
+"""
+
+import functools
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, List, Tuple
+
+ENABLED = os.environ.get("METRICS_ENABLED", "1").strip().lower() not in ("0", "false", "no", "off")
+PREFIX = "linkedin_"
+
+# seconds; covers sub-ms scoring up to multi-second LLM generations
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+TOKEN_BUCKETS = (8, 16, 32, 64, 128, 256, 512, 1024, 2048, 4096)
+RATE_BUCKETS = (1, 2, 5, 10, 20, 30, 50, 75, 100, 200, 500)
+
+_METRICS: Dict[str, "_Metric"] = {}
+_COLLECTORS: List[Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]] = []
+_NULL = nullcontext()
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._series: Dict[Tuple[str, ...], object] = {}
+        _METRICS[self.name] = self
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(k, "")) for k in self.labels)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels):
+        if not ENABLED:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._series[key] = self._series.get(key, 0.0) + amount
+
+    def _samples(self):
+        for key, v in self._series.items():
+            yield self.name + "_total", key, v
+
+    def _drain(self):
+        out = {k: v for k, v in self._series.items()}
+        self._series.clear()
+        return out
+
+    def _merge(self, data):
+        for key, v in data.items():
+            self._series[key] = self._series.get(key, 0.0) + v
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        if not ENABLED:
+            return
+        with self._lock:
+            self._series[self._key(labels)] = float(value)
+
+    def _samples(self):
+        for key, v in self._series.items():
+            yield self.name, key, v
+
+    def _drain(self):
+        return {}  # gauges are process-local state, not deltas
+
+    def _merge(self, data):
+        pass
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        if not ENABLED:
+            return
+        self._observe(self._key(labels), value)
+
+    def _observe(self, key: Tuple[str, ...], value: float):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            s = self._series.get(key)
+            if s is None:
+                s = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            s[0][i] += 1
+            s[1] += value
+            s[2] += 1
+
+    def time(self, **labels):
+        """Context manager observing the elapsed seconds."""
+        return _Timer(self, self._key(labels)) if ENABLED else _NULL
+
+    def _samples(self):
+        for key, (counts, total, n) in self._series.items():
+            acc = 0
+            for bound, c in zip(self.buckets, counts):
+                acc += c
+                yield self.name + "_bucket", key + (("le", _fmt(bound)),), acc
+            yield self.name + "_bucket", key + (("le", "+Inf"),), n
+            yield self.name + "_sum", key, total
+            yield self.name + "_count", key, n
+
+    def _drain(self):
+        out = {k: [list(c), t, n] for k, (c, t, n) in self._series.items()}
+        self._series.clear()
+        return out
+
+    def _merge(self, data):
+        for key, (counts, total, n) in data.items():
+            s = self._series.get(key)
+            if s is None:
+                self._series[key] = [list(counts), total, n]
+            else:
+                s[0] = [a + b for a, b in zip(s[0], counts)]
+                s[1] += total
+                s[2] += n
+
+
+class _Timer:
+    __slots__ = ("hist", "key", "t0")
+
+    def __init__(self, hist: Histogram, key: Tuple[str, ...]):
+        self.hist = hist
+        self.key = key
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist._observe(self.key, time.perf_counter() - self.t0)
+        return False
+
+
+# ---- shared instruments ----
+stage_seconds = Histogram("stage_seconds", "Time spent per pipeline stage", ("stage",))
+http_request_seconds = Histogram("http_request_seconds", "HTTP request latency", ("method", "route", "status"))
+
+
+def stage(name: str):
+    """`with stage("textstat"): ...` - time a section into stage_seconds."""
+    return _Timer(stage_seconds, (name,)) if ENABLED else _NULL
+
+
+def timed(name: str):
+    """Decorator form of stage()."""
+    def wrap(fn):
+        if not ENABLED:
+            return fn
+
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            with _Timer(stage_seconds, (name,)):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def register_collector(fn: Callable[[], Iterable[Tuple[str, str, Dict[str, str], float]]]):
+    """fn() yields (name, kind, labels, value) at scrape time."""
+    _COLLECTORS.append(fn)
+    return fn
+
+
+# ---- cross-process ----
+def drain() -> Dict[str, Dict]:
+    """Take (and reset) this process's counter / histogram observations."""
+    out = {}
+    for name, m in _METRICS.items():
+        with m._lock:
+            data = m._drain()
+        if data:
+            out[name] = data
+    return out
+
+
+def merge(data: Dict[str, Dict]):
+    """Add observations drained in another process."""
+    for name, series in (data or {}).items():
+        m = _METRICS.get(name)
+        if m is not None:
+            with m._lock:
+                m._merge(series)
+
+
+# ---- exposition ----
+def _fmt(v: float) -> str:
+    if float(v).is_integer() and abs(v) < 1e15:
+        return str(int(v))
+    return repr(float(v))
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Tuple[str, ...], key: Tuple) -> str:
+    pairs = list(zip(names, key[:len(names)])) + [p for p in key[len(names):]]
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def render() -> str:
+    """All metrics in Prometheus text format (0.0.4)."""
+    lines = []
+    for m in list(_METRICS.values()):
+        with m._lock:
+            samples = list(m._samples())
+        if not samples:
+            continue
+        lines.append(f"# HELP {m.name} {m.help}")
+        lines.append(f"# TYPE {m.name} {m.kind}")
+        for name, key, value in samples:
+            lines.append(f"{name}{_labels(m.labels, key)} {_fmt(value)}")
+    # collector rows are grouped per family, as the format requires
+    families: Dict[str, Tuple[str, List]] = {}
+    for fn in _COLLECTORS:
+        try:
+            rows = list(fn())
+        except Exception:
+            continue
+        for name, kind, labels, value in rows:
+            families.setdefault(PREFIX + name, (kind, []))[1].append((labels, value))
+    for full, (kind, rows) in families.items():
+        lines.append(f"# TYPE {full} {kind}")
+        for labels, value in rows:
+            names = tuple(labels)
+            lines.append(f"{full}{_labels(names, tuple(labels[k] for k in names))} {_fmt(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# ---- built-in collectors ----
+@register_collector
+def _cache_metrics():
+    from utils.result_cache import cache_stats
+    # hits / misses are counted in cache_lookups_total (includes worker processes)
+    for name, s in cache_stats().items():
+        yield "cache_entries", "gauge", {"cache": name}, s["size"]
+
+
+@register_collector
+def _load_metrics():
+    from utils.lazy import load_status
+    for name, s in load_status().items():
+        yield "resource_ready", "gauge", {"resource": name}, 1.0 if s["state"] == "ready" else 0.0
+        if "load_seconds" in s:
+            yield "resource_load_seconds", "gauge", {"resource": name}, s["load_seconds"]
+
+
+@register_collector
+def _executor_metrics():
+    from utils.executors import executor_stats
+    for name, s in executor_stats().items():
+        yield "executor_depth", "gauge", {"pool": name}, s["depth"]
+        yield "executor_workers", "gauge", {"pool": name}, s["workers"]
+
+
+@register_collector
+def _model_metrics():
+    from utils.llm_registry import registry
+    for m in registry.stats():
+        labels = {"model": os.path.basename(m["model_path"]), "instance": str(m.get("instance", 0))}
+        if m.get("load_seconds") is not None:
+            yield "model_load_seconds", "gauge", labels, m["load_seconds"]
+        yield "model_refs", "gauge", labels, m.get("refs", 0)
+
+
+# ---- FastAPI ----
+class _HTTPMetrics:
+    """Pure ASGI middleware (no BaseHTTPMiddleware buffering, safe for SSE)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        t0 = time.perf_counter()
+        status = ["500"]
+
+        async def _send(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, _send)
+        finally:
+            http_request_seconds.observe(time.perf_counter() - t0, method=scope.get("method", ""),
+                                         route=_route_label(scope), status=status[0])
+
+
+def _route_label(scope) -> str:
+    # bounded label cardinality: unmatched paths collapse into "other",
+    # parametrized routes use their template
+    if "endpoint" not in scope:
+        return "other"
+    route = scope.get("route")
+    if scope.get("path_params") and route is not None:
+        return getattr(route, "path", "other")
+    return scope.get("path", "other")
+
+
+def instrument(app):
+    """Add HTTP latency middleware and GET /metrics (no-op when disabled)."""
+    if not ENABLED:
+        return app
+    from fastapi.responses import PlainTextResponse
+
+    app.add_middleware(_HTTPMetrics)
+
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        return PlainTextResponse(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+    return app
@@ -0,0 +1,85 @@
+# utils/near_dup.py
+"""
+Near-duplicate signatures for short texts.
+- shingles: hashed word 3-grams of the lowercased text (texts of fewer
+  than 3 words: the words); word hashes are blake2b, so signatures are
+  the same in every process and can be stored
+- simhash(): 64-bit SimHash; near-duplicates differ in few bits, so a
+  Hamming scan over stored hashes is a cheap prefilter
+- minhash(): MINHASH_PERM-value MinHash; the share of equal values
+  estimates the Jaccard similarity of two shingle sets
+- popcount() uses np.bitwise_count (numpy >= 2) or a byte table
+"""
+
+import hashlib
+import random
+import re
+from functools import lru_cache
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+MINHASH_PERM = 32
+_PRIME = (1 << 31) - 1
+_WORD_RE = re.compile(r"[#@]?\w+")
+
+if np is not None:
+    _rng = random.Random(0x6D696E68)  # fixed: stored signatures must stay comparable
+    _A = np.array([_rng.randrange(1, _PRIME) for _ in range(MINHASH_PERM)], dtype=np.uint64)
+    _B = np.array([_rng.randrange(0, _PRIME) for _ in range(MINHASH_PERM)], dtype=np.uint64)
+    _SHIFTS = np.arange(64, dtype=np.uint64)
+    _POP8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+@lru_cache(maxsize=1 << 16)
+def _word_hash(word: str) -> int:
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def _mix(z):
+    # splitmix64 finalizer, elementwise on uint64 (wraps on overflow)
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def shingles(text: str):
+    """Distinct shingle hashes of `text` (uint64 array)."""
+    words = _WORD_RE.findall((text or "").lower())
+    if not words:
+        return np.zeros(0, dtype=np.uint64)
+    w = np.array([_word_hash(x) for x in words], dtype=np.uint64)
+    if len(w) >= 3:
+        w = _mix(w[:-2] ^ _mix(w[1:-1] ^ _mix(w[2:])))
+    return np.unique(w)
+
+
+def simhash(sh) -> int:
+    """64-bit SimHash of a shingle-hash array (0 for no shingles)."""
+    if not len(sh):
+        return 0
+    votes = ((sh[:, None] >> _SHIFTS) & np.uint64(1)).sum(axis=0) * 2 > len(sh)
+    return int(np.packbits(votes, bitorder="little").view(np.uint64)[0])
+
+
+def minhash(sh):
+    """MinHash signature (MINHASH_PERM uint32) of a shingle-hash array."""
+    if not len(sh):
+        return np.full(MINHASH_PERM, _PRIME, dtype=np.uint32)
+    x = (sh & np.uint64(0xFFFFFFFF))[:, None]
+    return ((_A * x + _B) % np.uint64(_PRIME)).min(axis=0).astype(np.uint32)
+
+
+def popcount(a):
+    """Set bits per element of a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(a)
+    a = np.ascontiguousarray(a)
+    return _POP8[a.view(np.uint8)].reshape(a.shape + (8,)).sum(axis=-1)
+
+
+def jaccard(signatures, sig):
+    """Estimated Jaccard similarity of each row of `signatures` (n, MINHASH_PERM) to `sig`."""
+    return (np.asarray(signatures) == sig).mean(axis=1)
@@ -0,0 +1,186 @@
+# utils/prefix_cache.py
+"""
+KV-state cache for the constant instruction prefixes of our prompts.
+- prompt modules register each template's static head with prompt_prefix()
+  (templates put the constant instructions first, user text after)
+- on model load, warm() evaluates every registered prefix once and keeps
+  the llama.cpp state (and pickles it to LLM_PREFIX_CACHE_DIR, so a
+  restart loads it instead of re-evaluating)
+- before each completion, prepare() restores the matching prefix state
+  unless the context already holds it; llama.cpp then only evaluates
+  the tokens after the shared prefix (the user's text)
+
+States are keyed by model file (path, size, mtime), context size,
+llama_cpp version, speculative drafting on/off and prefix text, so a
+changed model or template never reuses a stale state. Per-request states are never saved.
+
+Env: LLM_PREFIX_CACHE (1/0), LLM_PREFIX_CACHE_DIR
+"""
+
+import os
+import pickle
+import threading
+import weakref
+from typing import Dict, List, Optional, Tuple
+from utils import metrics
+from utils.result_cache import make_key
+
+_PREFIXES: List[str] = []
+_prefix_lock = threading.Lock()
+
+lookups_total = metrics.Counter("prefix_cache", "Prompt-prefix KV state use", ("result",))
+
+
+def prompt_prefix(text: str) -> str:
+    """Register a template's constant head; returns it so modules can keep the constant."""
+    with _prefix_lock:
+        if text and text not in _PREFIXES:
+            _PREFIXES.append(text)
+    return text
+
+
+def _env_enabled() -> bool:
+    return os.environ.get("LLM_PREFIX_CACHE", "1").strip().lower() not in ("0", "false", "no", "off")
+
+
+class PrefixCache:
+    def __init__(self, cache_dir: Optional[str] = None, enabled: Optional[bool] = None):
+        self.cache_dir = cache_dir if cache_dir is not None else os.environ.get(
+            "LLM_PREFIX_CACHE_DIR", "models/cache/prefix_kv")
+        self.enabled = _env_enabled() if enabled is None else enabled
+        self._states: Dict[str, object] = {}
+        self._tokens: Dict[str, List[int]] = {}
+        self._keys: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()  # llm -> {prefix: key}
+        self._lock = threading.Lock()
+
+    # ---- keys ----
+    @staticmethod
+    def _model_id(llm) -> Tuple:
+        path = getattr(llm, "model_path", "") or ""
+        try:
+            st = os.stat(path)
+            file_id = (os.path.abspath(path), st.st_size, int(st.st_mtime))
+        except OSError:
+            file_id = (path, None, None)
+        try:
+            n_ctx = llm.n_ctx()
+        except Exception:
+            n_ctx = None
+        try:
+            import llama_cpp
+            version = getattr(llama_cpp, "__version__", None)
+        except Exception:
+            version = None
+        # a speculative context keeps all logits, so its states differ
+        draft = getattr(llm, "draft_model", None) is not None
+        return file_id + (n_ctx, version, draft)
+
+    def _key(self, llm, prefix: str) -> str:
+        try:
+            keys = self._keys.get(llm)
+            if keys is None:
+                keys = self._keys[llm] = {"_model": self._model_id(llm)}
+        except TypeError:  # not weak-referenceable
+            keys = {"_model": self._model_id(llm)}
+        key = keys.get(prefix)
+        if key is None:
+            key = keys[prefix] = make_key(keys["_model"], prefix)
+        return key
+
+    def _prefix_tokens(self, llm, key: str, prefix: str) -> List[int]:
+        toks = self._tokens.get(key)
+        if toks is None:
+            # same call create_completion makes for the whole prompt
+            toks = self._tokens[key] = list(llm.tokenize(prefix.encode("utf-8"), special=True))
+        return toks
+
+    @staticmethod
+    def _supported(llm) -> bool:
+        return all(hasattr(llm, a) for a in ("save_state", "load_state", "eval", "reset", "tokenize"))
+
+    # ---- persistence ----
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:32] + ".state")
+
+    def _load_disk(self, key: str):
+        try:
+            with open(self._path(key), "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _save_disk(self, key: str, state):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = self._path(key) + ".tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+        except Exception:
+            pass
+
+    # ---- states ----
+    def _state(self, llm, key: str, prefix: str):
+        """The prefix's state: memory, then disk, else evaluate it now (caller owns llm)."""
+        state = self._states.get(key)
+        if state is not None:
+            return state
+        state = self._load_disk(key)
+        if state is not None:
+            lookups_total.inc(result="disk")
+        else:
+            tokens = self._prefix_tokens(llm, key, prefix)
+            llm.reset()
+            llm.eval(tokens)
+            state = llm.save_state()
+            lookups_total.inc(result="build")
+            self._save_disk(key, state)
+        with self._lock:
+            self._states[key] = state
+        return state
+
+    def warm(self, llm) -> int:
+        """Build or load the state of every registered prefix. Returns how many are cached."""
+        if not self.enabled or not self._supported(llm):
+            return 0
+        with _prefix_lock:
+            prefixes = list(_PREFIXES)
+        n = 0
+        for prefix in prefixes:
+            try:
+                self._state(llm, self._key(llm, prefix), prefix)
+                n += 1
+            except Exception:
+                continue
+        return n
+
+    def prepare(self, llm, prompt: str):
+        """Put the KV state of `prompt`'s static prefix into `llm` (caller owns llm)."""
+        if not self.enabled or not self._supported(llm):
+            return
+        prefix = self._match(prompt)
+        if prefix is None:
+            return
+        try:
+            key = self._key(llm, prefix)
+            tokens = self._prefix_tokens(llm, key, prefix)
+            n = len(tokens)
+            if llm.n_tokens >= n and list(llm.input_ids[:n]) == tokens:
+                lookups_total.inc(result="resident")
+                return
+            llm.load_state(self._state(llm, key, prefix))
+            lookups_total.inc(result="restore")
+        except Exception:
+            lookups_total.inc(result="error")
+
+    @staticmethod
+    def _match(prompt: str) -> Optional[str]:
+        best = None
+        with _prefix_lock:
+            for p in _PREFIXES:
+                if prompt.startswith(p) and (best is None or len(p) > len(best)):
+                    best = p
+        return best
+
+
+prefix_cache = PrefixCache()
@@ -0,0 +1,93 @@
+# utils/profile_diff.py
+"""
+Incremental profile analysis.
+- every section (headline, about, experience, ...) is hashed on its own;
+  per-section results are cached under (section, hash), so after an edit
+  only the edited section is recomputed
+- with a profile_id, the last analysed version (section hashes + scores)
+  is remembered; the next analysis of that id returns a diff: which
+  sections changed and each score's before / after / delta
+- history lives in a ResultCache, so it is shared across worker
+  processes when RESULT_CACHE_DB is set
+
+Env: PROFILE_HISTORY_TTL, PROFILE_HISTORY_SIZE
+"""
+
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+from utils.result_cache import ResultCache, get_cache, make_key
+
+_MISSING = object()
+
+
+def section_hashes(sections: Dict[str, Any]) -> Dict[str, str]:
+    """Short content hash per section (values must be JSON-able)."""
+    return {name: make_key(value)[:16] for name, value in sections.items()}
+
+
+class SectionCache:
+    """Per-section results keyed by section name + content hash."""
+
+    def __init__(self, name: str):
+        self._cache = get_cache(name)
+
+    def get(self, section: str, digest: str) -> Any:
+        return self._cache.get(f"{section}:{digest}", _MISSING)
+
+    def set(self, section: str, digest: str, value: Any):
+        self._cache.set(f"{section}:{digest}", value)
+
+    def get_or_compute(self, section: str, digest: str, fn: Callable, *args) -> Any:
+        value = self.get(section, digest)
+        if value is _MISSING:
+            value = fn(*args)
+            self.set(section, digest, value)
+        return value
+
+    async def aget_or_compute(self, section: str, digest: str, fn: Callable[..., Awaitable], *args) -> Any:
+        value = self.get(section, digest)
+        if value is _MISSING:
+            value = await fn(*args)
+            self.set(section, digest, value)
+        return value
+
+
+def score_diff(before: Optional[Dict[str, Any]], sections: Dict[str, str],
+               scores: Dict[str, float]) -> Dict[str, Any]:
+    """Diff of a profile version against the previous one (None: first analysis)."""
+    if before is None:
+        return {
+            "baseline": True,
+            "changed_sections": list(sections),
+            "scores": {k: {"before": None, "after": v, "delta": None} for k, v in scores.items()},
+        }
+    old_sections, old_scores = before.get("sections", {}), before.get("scores", {})
+    out = {}
+    for k, v in scores.items():
+        b = old_scores.get(k)
+        out[k] = {"before": b, "after": v, "delta": round(v - b, 2) if b is not None else None}
+    return {
+        "baseline": False,
+        "changed_sections": [s for s, h in sections.items() if old_sections.get(s) != h],
+        "scores": out,
+    }
+
+
+class ProfileHistory:
+    """Last analysed version per profile_id."""
+
+    def __init__(self, name: str = "profile_history"):
+        self._cache = ResultCache(
+            name,
+            max_entries=int(os.environ.get("PROFILE_HISTORY_SIZE", "10000")),
+            ttl=float(os.environ.get("PROFILE_HISTORY_TTL", "86400")),
+        )
+
+    def record(self, profile_id: str, sections: Dict[str, str], scores: Dict[str, float]) -> Dict[str, Any]:
+        """Store this version and return its diff against the previous one."""
+        before = self._cache.get(profile_id)
+        self._cache.set(profile_id, {"sections": sections, "scores": scores})
+        return score_diff(before, sections, scores)
+
+
+history = ProfileHistory()
@@ -0,0 +1,128 @@
+# utils/prompt_budget.py
+"""
+Token budgeting for LLM prompts.
+- counts tokens with the loaded model's tokenizer (a conservative
+  bytes/3 estimate when no model is available)
+- the budget is n_ctx minus max_tokens (room for the answer) minus a
+  small reserve, optionally capped lower by LLM_PROMPT_BUDGET
+- fit() shrinks the variable fields (post text, about, experience) so
+  template + fields stay within budget; short fields are kept whole and
+  long ones share what is left, cut at a sentence / word boundary
+- compact_json() serializes metrics without indentation
+
+Env: LLM_PROMPT_BUDGET, LLM_PROMPT_RESERVE
+"""
+
+import json
+import os
+from typing import Any, Callable, Dict, List, Optional
+from utils import metrics
+
+TRUNCATION_MARK = " …"
+
+truncated_total = metrics.Counter("prompt_truncated", "Prompt fields cut to fit the token budget", ("field",))
+
+
+def compact_json(obj: Any) -> str:
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
+def _estimate(text: str) -> int:
+    # English BPE averages ~4 bytes/token; 3 keeps the estimate on the safe side
+    return len(text.encode("utf-8")) // 3 + 1
+
+
+class PromptBudget:
+    def __init__(self, n_ctx: int, max_tokens: int, tokenize: Optional[Callable[[str], List[int]]] = None,
+                 reserve: Optional[int] = None):
+        reserve = reserve if reserve is not None else int(os.environ.get("LLM_PROMPT_RESERVE", "16"))
+        limit = n_ctx - max_tokens - reserve
+        cap = os.environ.get("LLM_PROMPT_BUDGET")
+        if cap:
+            limit = min(limit, int(cap))
+        self.limit = max(0, limit)
+        self._tokenize = tokenize
+
+    @classmethod
+    def for_llm(cls, llm, max_tokens: int, n_ctx: Optional[int] = None) -> "PromptBudget":
+        """Budget using a llama_cpp.Llama's tokenizer and context size."""
+        if n_ctx is None:
+            try:
+                n_ctx = llm.n_ctx()
+            except Exception:
+                n_ctx = int(os.environ.get("LLM_N_CTX", "2048"))
+        tokenize = None
+        if hasattr(llm, "tokenize"):
+            tokenize = lambda s: llm.tokenize(s.encode("utf-8"), add_bos=False, special=True)
+        return cls(n_ctx, max_tokens, tokenize)
+
+    @classmethod
+    def estimated(cls, max_tokens: int, n_ctx: Optional[int] = None) -> "PromptBudget":
+        """Budget without a tokenizer (model not loaded)."""
+        n_ctx = n_ctx if n_ctx is not None else int(os.environ.get("LLM_N_CTX", "2048"))
+        return cls(n_ctx, max_tokens)
+
+    def count(self, text: str) -> int:
+        if not text:
+            return 0
+        if self._tokenize is not None:
+            try:
+                return len(self._tokenize(text))
+            except Exception:
+                pass
+        return _estimate(text)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """`text` cut (at a boundary, with a mark) to at most max_tokens tokens."""
+        n = self.count(text)
+        if n <= max_tokens:
+            return text
+        if max_tokens <= 1:
+            return ""
+        cut = int(len(text) * (max_tokens - 1) / n)
+        while cut > 0:
+            out = _at_boundary(text[:cut]) + TRUNCATION_MARK
+            if self.count(out) <= max_tokens:
+                return out
+            cut = int(cut * 0.9)
+        return ""
+
+    def fit(self, template: str, fields: Dict[str, str]) -> Dict[str, str]:
+        """Shrink `fields` so they fit next to `template` (all the fixed prompt text)."""
+        available = self.limit - self.count(template)
+        sizes = {k: self.count(v or "") for k, v in fields.items()}
+        if sum(sizes.values()) <= available:
+            return dict(fields)
+        # water-filling: fields under the fair share keep everything
+        alloc: Dict[str, int] = {}
+        remaining = max(0, available)
+        pending = sorted(sizes, key=sizes.get)
+        while pending:
+            share = remaining // len(pending)
+            k = pending[0]
+            if sizes[k] <= share:
+                alloc[k] = sizes[k]
+                remaining -= sizes[k]
+                pending.pop(0)
+            else:
+                for k in pending:
+                    alloc[k] = share
+                break
+        out = {}
+        for k, v in fields.items():
+            if sizes[k] > alloc[k]:
+                out[k] = self.truncate(v or "", alloc[k])
+                truncated_total.inc(field=k)
+            else:
+                out[k] = v
+        return out
+
+
+def _at_boundary(head: str) -> str:
+    # prefer a sentence / line end in the last fifth, else the last space
+    floor = int(len(head) * 0.8)
+    best = max(head.rfind(". ", floor), head.rfind("\n", floor), head.rfind("! ", floor), head.rfind("? ", floor))
+    if best > 0:
+        return head[:best + 1].rstrip()
+    space = head.rfind(" ")
+    return head[:space].rstrip() if space > 0 else head
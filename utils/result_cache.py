@@ -0,0 +1,198 @@
+# utils/result_cache.py
+"""
+Content-addressed cache for analysis results and LLM completions.
+- keys are hashes of everything that determines the output
+  (normalized text, prompt template, model path, sampling params)
+- tier 1: in-memory LRU; tier 2 (optional): a SQLite file shared by all
+  caches and processes (RESULT_CACHE_DB)
+- entries expire after a TTL; both tiers are size bounded
+- values must be JSON-serializable; every hit returns a fresh copy
+
+Env: RESULT_CACHE_SIZE, RESULT_CACHE_TTL, RESULT_CACHE_DB, RESULT_CACHE_DB_ROWS
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from utils import metrics
+
+_CACHES: Dict[str, "ResultCache"] = {}
+_MISSING = object()
+
+lookups_total = metrics.Counter("cache_lookups", "Result cache lookups by outcome", ("cache", "result"))
+
+
+def make_key(*parts: Any) -> str:
+    """Stable hash of arbitrary JSON-able parts."""
+    raw = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _SqliteTier:
+    def __init__(self, path: str, max_rows: int):
+        self.max_rows = max_rows
+        self._lock = threading.Lock()
+        self._writes = 0
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache ("
+            " ns TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL,"
+            " expires REAL NOT NULL, PRIMARY KEY (ns, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS cache_expires ON cache (expires)")
+        self._conn.commit()
+
+    def get(self, ns: str, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires FROM cache WHERE ns = ? AND key = ?", (ns, key)
+            ).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return row[0], row[1]
+
+    def set(self, ns: str, key: str, value: str, expires: float):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (ns, key, value, expires) VALUES (?, ?, ?, ?)",
+                (ns, key, value, expires),
+            )
+            self._writes += 1
+            if self._writes % 256 == 0:
+                self._prune()
+            self._conn.commit()
+
+    def _prune(self):
+        self._conn.execute("DELETE FROM cache WHERE expires <= ?", (time.time(),))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()
+        if count > self.max_rows:
+            self._conn.execute(
+                "DELETE FROM cache WHERE rowid IN "
+                "(SELECT rowid FROM cache ORDER BY expires LIMIT ?)",
+                (count - self.max_rows,),
+            )
+
+    def clear(self, ns: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM cache WHERE ns = ?", (ns,))
+            self._conn.commit()
+
+
+_disk_tiers: Dict[str, _SqliteTier] = {}
+_disk_lock = threading.Lock()
+
+
+def _disk_tier(path: str) -> Optional[_SqliteTier]:
+    with _disk_lock:
+        tier = _disk_tiers.get(path)
+        if tier is None:
+            try:
+                tier = _SqliteTier(path, int(os.environ.get("RESULT_CACHE_DB_ROWS", "100000")))
+            except Exception:
+                return None
+            _disk_tiers[path] = tier
+        return tier
+
+
+class ResultCache:
+    def __init__(self, name: str, max_entries: Optional[int] = None, ttl: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries if max_entries is not None else int(os.environ.get("RESULT_CACHE_SIZE", "1024"))
+        self.ttl = ttl if ttl is not None else float(os.environ.get("RESULT_CACHE_TTL", "3600"))
+        db_path = db_path if db_path is not None else os.environ.get("RESULT_CACHE_DB", "")
+        self._disk = _disk_tier(db_path) if db_path else None
+        self._mem: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        _CACHES[name] = self
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        if not self.enabled:
+            return default
+        now = time.time()
+        with self._lock:
+            item = self._mem.get(key)
+            if item is not None:
+                if item[1] > now:
+                    self._mem.move_to_end(key)
+                    self.hits += 1
+                    lookups_total.inc(cache=self.name, result="hit")
+                    return json.loads(item[0])
+                del self._mem[key]
+        if self._disk is not None:
+            try:
+                item = self._disk.get(self.name, key)
+            except Exception:
+                item = None
+            if item is not None:
+                with self._lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self._put_mem(key, item[0], item[1])
+                lookups_total.inc(cache=self.name, result="disk_hit")
+                return json.loads(item[0])
+        with self._lock:
+            self.misses += 1
+        lookups_total.inc(cache=self.name, result="miss")
+        return default
+
+    def set(self, key: str, value: Any):
+        if not self.enabled:
+            return
+        raw = json.dumps(value)
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._put_mem(key, raw, expires)
+        if self._disk is not None:
+            try:
+                self._disk.set(self.name, key, raw, expires)
+            except Exception:
+                pass
+
+    def _put_mem(self, key: str, raw: str, expires: float):
+        self._mem[key] = (raw, expires)
+        self._mem.move_to_end(key)
+        while len(self._mem) > self.max_entries:
+            self._mem.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._mem.clear()
+            self.hits = self.disk_hits = self.misses = 0
+        if self._disk is not None:
+            self._disk.clear(self.name)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._mem),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+def get_cache(name: str) -> ResultCache:
+    """The named cache, created with env defaults on first use."""
+    return _CACHES.get(name) or ResultCache(name)
+
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: c.stats() for name, c in _CACHES.items()}
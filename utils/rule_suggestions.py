@@ -0,0 +1,46 @@
+# utils/rule_suggestions.py
+"""
+Rule-based suggestions: the deterministic fast tier.
+- text_suggestions(f, n): post fixes (hook, CTA, hashtags)
+- image_suggestions(f, n): "Kind: concept" image ideas by content type
+Used when no LLM is requested or available, and returned right away
+while LLM enrichment runs as a background job (utils/jobs.py).
+"""
+
+from typing import List
+from utils.text_features import TextFeatures, lexicon_terms
+
+FALLBACK_CTAS = lexicon_terms(["dm", "comment", "share", "like", "connect"])
+STORY_WORDS = lexicon_terms(["story", "learned", "lesson"])
+DATA_WORDS = lexicon_terms(["data","chart","metrics","growth","increase"])
+TEAM_WORDS = lexicon_terms(["team","we","collaborat","hiring"])
+
+
+def text_suggestions(f: TextFeatures, n: int = 3) -> List[str]:
+    suggestions = []
+    if f.word_count > 200:
+        suggestions.append("Shorten the intro — keep the hook within 1–2 short sentences.")
+    else:
+        suggestions.append("Make the first sentence a clear hook that promises value or a lesson.")
+    if not f.has_any(FALLBACK_CTAS):
+        suggestions.append("Add a clear CTA (e.g., 'Comment your thoughts' or 'DM me to learn more').")
+    if len(f.hashtags) < 2:
+        suggestions.append("Add 3–5 relevant hashtags to increase discoverability.")
+    # ensure n suggestions
+    while len(suggestions) < n:
+        suggestions.append("Consider adding a short real-world example or metric to show impact.")
+    return suggestions[:n]
+
+
+def image_suggestions(f: TextFeatures, n: int = 3) -> List[str]:
+    suggestions = []
+    if f.has_any(STORY_WORDS):
+        suggestions.append("Photo: candid photo of person telling a story")
+    if f.has_any(DATA_WORDS):
+        suggestions.append("Graphic: clean bar/line chart with key metric highlighted")
+    if f.has_any(TEAM_WORDS):
+        suggestions.append("Photo: group/team working or handshake image")
+    # fill with general suggestions
+    while len(suggestions) < n:
+        suggestions.append("Stylized text card with a bold headline and brand color")
+    return suggestions[:n]
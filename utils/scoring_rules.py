@@ -0,0 +1,247 @@
+# utils/scoring_rules.py
+"""
+Declarative scoring rules, compiled once and hot-reloaded.
+- the source is a JSON file (SCORING_RULES_PATH, default
+  app/scoring_rules.json): component weights, keyword lexicons, rule
+  points and regex patterns for the post and profile scorers
+- compiling registers the lexicons with the shared matcher
+  (utils/text_features.py), compiles the patterns and turns weights and
+  points into vectors in a fixed column order
+- posts are scored as a batch: one row per post of rule hits / lexicon
+  counts, multiplied by the point / polarity vectors, then the
+  (posts x components) matrix by the weight vector; with numpy from
+  VECTOR_MIN_ROWS rows (below that, plain Python is faster)
+- get_rules() stats the file at most every SCORING_RULES_CHECK_S seconds
+  (0 = every call) and recompiles when it changed, in every process; a
+  file that fails to compile is reported in .error and the last good
+  rules stay in use
+- ScoringRules.digest hashes the source, so result caches keyed by it
+  never serve scores made under other rules
+
+Env: SCORING_RULES_PATH, SCORING_RULES_CHECK_S
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+from utils.text_features import TextFeatures, lexicon_terms
+
+try:
+    import numpy as np
+except Exception:
+    np = None
+
+DEFAULT_PATH = os.environ.get(
+    "SCORING_RULES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app", "scoring_rules.json"),
+)
+CHECK_SECONDS = float(os.environ.get("SCORING_RULES_CHECK_S", "2"))
+
+# column order of the post score matrix
+POST_COMPONENTS = ("readability", "structure", "hashtags", "sentiment", "novelty")
+STRUCTURE_RULES = ("hook", "paragraphs", "cta", "story", "variety")
+PROFILE_SECTIONS = ("headline", "about", "experience", "skills")
+PROFILE_PATTERNS = ("power_words", "metric", "first_person", "bullet_split", "action_verbs")
+# numpy's per-call overhead outweighs the loop below this many rows
+VECTOR_MIN_ROWS = 16
+
+
+def _vector(spec: Dict[str, float], names: Sequence[str], what: str) -> List[float]:
+    """Values of `spec` in `names` order (absent names weigh 0)."""
+    unknown = set(spec) - set(names)
+    if unknown:
+        raise ValueError(f"{what}: unknown keys {sorted(unknown)}")
+    return [float(spec.get(n, 0.0)) for n in names]
+
+
+def _vectorized(rows: int) -> bool:
+    return np is not None and rows >= VECTOR_MIN_ROWS
+
+
+def _matvec(rows, vec: List[float]):
+    if _vectorized(len(rows)):
+        return np.asarray(rows, dtype=np.float64).reshape(len(rows), len(vec)) @ np.asarray(vec)
+    return [float(sum(a * b for a, b in zip(r, vec))) for r in rows]
+
+
+def _clip(xs, lo: float, hi: float) -> List[float]:
+    if _vectorized(len(xs)):
+        return np.clip(xs, lo, hi).tolist()
+    return [max(lo, min(hi, x)) for x in xs]
+
+
+class PostRules:
+    """Compiled post rules; every scorer takes a batch of TextFeatures."""
+
+    def __init__(self, spec: Dict):
+        lex = spec["lexicons"]
+        self.cta = lexicon_terms(lex["cta"])
+        self.story = lexicon_terms(lex["story"])
+        self.positive = lexicon_terms(lex["positive"])
+        self.negative = lexicon_terms(lex["negative"])
+        self._polar_terms = self.positive + self.negative
+        self._polarity = [1.0] * len(self.positive) + [-1.0] * len(self.negative)
+        self._polar_any = [1.0] * len(self._polar_terms)
+
+        structure = spec["structure"]
+        self.hook_words = tuple(structure["hook_words"])
+        self.paragraph_sentences = int(structure["paragraph_sentences"])
+        self._points = _vector(structure["points"], STRUCTURE_RULES, "post.structure.points")
+
+        bands = sorted((int(lo), float(score)) for lo, score in spec["hashtags"]["bands"])
+        if not bands or bands[0][0] != 0:
+            raise ValueError("post.hashtags.bands: the first band must start at 0")
+        self._band_lo = [lo for lo, _ in bands]
+        self._band_score = [score for _, score in bands]
+
+        self.neutral = float(spec["sentiment"]["neutral"])
+        self.per_word = float(spec["sentiment"]["per_word"])
+        self.weights = _vector(spec["weights"], POST_COMPONENTS, "post.weights")
+
+    def _structure_hits(self, f: TextFeatures) -> tuple:
+        if not f.text:
+            return (0,) * len(STRUCTURE_RULES)
+        sents = f.sentences
+        hook = len(sents[0].split()) if sents else 0
+        return (
+            self.hook_words[0] <= hook <= self.hook_words[1],
+            "\n" in f.text or len(sents) >= self.paragraph_sentences,
+            f.has_any(self.cta),
+            f.has_any(self.story),
+            len(sents) > 1,
+        )
+
+    def structure(self, feats: List[TextFeatures]) -> List[float]:
+        """Hook, paragraphing, CTA, storytelling, sentence variety: 0-100."""
+        return _clip(_matvec([self._structure_hits(f) for f in feats], self._points), 0.0, 100.0)
+
+    def hashtags(self, feats: List[TextFeatures]) -> List[float]:
+        """Score of the band the hashtag count falls in."""
+        counts = [len(f.hashtags) for f in feats]
+        if _vectorized(len(counts)):
+            ix = np.searchsorted(self._band_lo, counts, side="right") - 1
+            return np.asarray(self._band_score)[ix].tolist()
+        return [self._band_score[bisect_right(self._band_lo, c) - 1] for c in counts]
+
+    def sentiment(self, feats: List[TextFeatures]) -> List[float]:
+        """neutral + per_word * (positive - negative hits), 0-100; neutral without hits."""
+        counts = [[f.count(t) for t in self._polar_terms] for f in feats]
+        net = _matvec(counts, self._polarity)
+        hits = _matvec(counts, self._polar_any)
+        if _vectorized(len(counts)):
+            scores = np.clip(self.neutral + net * self.per_word, 0.0, 100.0)
+            return np.where(hits == 0, self.neutral, scores).tolist()
+        return [self.neutral if h == 0 else max(0.0, min(100.0, self.neutral + n * self.per_word))
+                for n, h in zip(net, hits)]
+
+    def matrix(self, feats: List[TextFeatures], readability: List[float], novelty: List[float]):
+        """(posts x POST_COMPONENTS) component scores."""
+        cols = [readability, self.structure(feats), self.hashtags(feats), self.sentiment(feats), novelty]
+        if _vectorized(len(feats)):
+            return np.array(cols, dtype=np.float64).T
+        return [list(row) for row in zip(*cols)]
+
+    def final(self, matrix) -> List[float]:
+        """Weighted 0-100 final score per row of a matrix()."""
+        return _clip(_matvec(matrix, self.weights), 0.0, 100.0)
+
+    def final_score(self, components: Dict[str, float]) -> float:
+        """Weighted 0-100 final score of one {component: score} dict."""
+        return self.final([[components.get(k, 0.0) for k in POST_COMPONENTS]])[0]
+
+
+class ProfileRules:
+    """Compiled profile rules: availability lexicon, patterns, section weights."""
+
+    def __init__(self, spec: Dict):
+        self.availability = lexicon_terms(spec["lexicons"]["availability"])
+        patterns = spec["patterns"]
+        missing = [p for p in PROFILE_PATTERNS if p not in patterns]
+        if missing:
+            raise ValueError(f"profile.patterns: missing {missing}")
+        self.patterns = {name: re.compile(p) for name, p in patterns.items()}
+        self.weights = dict(zip(PROFILE_SECTIONS, _vector(spec["weights"], PROFILE_SECTIONS, "profile.weights")))
+
+    def combine(self, scores: Dict[str, float]) -> float:
+        """Weighted profile score from per-section scores."""
+        total = 0.0
+        for name, weight in self.weights.items():
+            total += scores.get(name, 0.0) * weight
+        return total
+
+
+class ScoringRules:
+    """One compiled rules file."""
+
+    def __init__(self, source: Dict, digest: str = ""):
+        self.version = source.get("version")
+        self.digest = digest
+        self.post = PostRules(source["post"])
+        self.profile = ProfileRules(source["profile"])
+
+
+def load_rules(path: str) -> ScoringRules:
+    """Compile the rules file at `path` (ValueError if it is malformed)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    try:
+        return ScoringRules(json.loads(data), hashlib.sha256(data).hexdigest()[:16])
+    except (KeyError, TypeError, ValueError, re.error) as e:
+        raise ValueError(f"scoring rules {path}: {type(e).__name__}: {e}") from e
+
+
+class RuleSource:
+    """The compiled rules of one file, recompiled when the file changes."""
+
+    def __init__(self, path: str, check_seconds: float = CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self.error: Optional[str] = None
+        self._rules: Optional[ScoringRules] = None
+        self._stamp = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> ScoringRules:
+        if self._rules is None or time.monotonic() >= self._next_check:
+            self.reload()
+        return self._rules
+
+    def reload(self, force: bool = False) -> ScoringRules:
+        """Recompile if the file changed (or `force`); raises only if no rules were ever loaded."""
+        with self._lock:
+            self._next_check = time.monotonic() + self.check_seconds
+            try:
+                st = os.stat(self.path)
+                stamp = (st.st_mtime_ns, st.st_size)
+                if force or stamp != self._stamp or self._rules is None:
+                    rules = load_rules(self.path)
+                    if self._rules is None or rules.digest != self._rules.digest:
+                        self._rules = rules
+                    self._stamp = stamp
+                    self.error = None
+            except (OSError, ValueError) as e:
+                if self._rules is None:
+                    raise
+                self.error = str(e)
+            return self._rules
+
+
+_source = RuleSource(DEFAULT_PATH)
+
+
+def get_rules() -> ScoringRules:
+    """The current rules of SCORING_RULES_PATH."""
+    return _source.get()
+
+
+def rules_status() -> Dict:
+    """Version / digest of the rules in use, and the error of a rejected edit."""
+    rules = _source.get()
+    return {"path": _source.path, "version": rules.version, "digest": rules.digest, "error": _source.error}
@@ -0,0 +1,109 @@
+# utils/segmenter.py
+"""
+Rule-based sentence segmenter for LinkedIn-style text.
+- returns (start, end) offsets into the input, not copied strings
+- line breaks always end a sentence (one-line paragraphs, bullet lists)
+- leading list markers (•, -, *, ✅, 👉, 🚀, "1.", "2)" ...) are not part
+  of the sentence; list glyphs standing alone mid-line ("a • b") split too
+- . ! ? … end a sentence when followed by whitespace or the end of the
+  text; a period does not when the next word starts lowercase, or the
+  word before it is a known abbreviation ("Dr.", "e.g.", "Jan.") or an
+  initial ("J. Smith")
+- URLs, emails, decimals and hashtags never break: their inner
+  punctuation is not followed by whitespace
+- lines without any word character ("---", "🚀🚀") are dropped
+Pure Python and data-free, so results are the same everywhere; see
+benchmarks/bench_segmenter.py for accuracy / speed against nltk punkt.
+"""
+
+import re
+from typing import List, Tuple
+
+ABBREVIATIONS = frozenset("""
+mr mrs ms dr prof sr jr st mt vs etc approx dept est fig inc ltd co corp llc
+no nos vol pp ed eds rev gen col lt sgt capt gov sen rep
+jan feb mar apr jun jul aug sep sept oct nov dec
+mon tue wed thu fri sat sun
+""".split())
+
+# list glyphs; these also split when standing alone mid-line ("a • b")
+_BULLETS = "•▪◦‣⁃►▶▸✓✔✅☑👉🔹🔸"
+# decorative emoji (and arrows) only count as markers at the start of a line
+_LINE_MARKERS = _BULLETS + "·→➡➜🔺📌⭐💡🎯🚀🔥"
+
+# list marker at the start of a line (U+FE0F: emoji presentation selector)
+_MARKER_RE = re.compile(r"[ \t]*(?:[-*–—" + _LINE_MARKERS + r"]\ufe0f?|\d{1,2}[.)])[ \t]+")
+# sentence-final punctuation (+ closing quotes / brackets) before whitespace / end,
+# or a bullet glyph standing alone between words
+_CAND_RE = re.compile(
+    r"(?P<end>(?:\.\.+|[.!?…])[.!?…]*[\"'”’)\]]*)(?=\s|$)"
+    r"|(?<=\s)(?P<bullet>[" + _BULLETS + r"]\ufe0f?)(?=\s)"
+)
+_LINE_RE = re.compile(r"[^\n]+")
+_WORD_RE = re.compile(r"\w")
+_SPACE = " \t\r\f\v "
+
+
+def _abbreviation(token: str) -> bool:
+    token = token.lstrip("([\"'“‘").lower()
+    if not token:
+        return False
+    if token in ABBREVIATIONS:
+        return True
+    # initials ("J.") and dotted short forms ("e.g", "u.s", "ph.d")
+    if len(token) == 1:
+        return token.isalpha()
+    parts = token.split(".")
+    return len(parts) > 1 and all(0 < len(p) <= 2 and p.isalpha() for p in parts)
+
+
+def _is_boundary(text: str, start: int, m: "re.Match", line_end: int) -> bool:
+    punct = m.group("end")
+    if "!" in punct or "?" in punct:
+        return True
+    nxt = m.end()
+    while nxt < line_end and text[nxt] in _SPACE:
+        nxt += 1
+    if nxt >= line_end:
+        return True
+    if text[nxt].islower():
+        return False
+    if punct[0] == "." and len(punct.rstrip("\"'”’)]")) == 1:
+        ws = max(text.rfind(" ", start, m.start()), text.rfind("\t", start, m.start()))
+        return not _abbreviation(text[ws + 1:m.start()])
+    return True
+
+
+def _emit(out: List[Tuple[int, int]], text: str, start: int, end: int):
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    if start < end and _WORD_RE.search(text, start, end):
+        out.append((start, end))
+
+
+def sentence_spans(text: str) -> List[Tuple[int, int]]:
+    """(start, end) offsets of the sentences in `text`, in order."""
+    out: List[Tuple[int, int]] = []
+    if not text:
+        return out
+    for line in _LINE_RE.finditer(text):
+        start, line_end = line.start(), line.end()
+        marker = _MARKER_RE.match(text, start, line_end)
+        if marker:
+            start = marker.end()
+        for m in _CAND_RE.finditer(text, start, line_end):
+            if m.group("bullet"):
+                _emit(out, text, start, m.start())
+                start = m.end()
+            elif _is_boundary(text, start, m, line_end):
+                _emit(out, text, start, m.end())
+                start = m.end()
+        _emit(out, text, start, line_end)
+    return out
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentence strings (copies); prefer sentence_spans() on hot paths."""
+    return [text[a:b] for a, b in sentence_spans(text)]
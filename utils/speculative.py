@@ -0,0 +1,125 @@
+# utils/speculative.py
+"""
+Speculative decoding for llama.cpp models.
+- a drafter proposes the next few tokens; the main model checks them in
+  one batched eval and keeps the agreeing run plus its own next token,
+  so every accepted draft token saves a full forward pass
+- LLM_DRAFT selects the drafter (unset / 0 = off):
+    prompt_lookup   n-gram lookup in the context, no extra model; suits
+                    rewrites, which copy phrases from the user's text
+    <file.gguf>     a small model sharing the main model's vocabulary,
+                    decoded greedily with its own KV cache
+- the output distribution is unchanged: drafts only skip work the main
+  model would otherwise do one token at a time
+- proposed / accepted draft tokens are counted (llm_draft_tokens), so
+  the acceptance rate shows up on /metrics
+
+Env: LLM_DRAFT, LLM_DRAFT_TOKENS, LLM_DRAFT_NGRAM, LLM_DRAFT_N_CTX, LLM_DRAFT_N_THREADS
+"""
+
+import os
+from typing import Any, Dict, List, Optional
+from utils import metrics
+
+PROMPT_LOOKUP = "prompt_lookup"
+
+draft_tokens_total = metrics.Counter("llm_draft_tokens", "Speculative draft tokens", ("result",))
+
+
+def draft_spec() -> Optional[str]:
+    """LLM_DRAFT normalized: "prompt_lookup", a draft model path, or None (off)."""
+    spec = os.environ.get("LLM_DRAFT", "").strip()
+    if spec.lower() in ("", "0", "off", "none", "false", "no"):
+        return None
+    if spec.lower() in (PROMPT_LOOKUP, "lookup", "ngram"):
+        return PROMPT_LOOKUP
+    return spec
+
+
+class DraftModel:
+    """A small GGUF as drafter: greedy continuation of the current context."""
+
+    def __init__(self, llm, num_pred_tokens: int):
+        self.llm = llm
+        self.num_pred_tokens = num_pred_tokens
+
+    def __call__(self, input_ids, **kwargs):
+        import numpy as np
+        tokens = [int(t) for t in input_ids]
+        out: List[int] = []
+        if len(tokens) + self.num_pred_tokens < self.llm.n_ctx():
+            # generate() reuses the longest common prefix of the draft's own KV cache
+            gen = self.llm.generate(tokens, top_k=1, temp=0.0, reset=True)
+            try:
+                for tok in gen:
+                    out.append(tok)
+                    if len(out) >= self.num_pred_tokens or tok == self.llm.token_eos():
+                        break
+            finally:
+                gen.close()
+        return np.array(out, dtype=np.intc)
+
+
+class CountingDraft:
+    """Wraps a drafter and counts how many of its proposals the main model kept
+    (`proposed` / `accepted` totals, and the llm_draft_tokens counter).
+
+    llama.cpp passes the verified context to the next call: the accepted
+    draft tokens followed by the main model's own token, so the accepted
+    count is the common prefix of that continuation and the last proposal.
+    A context that does not extend the previous one is a new completion;
+    nothing is counted for the previous proposal.
+    """
+
+    def __init__(self, draft):
+        self.draft = draft
+        self.proposed = 0
+        self.accepted = 0
+        self._context: List[int] = []
+        self._last: List[int] = []
+
+    def __call__(self, input_ids, **kwargs):
+        ids = input_ids.tolist() if hasattr(input_ids, "tolist") else [int(t) for t in input_ids]
+        n = len(self._context)
+        if self._last and len(ids) > n and ids[:n] == self._context:
+            accepted = 0
+            for got, proposed in zip(ids[n:], self._last):
+                if got != proposed:
+                    break
+                accepted += 1
+            self.accepted += accepted
+            draft_tokens_total.inc(accepted, result="accepted")
+        out = self.draft(input_ids, **kwargs)
+        self._context = ids
+        self._last = [int(t) for t in out]
+        self.proposed += len(self._last)
+        draft_tokens_total.inc(len(self._last), result="proposed")
+        return out
+
+
+def make_draft(spec: str, llama_cpp):
+    """The draft_model object for Llama(draft_model=...) described by `spec`."""
+    if spec == PROMPT_LOOKUP:
+        from llama_cpp.llama_speculative import LlamaPromptLookupDecoding
+        draft = LlamaPromptLookupDecoding(
+            max_ngram_size=int(os.environ.get("LLM_DRAFT_NGRAM", "2")),
+            num_pred_tokens=int(os.environ.get("LLM_DRAFT_TOKENS", "10")),
+        )
+    else:
+        if not os.path.isfile(spec):
+            raise RuntimeError(f"LLM draft model file not found at: {spec}")
+        # the drafter sees the whole context, so it needs the main model's n_ctx
+        n_ctx = int(os.environ.get("LLM_DRAFT_N_CTX", os.environ.get("LLM_N_CTX", "2048")))
+        n_threads = int(os.environ.get("LLM_DRAFT_N_THREADS", "0")) or None
+        llm = llama_cpp.Llama(model_path=spec, n_ctx=n_ctx, n_threads=n_threads, verbose=False)
+        draft = DraftModel(llm, int(os.environ.get("LLM_DRAFT_TOKENS", "4")))
+    return CountingDraft(draft)
+
+
+def draft_kwargs(spec: Optional[str], llama_cpp) -> Dict[str, Any]:
+    """Llama() kwargs enabling speculative decoding for `spec` ({} when off)."""
+    if not spec:
+        return {}
+    # llama.cpp verifies drafts with every position's logits; llama_cpp sizes its
+    # logits buffer from the logits_all argument, so it must be passed explicitly
+    return {"draft_model": make_draft(spec, llama_cpp), "logits_all": True}
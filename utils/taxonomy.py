@@ -0,0 +1,323 @@
+# utils/taxonomy.py
+"""
+Role / skill taxonomy compiled into a matching index.
+- the source is a JSON file: roles (aliases + required skills), skills
+  (aliases) and generic role words ("engineer", "intern")
+- names and aliases are tokenized like the text they are matched in, so
+  "Front-End", "front end" and "FRONT END" are one phrase
+- a token trie over every name and alias finds all mentions in one
+  left-to-right pass (leftmost-longest): the cost is linear in the text
+  and only logarithmic in the number of roles / skills
+- forward (role -> skills) and inverted (skill -> roles) indexes
+- the compiled index is pickled to TAXONOMY_CACHE_DIR, keyed by the
+  source file's hash, so processes load it instead of recompiling;
+  .digest carries that hash for result caches keyed by the taxonomy
+  (benchmarks/bench_taxonomy.py measures compile / load / match at scale)
+
+Env: TAXONOMY_CACHE_DIR
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import re
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.environ.get("TAXONOMY_CACHE_DIR", "models/cache/taxonomy")
+
+# bump when the compiled layout changes
+FORMAT = 2
+
+ROLE = "role"
+SKILL = "skill"
+WORD = "word"
+_KINDS = (ROLE, SKILL, WORD)
+
+# "c++", "c#", "node.js" stay one token; other punctuation separates
+_TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9+#]+)*")
+
+# separator for string tables in the compiled form
+_SEP = "\0"
+
+
+def _fold(tok: str) -> str:
+    # plurals match their singular ("engineers", "stakeholders"); applied to
+    # taxonomy and text alike, so "aws" / "analytics" still meet themselves
+    return tok[:-1] if len(tok) > 3 and tok[-1] == "s" and tok[-2] != "s" else tok
+
+
+def tokenize(text: str) -> List[str]:
+    return [_fold(t) for t in _TOKEN_RE.findall((text or "").lower())]
+
+
+def _csr(groups: List[List[int]]) -> Tuple[array, array]:
+    """Row offsets + flat values for a list of int lists."""
+    offsets, values = array("q", [0]), array("q")
+    for g in groups:
+        values.extend(g)
+        offsets.append(len(values))
+    return offsets, values
+
+
+class TaxonomyIndex:
+    """Compiled taxonomy: a token trie plus role <-> skill indexes, all in
+    flat arrays and string tables (see _ARRAYS / _STRINGS), so unpickling
+    is a few buffer copies plus splitting the string tables; no dicts are
+    rebuilt per entry.
+
+    - tokens: sorted table, looked up by bisection
+    - trie: root edges in a dense array indexed by token id; deeper edges
+      as sorted (node * _STRIDE + token id) keys, looked up by bisection
+    - accept: per node, the slice of entries (kind, canonical name) ending there
+    - role -> skills and skill -> roles as offset / value arrays
+    """
+
+    _STRIDE = 1 << 32
+    _ARRAYS = ("_root", "_edge_keys", "_edge_nodes", "_acc_slot", "_acc_off", "_acc_ids",
+               "_entry_kind", "_entry_ref", "_rs_off", "_rs_ids", "_sr_off", "_sr_ids", "_phrase_skill")
+    _STRINGS = ("_tokens", "_entry_name", "roles", "skills", "_skill_phrases")
+
+    def __init__(self, source: Dict, digest: str = ""):
+        """Compile a taxonomy dict (the JSON file's contents); `digest` identifies the source."""
+        self.digest = digest
+        vocab: Dict[str, int] = {}
+        edges: Dict[int, int] = {}
+        accept: Dict[int, List[int]] = {}
+        entries: Dict[Tuple[str, str], int] = {}
+        order: List[Tuple[str, str]] = []
+        refs: List[int] = []
+        self.max_phrase = 0
+        nodes = 1
+
+        def add_phrase(phrase: str, kind: str, canonical: str, ref: int):
+            nonlocal nodes
+            tokens = tokenize(phrase)
+            if not tokens:
+                return
+            node = 0
+            for tok in tokens:
+                key = node * self._STRIDE + vocab.setdefault(tok, len(vocab))
+                nxt = edges.get(key)
+                if nxt is None:
+                    nxt = edges[key] = nodes
+                    nodes += 1
+                node = nxt
+            entry = entries.get((kind, canonical))
+            if entry is None:
+                entry = entries[(kind, canonical)] = len(order)
+                order.append((kind, canonical))
+                refs.append(ref)
+            hits = accept.setdefault(node, [])
+            for other in hits:
+                k, c = order[other]
+                if k == kind and c != canonical:
+                    raise ValueError(f"taxonomy: {phrase!r} is a {kind} alias of both {c!r} and {canonical!r}")
+            if entry not in hits:
+                hits.append(entry)
+            self.max_phrase = max(self.max_phrase, len(tokens))
+
+        self.skills: List[str] = []
+        skill_ix: Dict[str, int] = {}
+        self._skill_phrases: List[str] = []
+        phrase_skill: List[int] = []
+
+        def add_skill_phrase(phrase: str, ix: int):
+            add_phrase(phrase, SKILL, self.skills[ix], ix)
+            self._skill_phrases.append(phrase.lower())
+            phrase_skill.append(ix)
+
+        def add_skill(name: str) -> int:
+            name = name.lower()
+            if name not in skill_ix:
+                skill_ix[name] = len(self.skills)
+                self.skills.append(name)
+                add_skill_phrase(name, skill_ix[name])
+            return skill_ix[name]
+
+        for name, spec in source.get("skills", {}).items():
+            ix = add_skill(name)
+            for alias in (spec or {}).get("aliases", []):
+                add_skill_phrase(alias, ix)
+        self.roles: List[str] = []
+        role_skills: List[List[int]] = []
+        for name, spec in source.get("roles", {}).items():
+            role, spec, ix = name.lower(), spec or {}, len(self.roles)
+            add_phrase(role, ROLE, role, ix)
+            for alias in spec.get("aliases", []):
+                add_phrase(alias, ROLE, role, ix)
+            # skills only listed under a role are registered without aliases
+            role_skills.append(list(dict.fromkeys(add_skill(s) for s in spec.get("skills", []))))
+            self.roles.append(role)
+        for word in source.get("role_words", []):
+            add_phrase(word, WORD, word.lower(), -1)
+
+        # token ids follow sorted order so lookups can bisect the table
+        self._tokens = sorted(vocab)
+        remap = {vocab[t]: i for i, t in enumerate(self._tokens)}
+        self._root = array("q", [-1]) * len(self._tokens)
+        deep: Dict[int, int] = {}
+        for key, child in edges.items():
+            node, tid = divmod(key, self._STRIDE)
+            if node == 0:
+                self._root[remap[tid]] = child
+            else:
+                deep[node * self._STRIDE + remap[tid]] = child
+        keys = sorted(deep)
+        self._edge_keys = array("q", keys)
+        self._edge_nodes = array("q", [deep[k] for k in keys])
+        self._acc_slot = array("q", [-1]) * nodes
+        accept_nodes = sorted(accept)
+        for slot, node in enumerate(accept_nodes):
+            self._acc_slot[node] = slot
+        self._acc_off, self._acc_ids = _csr([accept[n] for n in accept_nodes])
+        self._entry_kind = array("b", [_KINDS.index(k) for k, _ in order])
+        self._entry_name = [c for _, c in order]
+        self._entry_ref = array("q", refs)
+        skill_roles: List[List[int]] = [[] for _ in self.skills]
+        for r, needed in enumerate(role_skills):
+            for ix in needed:
+                skill_roles[ix].append(r)
+        self._rs_off, self._rs_ids = _csr(role_skills)
+        self._sr_off, self._sr_ids = _csr(skill_roles)
+        self._phrase_skill = array("q", phrase_skill)
+
+    # ---- compiled form ----
+    def __getstate__(self):
+        state = {"format": FORMAT, "max_phrase": self.max_phrase}
+        state.update((name, getattr(self, name)) for name in self._ARRAYS)
+        state.update((name, _SEP.join(getattr(self, name))) for name in self._STRINGS)
+        return state
+
+    def __setstate__(self, state):
+        if state.get("format") != FORMAT:
+            raise ValueError("compiled taxonomy has an old format")
+        self.max_phrase = state["max_phrase"]
+        self.digest = ""  # set by load_taxonomy
+        for name in self._ARRAYS:
+            setattr(self, name, state[name])
+        for name in self._STRINGS:
+            setattr(self, name, state[name].split(_SEP) if state[name] else [])
+
+    # ---- matching ----
+    def _token_id(self, tok: str) -> int:
+        i = bisect_left(self._tokens, tok)
+        return i if i < len(self._tokens) and self._tokens[i] == tok else -1
+
+    def _step(self, node: int, tid: int) -> int:
+        if node == 0:
+            return self._root[tid]
+        key = node * self._STRIDE + tid
+        i = bisect_left(self._edge_keys, key)
+        return self._edge_nodes[i] if i < len(self._edge_keys) and self._edge_keys[i] == key else -1
+
+    def _find_ids(self, text: str) -> List[int]:
+        """Entry ids of every mention in `text`, in order (leftmost-longest)."""
+        ids = [self._token_id(t) for t in tokenize(text)]
+        out: List[int] = []
+        i, n = 0, len(ids)
+        while i < n:
+            node, j, best, best_end = 0, i, -1, i
+            while j < n and ids[j] >= 0:
+                node = self._step(node, ids[j])
+                if node < 0:
+                    break
+                j += 1
+                slot = self._acc_slot[node]
+                if slot >= 0:
+                    best, best_end = slot, j
+            if best >= 0:
+                out.extend(self._acc_ids[self._acc_off[best]:self._acc_off[best + 1]])
+                i = best_end
+            else:
+                i += 1
+        return out
+
+    def find(self, text: str) -> List[Tuple[str, str]]:
+        """(kind, canonical name) for every mention in `text`, in order.
+        Overlaps resolve leftmost-longest: "data scientist" is one role, not
+        the role word "data" plus something else."""
+        return [(_KINDS[self._entry_kind[e]], self._entry_name[e]) for e in self._find_ids(text)]
+
+    def _refs(self, text: str, kind: str) -> List[int]:
+        """Role / skill indexes mentioned in `text` (unique, in order)."""
+        k = _KINDS.index(kind)
+        return list(dict.fromkeys(self._entry_ref[e] for e in self._find_ids(text) if self._entry_kind[e] == k))
+
+    def roles_in(self, text: str) -> List[str]:
+        return [self.roles[i] for i in self._refs(text, ROLE)]
+
+    def skills_in(self, text: str) -> List[str]:
+        return [self.skills[i] for i in self._refs(text, SKILL)]
+
+    def mentions_role(self, text: str) -> bool:
+        """True if `text` names a role, a role word or a skill."""
+        return bool(self._find_ids(text))
+
+    def normalize_skills(self, skills: Iterable[str]) -> List[str]:
+        """Canonical names for listed skills ("scikit-learn" -> "scikit");
+        unknown skills are kept, lowercased."""
+        out: Dict[str, None] = {}
+        for s in skills:
+            for skill in self.skills_in(s) or [s.strip().lower()]:
+                out[skill] = None
+        return list(out)
+
+    def skills_for_roles(self, roles: Iterable[str]) -> List[str]:
+        """Required skills of the roles named in `roles` (free text, aliases ok)."""
+        needed: Dict[int, None] = {}
+        for text in roles:
+            for r in self._refs(text, ROLE):
+                needed.update(dict.fromkeys(self._rs_ids[self._rs_off[r]:self._rs_off[r + 1]]))
+        return [self.skills[i] for i in needed]
+
+    def roles_for_skill(self, skill: str) -> List[str]:
+        """Roles that require `skill` (any alias), via the inverted index."""
+        out: Dict[int, None] = {}
+        for i in self._refs(skill, SKILL):
+            out.update(dict.fromkeys(self._sr_ids[self._sr_off[i]:self._sr_off[i + 1]]))
+        return [self.roles[r] for r in out]
+
+    def skill_phrases(self) -> List[Tuple[str, str]]:
+        """(name or alias, canonical skill) for every skill phrase."""
+        return [(p, self.skills[i]) for p, i in zip(self._skill_phrases, self._phrase_skill)]
+
+    def __len__(self) -> int:
+        return len(self.roles) + len(self.skills)
+
+
+def _cache_path(data: bytes, cache_dir: Optional[str]) -> Optional[str]:
+    if not cache_dir:
+        return None
+    key = hashlib.sha256(data).hexdigest()[:32]
+    return os.path.join(cache_dir, f"{key}.v{FORMAT}.pkl")
+
+
+def load_taxonomy(path: str, cache_dir: Optional[str] = DEFAULT_CACHE_DIR) -> TaxonomyIndex:
+    """The compiled index for the taxonomy file at `path` (from the cache when fresh)."""
+    with open(path, "rb") as f:
+        data = f.read()
+    digest = hashlib.sha256(data).hexdigest()[:16]
+    cached = _cache_path(data, cache_dir)
+    if cached and os.path.isfile(cached):
+        try:
+            with open(cached, "rb") as f:
+                index = pickle.load(f)
+            if isinstance(index, TaxonomyIndex):
+                index.digest = digest
+                return index
+        except Exception:
+            pass
+    index = TaxonomyIndex(json.loads(data), digest)
+    if cached:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp = f"{cached}.{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cached)
+        except Exception:
+            pass
+    return index
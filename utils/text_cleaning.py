@@ -1,15 +1,27 @@
 # utils/text_cleaning.py
+import os
 import re
 from typing import List
-try:
+from utils.lazy import LazyResource
+from utils.segmenter import sentence_spans
+
+# "native" (utils/segmenter.py) or "punkt" (nltk, needs its data package)
+SENTENCE_SEGMENTER = os.environ.get("SENTENCE_SEGMENTER", "native")
+
+def _load_punkt():
+    """Import nltk punkt on first use. Only downloads when NLTK_AUTO_DOWNLOAD=1."""
     import nltk
-    nltk.data.find("tokenizers/punkt")
-except Exception:
     try:
-        import nltk
+        nltk.data.find("tokenizers/punkt")
+    except LookupError:
+        if os.environ.get("NLTK_AUTO_DOWNLOAD", "0") != "1":
+            raise
         nltk.download("punkt", quiet=True)
-    except Exception:
-        pass
+    from nltk import sent_tokenize
+    sent_tokenize("Warm up. Punkt.")  # fail here (not per call) if data is unusable
+    return sent_tokenize
+
+_punkt = LazyResource("nltk_punkt", _load_punkt)
 
 def clean_text(text: str) -> str:
     """Basic cleaning: normalize whitespace and strip."""
@@ -32,14 +44,17 @@ def extract_mentions(text: str) -> List[str]:
     return [m.strip("@") for m in re.findall(r"@\w[\w-]*", text)]
 
 def sentence_tokenize(text: str) -> List[str]:
-    """Split into sentences; fallback to simple split if nltk missing."""
-    text = clean_text(text)
-    try:
-        from nltk import sent_tokenize
-        return sent_tokenize(text)
-    except Exception:
-        # very simple fallback
-        return [s.strip() for s in re.split(r"[.!?]\s+", text) if s.strip()]
+    """Split into sentences (whitespace-normalized). Line breaks in `text` end sentences."""
+    if not text:
+        return []
+    if SENTENCE_SEGMENTER == "punkt":
+        sent_tokenize = _punkt.get()
+        if sent_tokenize is not None:
+            try:
+                return sent_tokenize(clean_text(text))
+            except Exception:
+                pass
+    return [clean_text(text[a:b]) for a, b in sentence_spans(text)]
 
 def count_words(text: str) -> int:
     return len(clean_text(text).split())
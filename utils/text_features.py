@@ -0,0 +1,161 @@
+# utils/text_features.py
+"""
+Single-pass text features shared by every scorer.
+
+TextFeatures cleans, lowercases and sentence-tokenizes a text once, and
+counts every registered lexicon term in one pass, so the post / profile
+scorers stop re-running clean_text, sentence_tokenize and `w in text`
+scans per check. Sentences are segmented on the raw text (line breaks
+end sentences) and kept as offsets (utils/segmenter.py).
+
+Term counts follow str.count semantics (substring, non-overlapping).
+Matching uses a pyahocorasick automaton when that package is installed;
+otherwise one C-level str.count per term over the shared lowercased text.
+A combined alternation regex was measured slower than both at every
+lexicon size, see benchmarks/bench_text_features.py.
+"""
+
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+from utils import text_cleaning
+from utils.segmenter import sentence_spans
+from utils.text_cleaning import clean_text, extract_hashtags, sentence_tokenize
+
+try:
+    import ahocorasick
+except Exception:
+    ahocorasick = None
+
+# below this size per-term str.count is as fast as the automaton
+AUTOMATON_MIN_TERMS = 16
+
+
+class Lexicon:
+    """A growable set of lowercase terms compiled into one matcher."""
+
+    def __init__(self, terms: Iterable[str] = (), automaton: Optional[bool] = None):
+        """automaton: force (True) / disable (False) the Aho-Corasick matcher; None = by size."""
+        self._use_automaton = automaton
+        self._terms: List[str] = []
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._automaton = None
+        self._compiled = False
+        self.add(terms)
+
+    def add(self, terms: Iterable[str]) -> List[str]:
+        """Register terms (lowercased); returns them so modules can keep constants."""
+        terms = [t.lower() for t in terms]
+        with self._lock:
+            for t in terms:
+                if t and t not in self._seen:
+                    self._seen.add(t)
+                    self._terms.append(t)
+                    self._compiled = False
+        return terms
+
+    @property
+    def terms(self) -> List[str]:
+        return list(self._terms)
+
+    def _compile(self):
+        with self._lock:
+            if self._compiled:
+                return
+            automaton = None
+            use = self._use_automaton
+            if use is None:
+                use = len(self._terms) >= AUTOMATON_MIN_TERMS
+            if use and ahocorasick is not None:
+                automaton = ahocorasick.Automaton()
+                for t in self._terms:
+                    automaton.add_word(t, (t, len(t)))
+                automaton.make_automaton()
+            self._automaton = automaton
+            self._compiled = True
+
+    def count_all(self, lower: str) -> Dict[str, int]:
+        """Occurrences of every term in `lower` (only terms that occur)."""
+        if not self._compiled:
+            self._compile()
+        if not lower:
+            return {}
+        if self._automaton is None:
+            counts = {}
+            for t in self._terms:
+                c = lower.count(t)
+                if c:
+                    counts[t] = c
+            return counts
+        counts: Dict[str, int] = {}
+        last_end: Dict[str, int] = {}
+        for end, (t, n) in self._automaton.iter(lower):
+            start = end - n + 1
+            if start >= last_end.get(t, 0):
+                counts[t] = counts.get(t, 0) + 1
+                last_end[t] = end + 1
+        return counts
+
+
+# terms used by the built-in scorers are registered here at import time
+LEXICON = Lexicon()
+
+
+def lexicon_terms(terms: Iterable[str]) -> List[str]:
+    """Register scorer keywords with the shared lexicon."""
+    return LEXICON.add(terms)
+
+
+class TextFeatures:
+    """Everything the scorers need from one text, computed once."""
+
+    def __init__(self, text: str, lexicon: Optional[Lexicon] = None):
+        self.raw = text or ""
+        self.text = clean_text(self.raw)
+        self.lower = self.text.lower()
+        self.words = self.text.split()
+        self.word_count = len(self.words)
+        self._lexicon = lexicon or LEXICON
+        self._hits: Optional[Dict[str, int]] = None
+        self._spans: Optional[List[Tuple[int, int]]] = None
+        self._sentences: Optional[List[str]] = None
+        self._hashtags: Optional[List[str]] = None
+
+    @classmethod
+    def of(cls, text: Union[str, "TextFeatures"]) -> "TextFeatures":
+        return text if isinstance(text, TextFeatures) else cls(text)
+
+    @property
+    def sentence_spans(self) -> List[Tuple[int, int]]:
+        """(start, end) of each sentence in .raw; line breaks are sentence ends."""
+        if self._spans is None:
+            self._spans = sentence_spans(self.raw)
+        return self._spans
+
+    @property
+    def sentences(self) -> List[str]:
+        if self._sentences is None:
+            if text_cleaning.SENTENCE_SEGMENTER == "punkt":
+                self._sentences = sentence_tokenize(self.raw)
+            else:
+                self._sentences = [clean_text(self.raw[a:b]) for a, b in self.sentence_spans]
+        return self._sentences
+
+    @property
+    def hashtags(self) -> List[str]:
+        if self._hashtags is None:
+            self._hashtags = extract_hashtags(self.text)
+        return self._hashtags
+
+    @property
+    def hits(self) -> Dict[str, int]:
+        if self._hits is None:
+            self._hits = self._lexicon.count_all(self.lower)
+        return self._hits
+
+    def count(self, term: str) -> int:
+        return self.hits.get(term, 0)
+
+    def has_any(self, terms: Iterable[str]) -> bool:
+        hits = self.hits
+        return any(t in hits for t in terms)